@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Load benchmark: sync views behind a WSGI thread pool vs the async views
+behind the ASGI handler, at the same client concurrency.
+
+Both run in-process against a throwaway file-backed test database. The
+WSGI side uses --threads worker threads (like gunicorn --threads); the ASGI
+side runs every in-flight request on one event loop. Latency is measured
+from when a request is admitted (at most --concurrency in flight) to its
+response, so WSGI requests waiting for a free thread count against it.
+--latency adds a sleep to every SQL query to stand in for a remote database.
+Reports throughput and p50/p99 latency.
+
+Django 4.2 runs async ORM queries on a single shared thread, so with a
+database-bound endpoint the ASGI side is limited to one query at a time;
+the numbers show what that costs against a thread pool on this setup.
+
+Usage: python benchmarks/asgi_benchmark.py [--endpoint view_loan] [--requests N]
+       [--concurrency C] [--threads T] [--latency MS]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'credit_system.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection, connections  # noqa: E402
+from django.test import AsyncClient, Client  # noqa: E402
+from django.test.utils import override_settings, setup_test_environment  # noqa: E402
+
+from loans.models import Customer, Loan  # noqa: E402
+
+
+ENDPOINTS = ('view_loan', 'view_customer_loans', 'health', 'check_eligibility')
+
+
+def populate(customers, loans_per_customer):
+    created = Customer.objects.bulk_create([
+        Customer(
+            first_name='Bench', last_name=str(i), age=30, phone_number=5000000000 + i,
+            monthly_income=100000, approved_limit=3600000
+        )
+        for i in range(customers)
+    ], batch_size=100)
+    Loan.objects.bulk_create([
+        Loan(
+            customer=customer, loan_amount=Decimal(10000 + j), tenure=12,
+            interest_rate=Decimal('10.50'), monthly_installment=Decimal('879.16'),
+            emis_paid_on_time=j, start_date=date(2024, 1, 1), end_date=date(2025, 1, 1),
+            status='active'
+        )
+        for customer in created for j in range(loans_per_customer)
+    ], batch_size=90)
+    return (
+        list(Customer.objects.values_list('customer_id', flat=True)),
+        list(Loan.objects.values_list('loan_id', flat=True)),
+    )
+
+
+def make_requests(endpoint, count, customer_ids, loan_ids, rng):
+    """[(method, path, json body or None)]"""
+    requests = []
+    for _ in range(count):
+        if endpoint == 'view_loan':
+            requests.append(('get', f'/view-loan/{rng.choice(loan_ids)}', None))
+        elif endpoint == 'view_customer_loans':
+            requests.append(('get', f'/view-loans/{rng.choice(customer_ids)}', None))
+        elif endpoint == 'health':
+            requests.append(('get', '/health', None))
+        else:
+            requests.append(('post', '/check-eligibility', {
+                'customer_id': rng.choice(customer_ids), 'loan_amount': 50000,
+                'interest_rate': 12, 'tenure': 12,
+            }))
+    return requests
+
+
+def add_latency(seconds):
+    def wrapper(execute, sql, params, many, context):
+        time.sleep(seconds)
+        return execute(sql, params, many, context)
+
+    for conn in connections.all():
+        conn.execute_wrappers.append(wrapper)
+
+
+def run_wsgi(requests, concurrency, threads, latency):
+    """C requests in flight, served by T threads; latency includes queueing for a thread"""
+    local = threading.local()
+
+    def serve(method, path, body, admitted):
+        if not hasattr(local, 'client'):
+            if latency:
+                add_latency(latency)
+            local.client = Client()
+        if method == 'get':
+            response = local.client.get(path)
+        else:
+            response = local.client.post(path, body, content_type='application/json')
+        assert response.status_code in (200, 304), (path, response.status_code)
+        return time.perf_counter() - admitted
+
+    in_flight = threading.BoundedSemaphore(concurrency)
+    futures = []
+    started = time.perf_counter()
+    with override_settings(ROOT_URLCONF='credit_system.urls'), ThreadPoolExecutor(threads) as pool:
+        for request in requests:
+            in_flight.acquire()
+            future = pool.submit(serve, *request, time.perf_counter())
+            future.add_done_callback(lambda _: in_flight.release())
+            futures.append(future)
+        timings = [future.result() for future in futures]
+        list(pool.map(lambda _: connections.close_all(), range(threads)))
+    return time.perf_counter() - started, timings
+
+
+def run_asgi(requests, concurrency, latency):
+    async def main():
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(concurrency)
+        timings = []
+
+        async def one(method, path, body):
+            async with semaphore:
+                started = time.perf_counter()
+                if method == 'get':
+                    response = await client.get(path)
+                else:
+                    response = await client.post(path, body, content_type='application/json')
+                timings.append(time.perf_counter() - started)
+                assert response.status_code in (200, 304), (path, response.status_code)
+
+        await asyncio.gather(*(one(*request) for request in requests))
+        return timings
+
+    if latency:
+        # The async ORM runs queries on its worker thread; install the wrapper there
+        from asgiref.sync import async_to_sync, sync_to_async
+        async_to_sync(sync_to_async(add_latency))(latency)
+    started = time.perf_counter()
+    with override_settings(ROOT_URLCONF='credit_system.asgi_urls'):
+        timings = asyncio.run(main())
+    return time.perf_counter() - started, timings
+
+
+def report(name, elapsed, timings):
+    timings = sorted(timings)
+    p50 = statistics.median(timings) * 1000
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1000
+    print(f'{name:<6} {len(timings) / elapsed:10.0f} req/s   p50 {p50:8.2f} ms   p99 {p99:8.2f} ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--endpoint', choices=ENDPOINTS, default='view_loan')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--latency', type=float, default=0, help='milliseconds added to every query')
+    parser.add_argument('--customers', type=int, default=500)
+    parser.add_argument('--loans', type=int, default=5, help='loans per customer')
+    args = parser.parse_args()
+
+    setup_test_environment()
+    workdir = tempfile.mkdtemp()
+    if connection.vendor == 'sqlite':
+        connection.settings_dict['TEST']['NAME'] = os.path.join(workdir, 'asgi_benchmark.sqlite3')
+    test_db = connection.creation.create_test_db(verbosity=0)
+    try:
+        customer_ids, loan_ids = populate(args.customers, args.loans)
+        connections.close_all()
+        rng = random.Random(0)
+        requests = make_requests(args.endpoint, args.requests, customer_ids, loan_ids, rng)
+
+        print(
+            f'{args.endpoint}: {args.requests} requests, concurrency {args.concurrency}, '
+            f'{args.threads} WSGI threads, {args.latency:g} ms per query'
+        )
+        report('wsgi', *run_wsgi(requests, args.concurrency, args.threads, args.latency / 1000))
+        report('asgi', *run_asgi(requests, args.concurrency, args.latency / 1000))
+    finally:
+        connections.close_all()
+        connection.creation.destroy_test_db(test_db, verbosity=0)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
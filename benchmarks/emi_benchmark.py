@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: per-call EMI cost before and after the shared annuity-factor table
+
+Usage: python benchmarks/emi_benchmark.py [--calls N]
+"""
+
+import argparse
+import os
+import random
+import sys
+import timeit
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from loans.emi import annuity_factor, calculate_emi  # noqa: E402
+
+
+def legacy_emi(loan_amount, interest_rate, tenure):
+    """The per-call Decimal power formerly used by LoanEligibilityService"""
+    loan_amount = Decimal(str(loan_amount))
+    interest_rate = Decimal(str(interest_rate))
+    tenure = int(tenure)
+
+    if interest_rate == 0:
+        return float(loan_amount / tenure)
+
+    monthly_rate = (interest_rate / 100) / 12
+    emi = loan_amount * monthly_rate * (1 + monthly_rate)**tenure
+    emi = emi / ((1 + monthly_rate)**tenure - 1)
+    return float(emi)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--calls', type=int, default=50000)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    # Realistic traffic: many amounts, a limited set of (rate, tenure) products
+    rates = [Decimal(f'{8 + step * 0.25:.2f}') for step in range(40)]
+    tenures = [6, 12, 18, 24, 36, 48, 60, 84, 120]
+    inputs = [
+        (Decimal(rng.randint(50000, 2000000)), rng.choice(rates), rng.choice(tenures))
+        for _ in range(args.calls)
+    ]
+
+    def run(fn):
+        for amount, rate, tenure in inputs:
+            fn(amount, rate, tenure)
+
+    print(f'{"implementation":<28}{"us/call":>10}')
+    legacy = min(timeit.repeat(lambda: run(legacy_emi), number=1, repeat=3))
+    print(f'{"legacy Decimal power":<28}{legacy / args.calls * 1e6:>10.2f}')
+
+    annuity_factor.cache_clear()
+    cold = timeit.timeit(lambda: run(calculate_emi), number=1)
+    print(f'{"annuity table (cold)":<28}{cold / args.calls * 1e6:>10.2f}')
+
+    warm = min(timeit.repeat(lambda: run(calculate_emi), number=1, repeat=3))
+    print(f'{"annuity table (warm)":<28}{warm / args.calls * 1e6:>10.2f}')
+    print(f'table entries: {annuity_factor.cache_info().currsize}, speedup: {legacy / warm:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Ingestion benchmark across input formats: the same customer and loan
+dataset written as xlsx, csv, parquet and ndjson, then ingested with
+ingest_customer_data + ingest_loan_data into a fresh throwaway test
+database per format.
+
+Reports the time to read the files alone (iterating the chunk readers) and
+the full ingestion time, with rows/sec, so the format's share of the cost
+is visible next to the database writes. Parquet needs pyarrow.
+
+Usage: python benchmarks/ingest_format_benchmark.py [--rows 100000] [--chunk-size N]
+       [--formats xlsx csv parquet ndjson]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'credit_system.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+import pandas as pd  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+
+from loans.readers import FORMATS, iter_chunks  # noqa: E402
+from loans.tasks import CUSTOMER_COLUMNS, LOAN_COLUMNS, ingest_customer_data, ingest_loan_data  # noqa: E402
+
+
+def make_frames(rows):
+    ids = range(1, rows + 1)
+    customers = pd.DataFrame({
+        'customer_id': ids,
+        'first_name': 'Bench',
+        'last_name': [f'Customer {i}' for i in ids],
+        'age': 30,
+        'phone_number': [5000000000 + i for i in ids],
+        'monthly_salary': 50000,
+        'approved_limit': 1800000,
+        'current_debt': 0,
+    })
+    loans = pd.DataFrame({
+        'customer_id': ids,
+        'loan_id': ids,
+        'loan_amount': 100000,
+        'tenure': 12,
+        'interest_rate': 10.5,
+        'monthly_repayment': 8815.0,
+        'EMIs_paid_on_time': 12,
+        'start_date': date(2020, 1, 1),
+        'end_date': date(2021, 1, 1),
+    })
+    return customers, loans
+
+
+def write(df, path, file_format):
+    if file_format == 'xlsx':
+        df.to_excel(path, index=False)
+    elif file_format == 'csv':
+        df.to_csv(path, index=False)
+    elif file_format == 'parquet':
+        df.to_parquet(path, index=False)
+    else:
+        df.to_json(path, orient='records', lines=True, date_format='iso')
+
+
+def read_all(customer_file, loan_file, chunk_size):
+    rows = sum(len(chunk) for chunk in iter_chunks(customer_file, list(CUSTOMER_COLUMNS), chunk_size))
+    rows += sum(len(chunk) for chunk in iter_chunks(loan_file, list(LOAN_COLUMNS), chunk_size))
+    return rows
+
+
+def ingest(customer_file, loan_file, chunk_size):
+    test_db = connection.creation.create_test_db(verbosity=0)
+    try:
+        started = time.monotonic()
+        customers = ingest_customer_data(customer_file, chunk_size)
+        loans = ingest_loan_data(loan_file, chunk_size)
+        elapsed = time.monotonic() - started
+        for result in (customers, loans):
+            assert result['status'] == 'success', result['message']
+        return elapsed
+    finally:
+        connection.creation.destroy_test_db(test_db, verbosity=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=100000, help='rows per file')
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    parser.add_argument('--formats', nargs='+', choices=FORMATS, default=list(FORMATS))
+    args = parser.parse_args()
+
+    # DEBUG would keep every executed statement in connection.queries
+    setup_test_environment(debug=False)
+    workdir = tempfile.mkdtemp()
+    if connection.vendor == 'sqlite':
+        connection.settings_dict['TEST']['NAME'] = os.path.join(workdir, 'format_benchmark.sqlite3')
+    customers, loans = make_frames(args.rows)
+    try:
+        print(f'{args.rows} customers + {args.rows} loans, chunk size {args.chunk_size}')
+        print(f"{'format':<8} {'file MB':>8} {'read s':>8} {'read rows/s':>12} {'ingest s':>9} {'ingest rows/s':>14}")
+        for file_format in args.formats:
+            customer_file = os.path.join(workdir, f'customers.{file_format}')
+            loan_file = os.path.join(workdir, f'loans.{file_format}')
+            write(customers, customer_file, file_format)
+            write(loans, loan_file, file_format)
+            size_mb = (os.path.getsize(customer_file) + os.path.getsize(loan_file)) / 2 ** 20
+
+            started = time.monotonic()
+            rows = read_all(customer_file, loan_file, args.chunk_size)
+            read_seconds = time.monotonic() - started
+            ingest_seconds = ingest(customer_file, loan_file, args.chunk_size)
+            print(
+                f'{file_format:<8} {size_mb:>8.1f} {read_seconds:>8.2f} {rows / read_seconds:>12.0f} '
+                f'{ingest_seconds:>9.2f} {rows / ingest_seconds:>14.0f}'
+            )
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
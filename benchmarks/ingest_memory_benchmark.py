@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark for Excel ingestion: peak RSS and throughput of
+pd.read_excel vs the streaming openpyxl reader (loans/readers.py), and of
+the full ingest_customer_data + ingest_loan_data tasks, which stream.
+
+For each size, writes a customer sheet and a loan sheet (one loan per
+customer) with openpyxl's write_only mode, then runs every case in a fresh
+child process so each peak RSS is its own. The ingest case writes into a
+throwaway file-backed test database.
+
+Usage: python benchmarks/ingest_memory_benchmark.py [--sizes 100000 1000000]
+       [--chunk-size N] [--cases read_excel stream ingest]
+"""
+
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'credit_system.settings')
+
+
+CASES = ('read_excel', 'stream', 'ingest')
+
+
+def write_sheets(directory, size):
+    from openpyxl import Workbook
+
+    customer_file = os.path.join(directory, f'customer_data_{size}.xlsx')
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append([
+        'customer_id', 'first_name', 'last_name', 'age', 'phone_number',
+        'monthly_salary', 'approved_limit', 'current_debt',
+    ])
+    for i in range(1, size + 1):
+        sheet.append([i, 'Bench', f'Customer {i}', 30, 5000000000 + i, 50000, 1800000, 0])
+    workbook.save(customer_file)
+
+    loan_file = os.path.join(directory, f'loan_data_{size}.xlsx')
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append([
+        'customer_id', 'loan_id', 'loan_amount', 'tenure', 'interest_rate',
+        'monthly_repayment', 'EMIs_paid_on_time', 'start_date', 'end_date',
+    ])
+    for i in range(1, size + 1):
+        sheet.append([i, i, 100000, 12, 10.5, 8815.0, 12, date(2020, 1, 1), date(2021, 1, 1)])
+    workbook.save(loan_file)
+    return customer_file, loan_file
+
+
+def run_case(case, customer_file, loan_file, chunk_size, workdir):
+    """Runs in the child process; returns (rows, seconds)"""
+    import django
+
+    django.setup()
+    import pandas as pd
+
+    from loans.readers import iter_excel_chunks
+    from loans.tasks import CUSTOMER_COLUMNS, LOAN_COLUMNS, ingest_customer_data, ingest_loan_data
+
+    started = time.monotonic()
+    if case == 'read_excel':
+        rows = len(pd.read_excel(customer_file)) + len(pd.read_excel(loan_file))
+        return rows, time.monotonic() - started
+
+    if case == 'stream':
+        rows = sum(len(chunk) for chunk in iter_excel_chunks(customer_file, list(CUSTOMER_COLUMNS), chunk_size))
+        rows += sum(len(chunk) for chunk in iter_excel_chunks(loan_file, list(LOAN_COLUMNS), chunk_size))
+        return rows, time.monotonic() - started
+
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    # DEBUG would keep every executed statement in connection.queries
+    setup_test_environment(debug=False)
+    if connection.vendor == 'sqlite':
+        connection.settings_dict['TEST']['NAME'] = os.path.join(workdir, 'ingest_benchmark.sqlite3')
+    test_db = connection.creation.create_test_db(verbosity=0)
+    try:
+        started = time.monotonic()
+        customers = ingest_customer_data(customer_file, chunk_size)
+        loans = ingest_loan_data(loan_file, chunk_size)
+        elapsed = time.monotonic() - started
+        for result in (customers, loans):
+            assert result['status'] == 'success', result['message']
+        rows = (
+            customers['customers_created'] + customers['customers_updated']
+            + loans['loans_created'] + loans['loans_updated']
+        )
+        return rows, elapsed
+    finally:
+        connection.creation.destroy_test_db(test_db, verbosity=0)
+
+
+def child(args):
+    rows, seconds = run_case(args.case, args.customer_file, args.loan_file, args.chunk_size, args.workdir)
+    # ru_maxrss is in kilobytes on Linux
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({'rows': rows, 'seconds': seconds, 'peak_mb': peak_mb}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100000, 1000000])
+    parser.add_argument('--chunk-size', type=int, default=5000)
+    parser.add_argument('--cases', nargs='+', choices=CASES, default=list(CASES))
+    parser.add_argument('--case', choices=CASES, help=argparse.SUPPRESS)
+    parser.add_argument('--customer-file', help=argparse.SUPPRESS)
+    parser.add_argument('--loan-file', help=argparse.SUPPRESS)
+    parser.add_argument('--workdir', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        child(args)
+        return
+
+    workdir = tempfile.mkdtemp()
+    try:
+        print(f"{'rows/sheet':>10} {'case':<10} {'seconds':>9} {'rows/sec':>10} {'peak RSS':>10}")
+        for size in args.sizes:
+            customer_file, loan_file = write_sheets(workdir, size)
+            for case in args.cases:
+                output = subprocess.run(
+                    [
+                        sys.executable, os.path.abspath(__file__), '--case', case,
+                        '--customer-file', customer_file, '--loan-file', loan_file,
+                        '--chunk-size', str(args.chunk_size), '--workdir', workdir,
+                    ],
+                    check=True, capture_output=True, text=True
+                ).stdout
+                result = json.loads(output.strip().splitlines()[-1])
+                print(
+                    f"{size:>10} {case:<10} {result['seconds']:>9.2f} "
+                    f"{result['rows'] / result['seconds']:>10.0f} {result['peak_mb']:>8.0f} MB"
+                )
+            os.remove(customer_file)
+            os.remove(loan_file)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark: serial POST /register calls vs POST /register/batch
+
+Runs against a throwaway file-backed test database (so every serial request
+pays a real commit, as it would in production) created from the project settings.
+
+Usage: python benchmarks/register_benchmark.py [--customers N]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'credit_system.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+
+from loans.serializers import BatchRegisterSerializer  # noqa: E402
+
+
+def customer(i, phone_base):
+    return {
+        'first_name': 'Bench',
+        'last_name': str(i),
+        'age': 20 + i % 60,
+        'monthly_income': 20000 + (i * 37) % 200000,
+        'phone_number': phone_base + i,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--customers', type=int, default=2000)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    workdir = tempfile.mkdtemp()
+    if connection.vendor == 'sqlite':
+        connection.settings_dict['TEST']['NAME'] = os.path.join(workdir, 'register_benchmark.sqlite3')
+    test_db = connection.creation.create_test_db(verbosity=0)
+    client = APIClient()
+    try:
+        items = [customer(i, 7000000000) for i in range(args.customers)]
+        started = time.perf_counter()
+        for item in items:
+            client.post('/register', item, format='json')
+        serial = time.perf_counter() - started
+
+        items = [customer(i, 8000000000) for i in range(args.customers)]
+        chunk = BatchRegisterSerializer.MAX_ITEMS
+        started = time.perf_counter()
+        for start in range(0, len(items), chunk):
+            client.post('/register/batch', {'requests': items[start:start + chunk]}, format='json')
+        batched = time.perf_counter() - started
+
+        print(f'customers:        {args.customers}')
+        print(f'serial /register: {args.customers / serial:10.0f} customers/s')
+        print(f'/register/batch:  {args.customers / batched:10.0f} customers/s')
+        print(f'speedup:          {serial / batched:10.1f}x')
+    finally:
+        connection.creation.destroy_test_db(test_db, verbosity=0)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Rendering benchmark for GET /view-loans/<customer_id>: the serializer path
+(model instances + CustomerLoanListSerializer + JSONRenderer) vs the fast path
+(values_list + precompiled row functions + FastJSONRenderer).
+
+Both paths query the database, so the numbers are end-to-end for the view
+body. Every size checks that the two outputs are byte-identical.
+
+Usage: python benchmarks/render_benchmark.py [--sizes 10 1000 100000] [--repeat N]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'credit_system.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from loans import renderers  # noqa: E402
+from loans.models import Customer, Loan  # noqa: E402
+from loans.renderers import FastJSONRenderer  # noqa: E402
+from loans.rows import LOAN_LIST_COLUMNS, loan_list_row  # noqa: E402
+from loans.serializers import CustomerLoanListSerializer  # noqa: E402
+
+
+def make_customer(index, loans):
+    customer = Customer.objects.create(
+        first_name='Bench', last_name=str(index), age=30, phone_number=6000000000 + index,
+        monthly_income=100000, approved_limit=3600000
+    )
+    Loan.objects.bulk_create(
+        [
+            Loan(
+                customer=customer,
+                loan_amount=Decimal(10000 + i),
+                tenure=12 + i % 108,
+                interest_rate=Decimal('10.50'),
+                monthly_installment=Decimal('1234.56'),
+                emis_paid_on_time=i % 12,
+                start_date=date(2024, 1, 1),
+                end_date=date(2025, 1, 1),
+                status='completed' if i % 5 == 0 else 'active',
+            )
+            for i in range(loans)
+        ],
+        batch_size=90
+    )
+    return customer.customer_id
+
+
+def serializer_path(customer_id):
+    loans = Loan.objects.filter(customer_id=customer_id).order_by('pk')
+    return JSONRenderer().render(CustomerLoanListSerializer(loans, many=True).data)
+
+
+def fast_path(customer_id):
+    rows = Loan.objects.filter(customer_id=customer_id).order_by('pk').values_list(*LOAN_LIST_COLUMNS)
+    return FastJSONRenderer().render([loan_list_row(row) for row in rows])
+
+
+def best_of(func, customer_id, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = func(customer_id)
+        timings.append(time.perf_counter() - started)
+    return min(timings), body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 1000, 100000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    workdir = tempfile.mkdtemp()
+    if connection.vendor == 'sqlite':
+        connection.settings_dict['TEST']['NAME'] = os.path.join(workdir, 'render_benchmark.sqlite3')
+    test_db = connection.creation.create_test_db(verbosity=0)
+    try:
+        print(f'orjson: {"yes" if renderers.orjson is not None else "no (JSONRenderer fallback)"}')
+        print(f'{"loans":>8} {"serializer rows/s":>18} {"fast rows/s":>12} {"speedup":>8}')
+        for index, size in enumerate(args.sizes):
+            customer_id = make_customer(index, size)
+            slow, expected = best_of(serializer_path, customer_id, args.repeat)
+            fast, body = best_of(fast_path, customer_id, args.repeat)
+            if body != expected:
+                raise SystemExit(f'output differs for {size} loans')
+            print(f'{size:>8} {size / slow:>18.0f} {size / fast:>12.0f} {slow / fast:>7.1f}x')
+    finally:
+        connection.creation.destroy_test_db(test_db, verbosity=0)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'credit_system.settings')
+# Serve the read endpoints with the async views in loans/async_views.py
+os.environ.setdefault('DJANGO_ROOT_URLCONF', 'credit_system.asgi_urls')
 
 application = get_asgi_application()
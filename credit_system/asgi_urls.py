@@ -0,0 +1,11 @@
+"""
+URL configuration for ASGI deployments: the same routes as urls.py, with
+the read endpoints served by async views (see loans/async_urls.py).
+"""
+from django.contrib import admin
+from django.urls import path, include
+
+urlpatterns = [
+    path('admin/', admin.site.urls),
+    path('', include('loans.async_urls')),
+]
@@ -52,7 +52,8 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
-ROOT_URLCONF = 'credit_system.urls'
+# asgi.py points this at credit_system.asgi_urls, which serves the read endpoints with async views
+ROOT_URLCONF = os.environ.get('DJANGO_ROOT_URLCONF', 'credit_system.urls')
 
 TEMPLATES = [
     {
@@ -132,12 +133,72 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Cache Configuration
+# Set REDIS_URL to share cached credit scores across web and worker processes
+REDIS_URL = os.environ.get('REDIS_URL')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Credit score cache: in-process LRU (MAX_ENTRIES) in front of the ALIAS backend
+CREDIT_SCORE_CACHE = {
+    'ALIAS': 'default',
+    'MAX_ENTRIES': 10000,
+    'TIMEOUT': 24 * 60 * 60,
+}
+
+# Rendered /view-loan and /view-loans responses: in-process LRU (MAX_ENTRIES)
+# in front of the ALIAS backend; entries expire after TIMEOUT seconds
+RESPONSE_CACHE = {
+    'ALIAS': 'default',
+    'MAX_ENTRIES': 10000,
+    'TIMEOUT': 5 * 60,
+}
+
+# /health reports estimated row counts cached for STATS_TTL seconds and
+# refreshed by the refresh_health_stats beat task below
+HEALTH_CHECK = {
+    'ALIAS': 'default',
+    'STATS_TTL': 5 * 60,
+}
+
+# Idempotency-Key replay store: keys expire after TTL seconds; a duplicate
+# that arrives while the first request is running waits up to WAIT_TIMEOUT.
+# A claim still in progress after LEASE seconds (its worker died) is reclaimed
+IDEMPOTENCY_KEYS = {
+    'TTL': 24 * 60 * 60,
+    'WAIT_TIMEOUT': 10,
+    'POLL_INTERVAL': 0.1,
+    'LEASE': 60,
+}
+
 # Celery Configuration
-CELERY_BROKER_URL = 'redis://localhost:6379/0'
-CELERY_RESULT_BACKEND = 'redis://localhost:6379/0'
+CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'redis://localhost:6379/0')
+CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND', 'redis://localhost:6379/0')
+# CELERY_TASK_ALWAYS_EAGER=1 runs tasks (chords included) in the calling
+# process, with no broker or worker; for local runs and tests
+CELERY_TASK_ALWAYS_EAGER = os.environ.get('CELERY_TASK_ALWAYS_EAGER', '').lower() in ('1', 'true', 'yes')
+CELERY_TASK_EAGER_PROPAGATES = CELERY_TASK_ALWAYS_EAGER
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
+CELERY_BEAT_SCHEDULE = {
+    'refresh-health-stats': {
+        'task': 'loans.tasks.refresh_health_stats',
+        'schedule': 60.0,
+    },
+}
 
 # REST Framework settings
 REST_FRAMEWORK = {
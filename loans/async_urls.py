@@ -0,0 +1,25 @@
+"""
+loans.urls with the async views from async_views.py swapped in, for ASGI
+deployments. Paths and names are unchanged, so reverse() and clients work
+against either.
+"""
+from django.urls import path
+
+from . import async_views
+from .urls import urlpatterns as sync_urlpatterns
+
+
+ASYNC_VIEWS = {
+    'health_check': async_views.health_check,
+    'health_live': async_views.health_live,
+    'health_ready': async_views.health_ready,
+    'check_eligibility': async_views.check_eligibility,
+    'view_loan': async_views.view_loan,
+    'view_customer_loans': async_views.view_customer_loans,
+}
+
+urlpatterns = [
+    path(str(pattern.pattern), ASYNC_VIEWS[pattern.name], name=pattern.name)
+    if pattern.name in ASYNC_VIEWS else pattern
+    for pattern in sync_urlpatterns
+]
@@ -0,0 +1,257 @@
+"""
+Async (ASGI) versions of the hot read endpoints.
+
+These are plain Django async views rather than DRF views (DRF 3.14 cannot
+run async views); they use the async ORM and the async cache API so a
+worker never blocks on a slow query or client, and return the same status
+codes and byte-identical JSON bodies as their sync counterparts in views.py.
+credit_system/asgi.py routes to them through loans/async_urls.py.
+"""
+import json
+from datetime import datetime
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from rest_framework import status
+
+from . import response_cache
+from .conditional import acustomer_loans_validators, aloan_validators, async_condition
+from .health import ping_database, table_stats
+from .models import Customer, Loan
+from .renderers import FastJSONRenderer, aiter_ndjson
+from .rows import LOAN_LIST_COLUMNS, loan_list_page, loan_list_row
+from .serializers import CustomerLoanListQuerySerializer, LoanRequestSerializer
+from .services import CreditScoreService, CustomerCreditContext, LoanEligibilityService
+
+
+STREAM_CHUNK_SIZE = 2000
+
+
+def _json_response(data, status_code=status.HTTP_200_OK):
+    return HttpResponse(
+        FastJSONRenderer().render(data), status=status_code, content_type='application/json'
+    )
+
+
+def allow_methods(*methods):
+    """Answer other methods with the same 405 body DRF's @api_view sends"""
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                response = _json_response(
+                    {'detail': f'Method "{request.method}" not allowed.'},
+                    status.HTTP_405_METHOD_NOT_ALLOWED
+                )
+                response['Allow'] = ', '.join(methods)
+                return response
+            return await view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _parse_json(request):
+    """Request body as parsed by DRF's JSONParser, or an error response"""
+    if not request.body:
+        return {}, None
+    if request.content_type != 'application/json':
+        return None, _json_response(
+            {'detail': f'Unsupported media type "{request.META.get("CONTENT_TYPE", "")}" in request.'},
+            status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+        )
+    try:
+        return json.loads(request.body), None
+    except ValueError as e:
+        return None, _json_response(
+            {'detail': f'JSON parse error - {str(e)}'}, status.HTTP_400_BAD_REQUEST
+        )
+
+
+async def _aiter_rows(loans, chunk_size, limit=None):
+    """
+    Yield LOAN_LIST_COLUMNS rows of a loan_id-ordered queryset, fetching
+    one keyset chunk per query. (QuerySet.aiterator() runs values_list()
+    queries synchronously in this Django version.)
+    """
+    remaining = limit
+    while remaining is None or remaining > 0:
+        size = chunk_size if remaining is None else min(chunk_size, remaining)
+        chunk = [row async for row in loans.values_list(*LOAN_LIST_COLUMNS)[:size]]
+        for row in chunk:
+            yield row
+        if len(chunk) < size:
+            return
+        loans = loans.filter(loan_id__gt=chunk[-1][0])
+        if remaining is not None:
+            remaining -= size
+
+
+@allow_methods('GET', 'HEAD')
+async def health_live(request):
+    """
+    Liveness probe: the process is serving requests. Never touches the database.
+    """
+    return _json_response({"status": "alive", "timestamp": datetime.now().isoformat()})
+
+
+@allow_methods('GET', 'HEAD')
+async def health_ready(request):
+    """
+    Readiness probe: one SELECT 1 round trip, reported with its latency
+    """
+    try:
+        latency_ms = await sync_to_async(ping_database)()
+    except Exception as e:
+        return _json_response(
+            {
+                "status": "unavailable",
+                "timestamp": datetime.now().isoformat(),
+                "database": "disconnected",
+                "error": str(e)
+            },
+            status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+    return _json_response({
+        "status": "ready",
+        "timestamp": datetime.now().isoformat(),
+        "database": "connected",
+        "database_latency_ms": latency_ms
+    })
+
+
+@allow_methods('GET', 'HEAD')
+async def health_check(request):
+    """
+    Health check endpoint to monitor application status
+    """
+    try:
+        # Test database connection
+        latency_ms = await sync_to_async(ping_database)()
+
+        health_status = {
+            "status": "healthy",
+            "timestamp": datetime.now().isoformat(),
+            "database": "connected",
+            "database_latency_ms": latency_ms,
+            # Estimated row counts, cached and refreshed in the background
+            "stats": await sync_to_async(table_stats)(),
+            "credit_score_cache": CreditScoreService.cache_stats(),
+            "response_cache": response_cache.cache_stats()
+        }
+
+        return _json_response(health_status)
+
+    except Exception as e:
+        health_status = {
+            "status": "unhealthy",
+            "timestamp": datetime.now().isoformat(),
+            "error": str(e)
+        }
+        return _json_response(health_status, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@allow_methods('POST')
+async def check_eligibility(request):
+    """
+    Check loan eligibility for a customer
+    """
+    data, error_response = _parse_json(request)
+    if error_response is not None:
+        return error_response
+
+    serializer = LoanRequestSerializer(data=data)
+    serializer.is_valid()
+    errors = dict(serializer.errors)
+
+    # Same field-level customer check as CheckEligibilitySerializer, reported
+    # alongside any other field errors
+    state = None
+    if isinstance(data, dict) and not errors.get('non_field_errors') and 'customer_id' not in errors:
+        customer_id = serializer.fields['customer_id'].run_validation(data.get('customer_id'))
+        state = await CreditScoreService.aget_credit_state(customer_id)
+        if state is None:
+            errors = {'customer_id': [f"Customer with ID {customer_id} does not exist"], **errors}
+    if errors:
+        return _json_response(errors, status.HTTP_400_BAD_REQUEST)
+    customer_id = serializer.validated_data['customer_id']
+
+    try:
+        result = LoanEligibilityService.check_eligibility(
+            customer_id,
+            serializer.validated_data['loan_amount'],
+            serializer.validated_data['interest_rate'],
+            serializer.validated_data['tenure'],
+            credit_context=CustomerCreditContext(customer_id, state)
+        )
+        return _json_response(result)
+    except Exception as e:
+        return _json_response(
+            {'error': f'Failed to check eligibility: {str(e)}'},
+            status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@allow_methods('GET', 'HEAD')
+@async_condition(aloan_validators)
+async def view_loan(request, loan_id):
+    """
+    View loan details by loan ID
+    """
+    try:
+        body = await response_cache.aloan_body(loan_id)
+        if body is None:
+            raise Http404('No Loan matches the given query.')
+        return HttpResponse(body, content_type='application/json')
+    except Exception as e:
+        return _json_response(
+            {'error': f'Failed to retrieve loan: {str(e)}'},
+            status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@allow_methods('GET', 'HEAD')
+@async_condition(acustomer_loans_validators)
+async def view_customer_loans(request, customer_id):
+    """
+    View all loans for a customer (see views.view_customer_loans for the
+    limit, cursor and stream parameters)
+    """
+    query = CustomerLoanListQuerySerializer(data=request.GET)
+    if not query.is_valid():
+        return _json_response(query.errors, status.HTTP_400_BAD_REQUEST)
+    params = query.validated_data
+
+    async def customer_loans():
+        # Check if customer exists
+        if not await Customer.objects.filter(customer_id=customer_id).aexists():
+            raise Http404('No Customer matches the given query.')
+
+        loans = Loan.objects.filter(customer_id=customer_id).order_by('loan_id')
+        if 'cursor' in params:
+            loans = loans.filter(loan_id__gt=params['cursor'])
+        return loans
+
+    async def build():
+        rows = (await customer_loans()).values_list(*LOAN_LIST_COLUMNS)
+        if 'limit' in params:
+            page_rows = [row async for row in rows[:params['limit'] + 1]]
+            return loan_list_page(request, page_rows, params['limit'])
+        return [loan_list_row(row) async for row in rows]
+
+    try:
+        if params.get('stream') == 'ndjson':
+            rows = _aiter_rows(await customer_loans(), STREAM_CHUNK_SIZE, params.get('limit'))
+            return StreamingHttpResponse(
+                aiter_ndjson(rows, loan_list_row), content_type='application/x-ndjson'
+            )
+
+        body = await response_cache.acustomer_loans_body(
+            customer_id, request.build_absolute_uri(), build
+        )
+        return HttpResponse(body, content_type='application/json')
+    except Exception as e:
+        return _json_response(
+            {'error': f'Failed to retrieve customer loans: {str(e)}'},
+            status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
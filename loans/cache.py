@@ -0,0 +1,316 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.db import connection, transaction
+
+
+_MISSING = object()
+_local = threading.local()
+
+
+class LRUCache:
+    """
+    Thread-safe in-process LRU cache with hit/miss/eviction counters. With a
+    timeout (seconds), entries expire like the shared backend's: an expired
+    entry is dropped on read and counts as a miss.
+    """
+
+    def __init__(self, maxsize, timeout=None):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                self.misses += 1
+                return default
+            value, expires_at = self._data[key]
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        expires_at = None if self.timeout is None else time.monotonic() + self.timeout
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        return {
+            'size': len(self._data),
+            'max_entries': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+
+def _version_key(name):
+    return f'version:{name}'
+
+
+def get_versions(names, alias='default'):
+    """
+    Return the current version token for each name, creating missing ones.
+    Tokens are random rather than counters so that a culled version key can
+    never resurrect entries cached under an older token.
+    """
+    cache = caches[alias]
+    keys = [_version_key(name) for name in names]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            token = uuid.uuid4().hex
+            if not cache.add(key, token, timeout=None):
+                token = cache.get(key, token)
+            found[key] = token
+    return [found[key] for key in keys]
+
+
+async def aget_versions(names, alias='default'):
+    """Async get_versions, through the cache backend's async API"""
+    cache = caches[alias]
+    keys = [_version_key(name) for name in names]
+    found = await cache.aget_many(keys)
+    for key in keys:
+        if key not in found:
+            token = uuid.uuid4().hex
+            if not await cache.aadd(key, token, timeout=None):
+                token = await cache.aget(key, token)
+            found[key] = token
+    return [found[key] for key in keys]
+
+
+def bump_versions(names, alias='default'):
+    """
+    Invalidate every entry derived from the given version names.
+
+    Versions are bumped immediately (so the writing thread never reads stale
+    entries) and again on commit (so entries other processes cached from
+    pre-commit data are dropped too). Until the commit, or the rollback of
+    the block that bumped them, the names are marked dirty for this thread
+    and lookups on them bypass the cache entirely.
+    """
+    names = list(names)
+    if not names:
+        return
+
+    def bump():
+        caches[alias].set_many(
+            {_version_key(name): uuid.uuid4().hex for name in names}, timeout=None
+        )
+
+    bump()
+    if connection.in_atomic_block:
+        pending = _pending_bumps()
+
+        def on_commit():
+            bump()
+            pending.pop(on_commit, None)
+
+        pending[on_commit] = names
+        transaction.on_commit(on_commit)
+
+
+def _pending_bumps():
+    """
+    This thread's on-commit bumps that have not run yet, mapped to their
+    names. Django drops the callbacks of a transaction (or savepoint) that
+    rolls back, so bumps no longer queued on the connection are forgotten
+    here too rather than leaving their names dirty for good.
+    """
+    if not hasattr(_local, 'pending'):
+        _local.pending = {}
+    pending = _local.pending
+    if pending:
+        queued = {entry[1] for entry in connection.run_on_commit}
+        for callback in [callback for callback in pending if callback not in queued]:
+            del pending[callback]
+    return pending
+
+
+def _dirty_names():
+    """Names bumped inside this thread's open transaction"""
+    return set().union(*_pending_bumps().values())
+
+
+class VersionedCache:
+    """
+    Two-tier cache: an in-process LRU in front of a shared Django cache
+    backend. Entries are keyed on version tokens kept in the shared backend,
+    so bumping a version invalidates derived entries in every process.
+    """
+
+    def __init__(self, prefix, alias='default', max_entries=1024, timeout=None):
+        self.prefix = prefix
+        self.alias = alias
+        self.timeout = timeout
+        self.local = LRUCache(max_entries, timeout)
+        self.shared_hits = 0
+        self.misses = 0
+        self.bypasses = 0
+
+    @classmethod
+    def from_settings(cls, prefix, options):
+        return cls(
+            prefix,
+            alias=options.get('ALIAS', 'default'),
+            max_entries=options.get('MAX_ENTRIES', 1024),
+            timeout=options.get('TIMEOUT'),
+        )
+
+    def get(self, key, version_names, default=None):
+        """Return the cached value for key, or default on a miss; never stores"""
+        if _dirty_names().intersection(version_names):
+            self.bypasses += 1
+            return default
+        full_key = ':'.join([self.prefix, str(key)] + get_versions(version_names, self.alias))
+        value = self.local.get(full_key, _MISSING)
+        if value is _MISSING:
+            value = caches[self.alias].get(full_key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self.shared_hits += 1
+            self.local.set(full_key, value)
+        return value
+
+    async def aget(self, key, version_names, default=None):
+        """Async get"""
+        if _dirty_names().intersection(version_names):
+            self.bypasses += 1
+            return default
+        versions = await aget_versions(version_names, self.alias)
+        full_key = ':'.join([self.prefix, str(key)] + versions)
+        value = self.local.get(full_key, _MISSING)
+        if value is _MISSING:
+            value = await caches[self.alias].aget(full_key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self.shared_hits += 1
+            self.local.set(full_key, value)
+        return value
+
+    def get_or_compute(self, key, version_names, compute):
+        """Return the cached value for key, computing and storing it on a miss"""
+        return self.get_or_compute_many(
+            {key: (key, version_names)}, lambda keys: {key: compute()}
+        )[key]
+
+    def get_or_compute_many(self, entries, compute_many):
+        """
+        Batch lookup. entries maps an identifier to (key, version_names);
+        compute_many receives the identifiers that missed and returns
+        {identifier: value}. Uses one round trip each for versions and values.
+        """
+        dirty = _dirty_names()
+        results = {}
+        pending = {}
+        bypassed = []
+        for ident, (key, names) in entries.items():
+            if dirty.intersection(names):
+                bypassed.append(ident)
+            else:
+                pending[ident] = (key, names)
+        self.bypasses += len(bypassed)
+
+        all_names = list(dict.fromkeys(
+            name for _, names in pending.values() for name in names
+        ))
+        versions = dict(zip(all_names, get_versions(all_names, self.alias))) if all_names else {}
+
+        full_keys = {}
+        for ident, (key, names) in pending.items():
+            full_key = ':'.join([self.prefix, str(key)] + [versions[name] for name in names])
+            value = self.local.get(full_key, _MISSING)
+            if value is not _MISSING:
+                results[ident] = value
+            else:
+                full_keys[ident] = full_key
+
+        shared = caches[self.alias]
+        if full_keys:
+            found = shared.get_many(list(full_keys.values()))
+            for ident, full_key in list(full_keys.items()):
+                if full_key in found:
+                    self.shared_hits += 1
+                    results[ident] = found[full_key]
+                    self.local.set(full_key, found[full_key])
+                    del full_keys[ident]
+
+        missed = list(full_keys) + bypassed
+        if missed:
+            self.misses += len(full_keys)
+            computed = compute_many(missed)
+            to_store = {}
+            for ident in missed:
+                results[ident] = computed.get(ident)
+                if ident in full_keys:
+                    to_store[full_keys[ident]] = results[ident]
+                    self.local.set(full_keys[ident], results[ident])
+            if to_store:
+                shared.set_many(to_store, timeout=self.timeout)
+
+        return results
+
+    async def aget_or_compute(self, key, version_names, compute):
+        """Async get_or_compute for one key; compute is a coroutine function"""
+        if _dirty_names().intersection(version_names):
+            self.bypasses += 1
+            return await compute()
+
+        versions = await aget_versions(version_names, self.alias)
+        full_key = ':'.join([self.prefix, str(key)] + versions)
+        value = self.local.get(full_key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        shared = caches[self.alias]
+        value = await shared.aget(full_key, _MISSING)
+        if value is not _MISSING:
+            self.shared_hits += 1
+        else:
+            self.misses += 1
+            value = await compute()
+            await shared.aset(full_key, value, timeout=self.timeout)
+        self.local.set(full_key, value)
+        return value
+
+    def clear_local(self):
+        self.local.clear()
+
+    def stats(self):
+        local = self.local.stats()
+        return {
+            'size': local['size'],
+            'max_entries': local['max_entries'],
+            'local_hits': local['hits'],
+            'shared_hits': self.shared_hits,
+            'misses': self.misses,
+            'evictions': local['evictions'],
+            'bypasses': self.bypasses,
+        }
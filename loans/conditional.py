@@ -0,0 +1,113 @@
+"""
+Validators for conditional GETs on the loan read endpoints, so
+django.views.decorators.http.condition can answer If-None-Match /
+If-Modified-Since with a 304 before the view renders anything.
+
+/view-loans validators come from response_cache, which on a miss reads only
+the loans' updated_at and count in one indexed query; the list has an ETag
+but no Last-Modified (see response_cache.customer_loans_etag). /view-loan
+validators are cached apart from the body too, and a miss reads only the
+loan's and its customer's updated_at.
+
+Lookups are memoized on the request because condition asks for the ETag
+and Last-Modified separately, and the view reuses them.
+"""
+import datetime
+from functools import wraps
+
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from . import response_cache
+from .serializers import CustomerLoanListQuerySerializer
+
+
+def _memoized(request, key, compute):
+    # Views see DRF's Request; the decorator sees the underlying HttpRequest
+    request = getattr(request, '_request', request)
+    validators = request.__dict__.setdefault('_conditional_validators', {})
+    if key not in validators:
+        validators[key] = compute()
+    return validators[key]
+
+
+async def _amemoized(request, key, compute):
+    validators = request.__dict__.setdefault('_conditional_validators', {})
+    if key not in validators:
+        validators[key] = await compute()
+    return validators[key]
+
+
+def loan_validators(request, loan_id):
+    """/view-loan validators for this request, or None if the loan does not exist"""
+    return _memoized(request, ('loan', loan_id), lambda: response_cache.loan_validators(loan_id))
+
+
+def customer_loans_etag(request, customer_id):
+    """
+    ETag for /view-loans/<customer_id>. Returns None for unknown customers
+    or invalid parameters, leaving those responses to the view.
+    """
+    def compute():
+        if not CustomerLoanListQuerySerializer(data=request.GET).is_valid():
+            return None
+        return response_cache.customer_loans_etag(customer_id, request.GET.urlencode())
+    return _memoized(request, ('customer-loans', customer_id), compute)
+
+
+def loan_etag(request, loan_id):
+    validators = loan_validators(request, loan_id)
+    return validators['etag'] if validators else None
+
+
+def loan_last_modified(request, loan_id):
+    validators = loan_validators(request, loan_id)
+    return validators['last_modified'] if validators else None
+
+
+async def aloan_validators(request, loan_id):
+    """Async loan_validators, as (etag, last_modified) for async_condition"""
+    validators = await _amemoized(
+        request, ('loan', loan_id), lambda: response_cache.aloan_validators(loan_id)
+    )
+    return (validators['etag'], validators['last_modified']) if validators else (None, None)
+
+
+async def acustomer_loans_validators(request, customer_id):
+    """Async customer_loans_etag, as (etag, None) for async_condition"""
+    async def compute():
+        if not CustomerLoanListQuerySerializer(data=request.GET).is_valid():
+            return None
+        return await response_cache.acustomer_loans_etag(customer_id, request.GET.urlencode())
+    return await _amemoized(request, ('customer-loans', customer_id), compute), None
+
+
+def async_condition(validators_func):
+    """
+    django.views.decorators.http.condition for async views (this Django
+    version's decorator is sync-only). validators_func is a coroutine
+    function returning (etag, last_modified) for the view's arguments.
+    """
+    def decorator(func):
+        @wraps(func)
+        async def inner(request, *args, **kwargs):
+            etag, last_modified = await validators_func(request, *args, **kwargs)
+            timestamp = None
+            if last_modified:
+                if not timezone.is_aware(last_modified):
+                    last_modified = timezone.make_aware(last_modified, datetime.timezone.utc)
+                timestamp = int(last_modified.timestamp())
+
+            response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+            if response is None:
+                response = await func(request, *args, **kwargs)
+
+            if request.method in ('GET', 'HEAD'):
+                if timestamp and not response.has_header('Last-Modified'):
+                    response.headers['Last-Modified'] = http_date(timestamp)
+                if etag:
+                    response.headers.setdefault('ETag', etag)
+            return response
+        return inner
+    return decorator
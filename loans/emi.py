@@ -0,0 +1,53 @@
+"""
+Shared EMI (equated monthly installment) calculation.
+
+EMI = P * r * (1 + r)^n / ((1 + r)^n - 1), where r is the monthly rate.
+Everything after P depends only on (rate, tenure), so it is computed once as
+an annuity factor and memoized. Rates are keyed in whole basis points, which
+is exact for the two-decimal interest_rate column, and EMIs are rounded half
+up to the paisa.
+"""
+from decimal import Context, Decimal, ROUND_HALF_UP
+from functools import lru_cache
+
+
+PAISA = Decimal('0.01')
+BASIS_POINTS_PER_UNIT = Decimal('10000')
+
+# Enough headroom for every (rate, tenure) pair the API can produce
+ANNUITY_TABLE_SIZE = 1 << 17
+
+# 40 significant digits keeps principal * factor exact well past the paisa
+_CONTEXT = Context(prec=40, rounding=ROUND_HALF_UP)
+
+
+def _to_decimal(value):
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+@lru_cache(maxsize=4096)
+def rate_to_basis_points(annual_rate):
+    """Convert an annual percentage rate (e.g. 10.5) to basis points (1050)"""
+    return int((_to_decimal(annual_rate) * 100).to_integral_value(rounding=ROUND_HALF_UP))
+
+
+@lru_cache(maxsize=ANNUITY_TABLE_SIZE)
+def annuity_factor(rate_bp, tenure):
+    """
+    Factor such that EMI = principal * factor, for an annual rate in basis
+    points and a tenure in months. Computed at 40 significant digits.
+    """
+    if rate_bp == 0:
+        return _CONTEXT.divide(Decimal(1), Decimal(tenure))
+
+    annual_rate = _CONTEXT.divide(Decimal(rate_bp), BASIS_POINTS_PER_UNIT)
+    monthly_rate = _CONTEXT.divide(annual_rate, Decimal(12))
+    growth = _CONTEXT.power(_CONTEXT.add(1, monthly_rate), tenure)
+    return _CONTEXT.divide(_CONTEXT.multiply(monthly_rate, growth), _CONTEXT.subtract(growth, 1))
+
+
+def calculate_emi(principal, annual_rate, tenure):
+    """Monthly installment as a Decimal rounded half up to the paisa"""
+    factor = annuity_factor(rate_to_basis_points(annual_rate), int(tenure))
+    emi = _CONTEXT.multiply(_to_decimal(principal), factor)
+    return emi.quantize(PAISA, context=_CONTEXT)
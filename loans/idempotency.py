@@ -0,0 +1,147 @@
+"""
+Idempotency-Key support for POST endpoints.
+
+The first request with a given key claims it by inserting a row; the unique
+(scope, key) index makes the claim atomic on SQLite and PostgreSQL alike.
+Its response is stored and replayed verbatim for retries with the same key
+and body. A duplicate that arrives while the first request is still running
+waits for it to finish instead of recomputing. A claim still in progress
+after LEASE seconds is taken to belong to a worker that died, and the next
+request with the key reclaims it.
+"""
+import functools
+import hashlib
+import json
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+
+HEADER = 'Idempotency-Key'
+MAX_KEY_LENGTH = 255
+
+
+def _options():
+    options = {'TTL': 24 * 60 * 60, 'WAIT_TIMEOUT': 10, 'POLL_INTERVAL': 0.1, 'LEASE': 60}
+    options.update(getattr(settings, 'IDEMPOTENCY_KEYS', {}))
+    return options
+
+
+def request_fingerprint(data):
+    """Stable hash of a request body, used to reject a key reused for a different request"""
+    payload = json.dumps(data, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def purge_expired():
+    """Delete expired keys; returns the number removed"""
+    deleted, _ = IdempotencyKey.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
+
+
+def _claim(scope, key, request_hash, options):
+    """
+    Insert the key, or return the existing record once it has completed (or
+    the wait times out). Returns (record, created).
+    """
+    deadline = time.monotonic() + options['WAIT_TIMEOUT']
+    while True:
+        now = timezone.now()
+        try:
+            with transaction.atomic():
+                record = IdempotencyKey.objects.create(
+                    scope=scope,
+                    key=key,
+                    request_hash=request_hash,
+                    expires_at=now + timedelta(seconds=options['TTL'])
+                )
+            return record, True
+        except IntegrityError:
+            pass
+
+        record = IdempotencyKey.objects.filter(scope=scope, key=key).first()
+        if record is None:
+            # The first request failed and released the key; claim it again
+            continue
+        if record.expires_at <= now:
+            IdempotencyKey.objects.filter(pk=record.pk, expires_at__lte=now).delete()
+            continue
+        lease_expired = now - timedelta(seconds=options['LEASE'])
+        if record.status == 'in_progress' and record.created_at <= lease_expired:
+            # Abandoned by a crashed or killed worker; only one reclaimer deletes it
+            IdempotencyKey.objects.filter(
+                pk=record.pk, status='in_progress', created_at__lte=lease_expired
+            ).delete()
+            continue
+        if record.status == 'completed' or record.request_hash != request_hash:
+            return record, False
+        if time.monotonic() >= deadline:
+            return record, False
+        time.sleep(options['POLL_INTERVAL'])
+
+
+def idempotent(scope):
+    """
+    Make a DRF view replay its stored response for a repeated Idempotency-Key.
+    Apply below @api_view. 5xx responses and exceptions release the key so
+    the client can retry.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            key = request.headers.get(HEADER)
+            if key is None:
+                return view(request, *args, **kwargs)
+            if not key or len(key) > MAX_KEY_LENGTH:
+                return Response(
+                    {'error': f'{HEADER} must be 1-{MAX_KEY_LENGTH} characters'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            request_hash = request_fingerprint(request.data)
+            record, created = _claim(scope, key, request_hash, _options())
+
+            if not created:
+                if record.request_hash != request_hash:
+                    return Response(
+                        {'error': f'{HEADER} was already used with a different request'},
+                        status=status.HTTP_422_UNPROCESSABLE_ENTITY
+                    )
+                if record.status != 'completed':
+                    return Response(
+                        {'error': f'A request with this {HEADER} is still in progress'},
+                        status=status.HTTP_409_CONFLICT
+                    )
+                response = Response(record.response_body, status=record.response_status)
+                response['Idempotent-Replayed'] = 'true'
+                return response
+
+            try:
+                response = view(request, *args, **kwargs)
+            except Exception:
+                record.delete()
+                raise
+
+            if response.status_code >= 500:
+                record.delete()
+                return response
+
+            # Store what the client receives, so replays render identically.
+            # A claim that outlived its lease may have been reclaimed; then
+            # this updates nothing and the reclaimer's outcome is stored
+            IdempotencyKey.objects.filter(pk=record.pk, status='in_progress').update(
+                status='completed',
+                response_status=response.status_code,
+                response_body=json.loads(JSONRenderer().render(response.data))
+            )
+            return response
+        return wrapper
+    return decorator
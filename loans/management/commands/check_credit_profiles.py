@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+from loans.services import CreditProfileService
+
+
+class Command(BaseCommand):
+    help = 'Compare customer credit profiles against live loan aggregates'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--customer',
+            type=int,
+            action='append',
+            dest='customers',
+            help='Only check this customer ID (may be repeated)'
+        )
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Refresh the profiles of customers that have drifted'
+        )
+
+    def handle(self, *args, **options):
+        drift = CreditProfileService.find_drift(options['customers'])
+
+        if not drift:
+            self.stdout.write(self.style.SUCCESS('All credit profiles are consistent.'))
+            return
+
+        for entry in drift:
+            self.stdout.write(
+                f"Customer {entry['customer_id']}: {entry['field']} "
+                f"profile={entry['profile']!r} live={entry['live']!r}"
+            )
+
+        drifted_customers = {entry['customer_id'] for entry in drift}
+        if options['fix']:
+            CreditProfileService.refresh_profiles(drifted_customers)
+            self.stdout.write(
+                self.style.SUCCESS(f'Refreshed {len(drifted_customers)} drifted credit profiles.')
+            )
+            return
+
+        raise CommandError(f'{len(drifted_customers)} credit profiles have drifted')
@@ -0,0 +1,55 @@
+import time
+from functools import partial
+
+from django.core.management.base import BaseCommand
+from loans.models import Loan
+from loans.schedules import iter_schedule_csv
+
+
+class Command(BaseCommand):
+    help = 'Export amortization schedules for all loans as CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            type=str,
+            default='-',
+            help='Path of the CSV file to write ("-" for stdout)'
+        )
+        parser.add_argument(
+            '--customer-id',
+            type=int,
+            help='Only export loans of this customer'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=10000,
+            help='Number of loans to build schedules for at a time'
+        )
+
+    def handle(self, *args, **options):
+        loans = Loan.objects.all()
+        if options['customer_id'] is not None:
+            loans = loans.filter(customer_id=options['customer_id'])
+
+        started = time.monotonic()
+        rows = 0
+        output = self.stdout if options['output'] == '-' else open(options['output'], 'w', newline='')
+        # OutputWrapper.write would end every block with an extra newline
+        write = partial(output.write, ending='') if output is self.stdout else output.write
+        try:
+            for block in iter_schedule_csv(loans, chunk_size=options['chunk_size']):
+                write(block)
+                rows += block.count('\n')
+        finally:
+            if output is not self.stdout:
+                output.close()
+
+        if options['output'] != '-':
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'Exported {rows - 1} schedule rows to {options["output"]} in {elapsed:.1f}s'
+                )
+            )
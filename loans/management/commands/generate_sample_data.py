@@ -1,4 +1,5 @@
 from django.core.management.base import BaseCommand
+from loans.emi import calculate_emi
 from loans.models import Customer, Loan
 from datetime import date, timedelta
 import random
@@ -51,15 +52,10 @@ class Command(BaseCommand):
             for j in range(loans_per_customer):
                 loan_amount = random.randint(50000, 500000)
                 tenure = random.randint(6, 60)
-                interest_rate = random.uniform(8.0, 18.0)
+                interest_rate = round(random.uniform(8.0, 18.0), 2)
                 
                 # Calculate EMI
-                monthly_rate = (interest_rate / 100) / 12
-                if monthly_rate > 0:
-                    emi = loan_amount * monthly_rate * (1 + monthly_rate)**tenure
-                    emi = emi / ((1 + monthly_rate)**tenure - 1)
-                else:
-                    emi = loan_amount / tenure
+                emi = calculate_emi(loan_amount, interest_rate, tenure)
 
                 # Random start date in the past
                 start_date = date.today() - timedelta(days=random.randint(30, 1000))
@@ -1,24 +1,42 @@
 from django.core.management.base import BaseCommand
-from loans.tasks import ingest_all_data
+from loans.readers import FORMATS
+from loans.tasks import ingest_all_data, ingest_all_data_sharded
 import os
 
 
 class Command(BaseCommand):
-    help = 'Ingest customer and loan data from Excel files'
+    help = 'Ingest customer and loan data from Excel, CSV, Parquet or NDJSON files'
 
     def add_arguments(self, parser):
         parser.add_argument(
             '--customer-file',
             type=str,
-            help='Path to customer data Excel file',
+            help='Path to customer data file',
             default='customer_data.xlsx'
         )
         parser.add_argument(
             '--loan-file',
             type=str,
-            help='Path to loan data Excel file',
+            help='Path to loan data file',
             default='loan_data.xlsx'
         )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=5000,
+            help='Number of rows upserted per statement'
+        )
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            help='Format of both files (default: detected from each file extension)'
+        )
+        parser.add_argument(
+            '--shards',
+            type=int,
+            default=1,
+            help='Split each file into this many row ranges ingested by parallel Celery tasks'
+        )
 
     def handle(self, *args, **options):
         customer_file = options['customer_file']
@@ -40,15 +58,31 @@ class Command(BaseCommand):
         self.stdout.write('Starting data ingestion...')
         
         # Run the ingestion task
-        result = ingest_all_data.delay(customer_file, loan_file)
+        if options['shards'] > 1:
+            result = ingest_all_data_sharded(
+                customer_file, loan_file, options['shards'], options['chunk_size'], options['format']
+            ).apply_async()
+        else:
+            result = ingest_all_data.delay(
+                customer_file, loan_file, options['chunk_size'], options['format']
+            )
         result_data = result.get()
 
         if result_data['status'] == 'success':
             self.stdout.write(
                 self.style.SUCCESS('Data ingestion completed successfully!')
             )
-            self.stdout.write(f"Customer result: {result_data['customer_result']['message']}")
-            self.stdout.write(f"Loan result: {result_data['loan_result']['message']}")
+            customer_result = result_data['customer_result']
+            self.stdout.write(
+                f"Customer result: {customer_result['message']} "
+                f"({customer_result['rows_per_second']} rows/sec)"
+            )
+            loan_result = result_data['loan_result']
+            self.stdout.write(f"Loan result: {loan_result['message']}")
+            if loan_result.get('rejects_path'):
+                self.stdout.write(
+                    self.style.WARNING(f"Rejected loan rows written to {loan_result['rejects_path']}")
+                )
         else:
             self.stdout.write(
                 self.style.ERROR(f'Data ingestion failed: {result_data["message"]}')
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from loans.idempotency import purge_expired
+
+
+class Command(BaseCommand):
+    help = 'Delete expired Idempotency-Key records'
+
+    def handle(self, *args, **options):
+        purged = purge_expired()
+        self.stdout.write(
+            self.style.SUCCESS(f'Purged {purged} expired idempotency keys')
+        )
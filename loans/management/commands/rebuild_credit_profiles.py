@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from loans.services import CreditProfileService
+
+
+class Command(BaseCommand):
+    help = 'Rebuild customer credit profiles from the loans table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=CreditProfileService.CHUNK_SIZE,
+            help='Number of customers to aggregate per query'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('Rebuilding credit profiles...')
+
+        with transaction.atomic():
+            rebuilt = CreditProfileService.rebuild_all_profiles(chunk_size=options['chunk_size'])
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Successfully rebuilt {rebuilt} credit profiles!')
+        )
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+from loans.tasks import rescore_customers
+
+
+class Command(BaseCommand):
+    help = 'Recompute credit scores for a range of customers in bulk'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--start-id',
+            type=int,
+            help='First customer ID to rescore (inclusive)'
+        )
+        parser.add_argument(
+            '--end-id',
+            type=int,
+            help='Last customer ID to rescore (inclusive)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=10000,
+            help='Number of customers scored per batch'
+        )
+        parser.add_argument(
+            '--async',
+            action='store_true',
+            dest='run_async',
+            help='Queue the rescoring as a Celery task instead of running it inline'
+        )
+
+    def handle(self, *args, **options):
+        task_args = (options['start_id'], options['end_id'], options['chunk_size'])
+
+        if options['run_async']:
+            result = rescore_customers.delay(*task_args)
+            self.stdout.write(f'Queued rescoring task {result.id}')
+            return
+
+        self.stdout.write('Rescoring customers...')
+        result_data = rescore_customers(*task_args)
+
+        if result_data['status'] == 'success':
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Successfully rescored {result_data['customers_scored']} customers "
+                    f"({result_data['loans_scanned']} loans, "
+                    f"{result_data['customers_per_second']} customers/sec)"
+                )
+            )
+        else:
+            self.stdout.write(
+                self.style.ERROR(f'Rescoring failed: {result_data["message"]}')
+            )
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.7 on 2026-10-17 04:25
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('loans', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CustomerCreditProfile',
+            fields=[
+                ('customer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='credit_profile', serialize=False, to='loans.customer')),
+                ('active_loan_sum', models.DecimalField(decimal_places=2, default=0, max_digits=17)),
+                ('active_emi_total', models.DecimalField(decimal_places=2, default=0, max_digits=17)),
+                ('total_loans', models.IntegerField(default=0)),
+                ('completed_loans', models.IntegerField(default=0)),
+                ('on_time_completed_loans', models.IntegerField(default=0)),
+                ('loans_per_year', models.JSONField(default=dict)),
+                ('total_volume', models.DecimalField(decimal_places=2, default=0, max_digits=17)),
+                ('credit_score', models.FloatField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'customer_credit_profiles',
+            },
+        ),
+    ]
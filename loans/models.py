@@ -1,6 +1,35 @@
-from django.db import models
+from django.db import models, transaction
 from django.core.validators import MinValueValidator, MaxValueValidator
 import math
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+from .emi import calculate_emi
+
+
+_locks = threading.local()
+
+
+@contextmanager
+def customer_locks(customer_ids, using='default'):
+    """
+    Lock the given customers' rows, in id order so overlapping lockers
+    cannot deadlock. Use inside a transaction, which holds the locks until
+    it ends; Loan writes inside the block skip re-locking them.
+    """
+    customer_ids = sorted(set(customer_ids))
+    held = getattr(_locks, 'held', frozenset())
+    missing = [customer_id for customer_id in customer_ids if customer_id not in held]
+    if missing:
+        list(Customer.objects.using(using).select_for_update().filter(
+            customer_id__in=missing
+        ).order_by('customer_id').values_list('customer_id', flat=True))
+    _locks.held = held | set(customer_ids)
+    try:
+        yield
+    finally:
+        _locks.held = held
 
 
 class Customer(models.Model):
@@ -58,6 +87,10 @@ class Loan(models.Model):
 
     class Meta:
         db_table = 'loans'
+        indexes = [
+            # Keyset pagination of a customer's loans (/view-loans?cursor=)
+            models.Index(fields=['customer', 'loan_id'], name='loans_customer_loan_id_idx'),
+        ]
 
     def __str__(self):
         return f"Loan {self.loan_id} - {self.customer.name}"
@@ -72,21 +105,133 @@ class Loan(models.Model):
 
     def calculate_monthly_installment(self):
         """Calculate monthly installment using compound interest formula"""
-        if self.interest_rate == 0:
-            return self.loan_amount / self.tenure
-        
-        # Convert annual interest rate to monthly
-        monthly_rate = (self.interest_rate / 100) / 12
-        
-        # EMI formula: P * r * (1 + r)^n / ((1 + r)^n - 1)
-        if monthly_rate > 0:
-            emi = self.loan_amount * monthly_rate * (1 + monthly_rate)**self.tenure
-            emi = emi / ((1 + monthly_rate)**self.tenure - 1)
-            return emi
-        else:
-            return self.loan_amount / self.tenure
+        return calculate_emi(self.loan_amount, self.interest_rate, self.tenure)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # The owner as loaded, so a save that moves the loan refreshes both
+        instance._saved_customer_id = instance.__dict__.get('customer_id')
+        return instance
 
     def save(self, *args, **kwargs):
         if not self.monthly_installment:
             self.monthly_installment = self.calculate_monthly_installment()
-        super().save(*args, **kwargs)
+        using = kwargs.get('using') or 'default'
+        # Keep the loan write and the credit profile refresh (post_save) atomic,
+        # under the owners' locks so concurrent refreshes cannot interleave
+        with transaction.atomic(using=using):
+            previous = getattr(self, '_saved_customer_id', None)
+            if previous is None and self.pk is not None:
+                previous = Loan.objects.using(using).filter(pk=self.pk).values_list(
+                    'customer_id', flat=True
+                ).first()
+            self.moved_from = previous if previous not in (None, self.customer_id) else None
+            with customer_locks({self.customer_id, previous} - {None}, using):
+                super().save(*args, **kwargs)
+            self._saved_customer_id = self.customer_id
+
+    def delete(self, *args, **kwargs):
+        using = kwargs.get('using') or 'default'
+        with transaction.atomic(using=using), customer_locks([self.customer_id], using):
+            return super().delete(*args, **kwargs)
+
+
+class CustomerCreditProfile(models.Model):
+    """Materialized per-customer loan aggregates used for credit scoring"""
+
+    customer = models.OneToOneField(
+        Customer, on_delete=models.CASCADE, primary_key=True, related_name='credit_profile'
+    )
+    active_loan_sum = models.DecimalField(max_digits=17, decimal_places=2, default=0)
+    active_emi_total = models.DecimalField(max_digits=17, decimal_places=2, default=0)
+    total_loans = models.IntegerField(default=0)
+    completed_loans = models.IntegerField(default=0)
+    on_time_completed_loans = models.IntegerField(default=0)
+    loans_per_year = models.JSONField(default=dict)
+    total_volume = models.DecimalField(max_digits=17, decimal_places=2, default=0)
+    credit_score = models.FloatField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'customer_credit_profiles'
+
+    def __str__(self):
+        return f"Credit profile for customer {self.customer_id}"
+
+    def loans_in_year(self, year):
+        """Number of loans started in the given calendar year"""
+        return self.loans_per_year.get(str(year), 0)
+
+    def as_credit_state(self):
+        """Return the figures needed for scoring and eligibility checks"""
+        return {
+            'approved_limit': self.customer.approved_limit,
+            'monthly_income': self.customer.monthly_income,
+            'active_loan_sum': self.active_loan_sum,
+            'active_emi_total': self.active_emi_total,
+            'total_loans': self.total_loans,
+            'completed_loans': self.completed_loans,
+            'on_time_completed_loans': self.on_time_completed_loans,
+            'current_year_loans': self.loans_in_year(datetime.now().year),
+            'total_volume': self.total_volume,
+        }
+
+
+class LoanApplication(models.Model):
+    """A create-loan request queued for asynchronous origination"""
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('approved', 'Approved'),
+        ('rejected', 'Rejected'),
+        ('failed', 'Failed'),
+    ]
+
+    application_id = models.AutoField(primary_key=True)
+    customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name='loan_applications')
+    loan_amount = models.DecimalField(max_digits=15, decimal_places=2)
+    interest_rate = models.DecimalField(max_digits=5, decimal_places=2)
+    tenure = models.IntegerField(validators=[MinValueValidator(1), MaxValueValidator(120)])
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', db_index=True)
+    loan = models.OneToOneField(
+        Loan, on_delete=models.SET_NULL, null=True, blank=True, related_name='application'
+    )
+    monthly_installment = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True)
+    message = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'loan_applications'
+
+    def __str__(self):
+        return f"Loan application {self.application_id} ({self.status})"
+
+
+class IdempotencyKey(models.Model):
+    """Stored outcome of a request made with an Idempotency-Key header"""
+
+    STATUS_CHOICES = [
+        ('in_progress', 'In progress'),
+        ('completed', 'Completed'),
+    ]
+
+    scope = models.CharField(max_length=50)
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='in_progress')
+    response_status = models.IntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        db_table = 'idempotency_keys'
+        constraints = [
+            models.UniqueConstraint(fields=['scope', 'key'], name='unique_idempotency_scope_key'),
+        ]
+
+    def __str__(self):
+        return f"{self.scope}:{self.key} ({self.status})"
@@ -0,0 +1,292 @@
+"""
+Chunked readers for the ingestion tasks.
+
+Each reader hands the tasks one DataFrame of at most chunk_size rows at a
+time, holding the named columns in the given order, so memory does not grow
+with the file. Every chunk's index is the 1-based row (or line) number of
+its records in the source file, which the tasks use in rejects reports.
+
+    xlsx     openpyxl read_only mode; cells arrive typed (int, float, str, datetime)
+    csv      pandas' C parser, reading only the named columns
+    parquet  pyarrow record batches of only the named columns (columnar, typed)
+    ndjson   one JSON object per line
+
+pd.read_excel, by contrast, materializes the whole workbook before
+returning. pyarrow is only needed for Parquet files.
+
+start and stop select the records at 0-based positions [start, stop) below
+the header, which is how sharded ingestion splits one file between
+workers; count_records gives the total. csv and ndjson records are their
+non-blank lines, and record_offsets locates a shard's first record so its
+reader seeks straight to it. Parquet shards decode only their row groups.
+xlsx has no row offsets: openpyxl streams the sheet XML from the top, so an
+xlsx shard still reads (without keeping) every row before its start, and
+blank sheet rows count as positions. Convert large workbooks to csv,
+ndjson or Parquet before sharding them.
+"""
+import io
+import os
+from itertools import islice
+
+import pandas as pd
+from openpyxl import load_workbook
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - only needed for Parquet input
+    pq = None
+
+
+FORMATS = ('xlsx', 'csv', 'parquet', 'ndjson')
+# Line-based formats, whose records can be located by byte offset
+SEEKABLE_FORMATS = ('csv', 'ndjson')
+EXTENSIONS = {
+    '.xlsx': 'xlsx',
+    '.xlsm': 'xlsx',
+    '.csv': 'csv',
+    '.parquet': 'parquet',
+    '.pq': 'parquet',
+    '.ndjson': 'ndjson',
+    '.jsonl': 'ndjson',
+}
+
+
+def detect_format(file_path):
+    """Input format named by the file extension; raises ValueError if unknown"""
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension not in EXTENSIONS:
+        raise ValueError(
+            f"Cannot detect the format of {file_path}; use one of: {', '.join(FORMATS)}"
+        )
+    return EXTENSIONS[extension]
+
+
+def _check_format(file_path, file_format):
+    file_format = file_format or detect_format(file_path)
+    if file_format not in READERS:
+        raise ValueError(f"Unknown format {file_format}; use one of: {', '.join(FORMATS)}")
+    return file_format
+
+
+def iter_chunks(file_path, columns, chunk_size, file_format=None, start=0, stop=None, seek=None):
+    """
+    Yield DataFrames of the named columns, chunk_size rows at a time, for
+    the records in [start, stop). file_format is one of FORMATS, or None to
+    detect it from the extension. For SEEKABLE_FORMATS, seek is record
+    start's location from record_offsets. Raises ValueError if the file
+    lacks any of the columns.
+    """
+    file_format = _check_format(file_path, file_format)
+    if seek is None:
+        return READERS[file_format](file_path, columns, chunk_size, start, stop)
+    if file_format not in SEEKABLE_FORMATS:
+        raise ValueError(f"Cannot seek in {file_format} files")
+    return READERS[file_format](file_path, columns, chunk_size, start, stop, seek)
+
+
+def count_records(file_path, file_format=None):
+    """
+    Number of record positions in the file, without parsing the records.
+    For xlsx this is the sheet's recorded dimension, which may include
+    trailing blank rows.
+    """
+    file_format = _check_format(file_path, file_format)
+    if file_format == 'xlsx':
+        workbook = load_workbook(file_path, read_only=True)
+        try:
+            sheet = workbook.worksheets[0]
+            if sheet.max_row is None:
+                # Writers may omit the dimension; count the rows instead
+                return max(sum(1 for _ in sheet.iter_rows(values_only=True)) - 1, 0)
+            return max(sheet.max_row - 1, 0)
+        finally:
+            workbook.close()
+    if file_format == 'parquet':
+        if pq is None:
+            raise ValueError('Reading Parquet files requires pyarrow')
+        return pq.ParquetFile(file_path).metadata.num_rows
+    return sum(1 for _ in _iter_records(file_path, file_format))
+
+
+def record_offsets(file_path, positions, file_format=None):
+    """
+    Locations, as (byte offset, line number), of the records at the given
+    positions of a csv or ndjson file, found in one pass over its lines
+    without parsing them; None for positions past the end. Returns None
+    for formats that cannot seek.
+    """
+    file_format = _check_format(file_path, file_format)
+    if file_format not in SEEKABLE_FORMATS:
+        return None
+    wanted = set(positions)
+    found = {}
+    if wanted:
+        for position, (line_number, offset, _) in enumerate(_iter_records(file_path, file_format)):
+            if position in wanted:
+                found[position] = (offset, line_number)
+                if len(found) == len(wanted):
+                    break
+    return [found.get(position) for position in positions]
+
+
+def _iter_records(file_path, file_format):
+    """
+    (line number, byte offset, line) of each record of a csv or ndjson file.
+    Blank lines are not records, as for the pandas parsers (quoted csv
+    fields spanning lines are not supported).
+    """
+    offset, line_number = 0, 1
+    with open(file_path, 'rb') as lines:
+        if file_format == 'csv':
+            header = lines.readline()
+            offset += len(header)
+            line_number += 1
+        for line in lines:
+            if line.strip():
+                yield line_number, offset, line
+            offset += len(line)
+            line_number += 1
+
+
+def _iter_line_chunks(file_path, file_format, chunk_size, start, stop, seek, parse):
+    """
+    parse(lines) for the records in [start, stop), read chunk_size lines at
+    a time and indexed by line number. With seek the file is read from
+    record start onwards; without, the lines before it are skipped unparsed.
+    """
+    if stop is not None and stop <= start:
+        return
+    offset, line_number = seek or (0, 1)
+    position = start if seek else 0
+    with open(file_path, 'rb') as lines:
+        lines.seek(offset)
+        if seek is None and file_format == 'csv':
+            lines.readline()
+            line_number += 1
+        while stop is None or position < stop:
+            batch = list(islice(lines, chunk_size))
+            if not batch:
+                return
+            numbers = range(line_number, line_number + len(batch))
+            line_number += len(batch)
+            if not all(map(bytes.strip, batch)):
+                numbers = [number for number, line in zip(numbers, batch) if line.strip()]
+                batch = [line for line in batch if line.strip()]
+            wanted = slice(max(start - position, 0), None if stop is None else stop - position)
+            position += len(batch)
+            batch, numbers = batch[wanted], numbers[wanted]
+            if batch:
+                chunk = parse(b''.join(batch))
+                chunk.index = pd.Index(numbers)
+                yield chunk
+
+
+def _within(chunks, start, stop, position=0):
+    """Trim chunks, in file order from record position, to the records in [start, stop)"""
+    for chunk in chunks:
+        end = position + len(chunk)
+        if stop is not None and position >= stop:
+            return
+        if end > start:
+            yield chunk.iloc[max(start - position, 0):None if stop is None else stop - position]
+        position = end
+
+
+def _check_columns(available, columns):
+    missing = [column for column in columns if column not in available]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+
+
+def iter_excel_chunks(file_path, columns, chunk_size, start=0, stop=None):
+    """Chunks of the first sheet of an .xlsx file; blank rows are skipped"""
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        header = list(next(sheet.iter_rows(max_row=1, values_only=True), ()))
+        _check_columns(header, columns)
+        positions = [header.index(column) for column in columns]
+        if stop is not None and stop <= start:
+            return
+
+        # The header is sheet row 1
+        first_row = start + 2
+        rows = sheet.iter_rows(
+            min_row=first_row, max_row=None if stop is None else stop + 1, values_only=True
+        )
+        chunk = []
+        index = []
+        for row_number, row in enumerate(rows, start=first_row):
+            if not any(cell is not None for cell in row):
+                continue  # trailing formatting can leave empty rows
+            chunk.append([row[i] if i < len(row) else None for i in positions])
+            index.append(row_number)
+            if len(chunk) >= chunk_size:
+                yield pd.DataFrame(chunk, columns=columns, index=index)
+                chunk = []
+                index = []
+        if chunk:
+            yield pd.DataFrame(chunk, columns=columns, index=index)
+    finally:
+        # read_only workbooks keep the file open until closed
+        workbook.close()
+
+
+def iter_csv_chunks(file_path, columns, chunk_size, start=0, stop=None, seek=None):
+    """Chunks of a CSV file with a header line"""
+    with open(file_path, 'rb') as lines:
+        header = lines.readline()
+    _check_columns(pd.read_csv(io.BytesIO(header)).columns, columns)
+
+    def parse(data):
+        return pd.read_csv(io.BytesIO(header + data), usecols=columns)[columns]
+
+    yield from _iter_line_chunks(file_path, 'csv', chunk_size, start, stop, seek, parse)
+
+
+def iter_parquet_chunks(file_path, columns, chunk_size, start=0, stop=None):
+    """Chunks of a Parquet file, decoding only the named columns of the row groups in range"""
+    if pq is None:
+        raise ValueError('Reading Parquet files requires pyarrow')
+    parquet_file = pq.ParquetFile(file_path)
+    _check_columns(parquet_file.schema_arrow.names, columns)
+
+    row_groups = []
+    first_position = None
+    position = 0
+    for i in range(parquet_file.num_row_groups):
+        end = position + parquet_file.metadata.row_group(i).num_rows
+        if end > start and (stop is None or position < stop):
+            row_groups.append(i)
+            first_position = position if first_position is None else first_position
+        position = end
+    if not row_groups:
+        return
+
+    def batches():
+        position = first_position
+        for batch in parquet_file.iter_batches(batch_size=chunk_size, row_groups=row_groups, columns=columns):
+            chunk = batch.to_pandas()
+            chunk.index = pd.RangeIndex(position + 1, position + 1 + len(chunk))
+            position += len(chunk)
+            yield chunk[columns]
+
+    yield from _within(batches(), start, stop, first_position)
+
+
+def iter_ndjson_chunks(file_path, columns, chunk_size, start=0, stop=None, seek=None):
+    """Chunks of a newline-delimited JSON file, one object per line"""
+    def parse(data):
+        chunk = pd.read_json(io.BytesIO(data), lines=True, dtype=False, convert_dates=False)
+        _check_columns(chunk.columns, columns)
+        return chunk[columns]
+
+    yield from _iter_line_chunks(file_path, 'ndjson', chunk_size, start, stop, seek, parse)
+
+
+READERS = {
+    'xlsx': iter_excel_chunks,
+    'csv': iter_csv_chunks,
+    'parquet': iter_parquet_chunks,
+    'ndjson': iter_ndjson_chunks,
+}
@@ -0,0 +1,111 @@
+"""
+Fast JSON rendering for hot read endpoints.
+
+FastJSONRenderer produces the same bytes as DRF's JSONRenderer with the
+project settings (compact separators, non-ASCII kept, U+2028/U+2029 escaped)
+but encodes with orjson (in requirements.txt). If orjson is missing the
+renderer falls back to JSONRenderer, which is correct but slower. Select
+it per view with @renderer_classes([FastJSONRenderer]).
+
+orjson formats floats below 1e-4 or from 1e16 up differently (0.00001 and
+1e16 rather than 1e-05 and 1e+16), so only select it for views whose data
+holds no such floats; the fast-path row functions in rows.py emit strings
+and integers.
+"""
+import json
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - falls back to JSONRenderer
+    orjson = None
+
+
+_LINE_SEPARATOR = '\u2028'.encode()
+_PARAGRAPH_SEPARATOR = '\u2029'.encode()
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer-compatible output, encoded with orjson when available"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data)
+        except TypeError:
+            # Types orjson does not know natively (e.g. Decimal, lazy strings)
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if _LINE_SEPARATOR in ret or _PARAGRAPH_SEPARATOR in ret:
+            ret = ret.replace(_LINE_SEPARATOR, b'\\u2028').replace(_PARAGRAPH_SEPARATOR, b'\\u2029')
+        return ret
+
+
+class PrerenderedResponse(Response):
+    """
+    A Response whose JSON body was rendered ahead of time (e.g. cached).
+    The bytes are sent as-is; .data is decoded only if something reads it.
+    """
+
+    def __init__(self, content, status=None, headers=None):
+        self.prerendered_content = content
+        super().__init__(None, status=status, headers=headers)
+
+    @property
+    def data(self):
+        if self._data is None:
+            self._data = json.loads(self.prerendered_content)
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        self._data = value
+
+    @property
+    def rendered_content(self):
+        self['Content-Type'] = self.content_type or self.accepted_renderer.media_type
+        return self.prerendered_content
+
+
+def iter_ndjson(rows, to_dict, chunk_size=2000):
+    """
+    Encode rows as newline-delimited JSON, one object per line, yielding a
+    bytes chunk every chunk_size rows so a streaming response never holds
+    more than one chunk in memory.
+    """
+    renderer = FastJSONRenderer()
+    lines = []
+    for row in rows:
+        lines.append(renderer.render(to_dict(row)))
+        if len(lines) >= chunk_size:
+            lines.append(b'')
+            yield b'\n'.join(lines)
+            lines = []
+    if lines:
+        lines.append(b'')
+        yield b'\n'.join(lines)
+
+
+async def aiter_ndjson(rows, to_dict, chunk_size=2000):
+    """iter_ndjson for an async iterator of rows (QuerySet.aiterator)"""
+    renderer = FastJSONRenderer()
+    lines = []
+    async for row in rows:
+        lines.append(renderer.render(to_dict(row)))
+        if len(lines) >= chunk_size:
+            lines.append(b'')
+            yield b'\n'.join(lines)
+            lines = []
+    if lines:
+        lines.append(b'')
+        yield b'\n'.join(lines)
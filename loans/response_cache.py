@@ -0,0 +1,288 @@
+"""
+Cache of rendered /view-loan and /view-loans responses.
+
+Entries live in a VersionedCache keyed on the same version names the
+credit score cache uses, so every Loan and Customer write (signals, bulk
+origination, ingestion, batch registration) invalidates them on commit:
+
+    /view-loan/<loan_id>       loan:<loan_id>, customer:<owner id>
+    owner of <loan_id>         loan:<loan_id>
+    /view-loans/<customer_id>  customer-loans:<customer_id>, customer:<customer_id>
+
+Validators (ETag, plus Last-Modified for single loans) and bodies are
+cached separately, and a validator miss reads only the updated_at columns,
+so a conditional GET that ends in 304 never loads or renders a body.
+Configure with the RESPONSE_CACHE setting; TIMEOUT bounds how long an entry
+may live, in the shared backend and in each process's LRU.
+"""
+import hashlib
+
+from django.conf import settings
+from django.db.models import Count, Max
+
+from .cache import LRUCache, VersionedCache
+from .models import Customer, Loan
+from .renderers import FastJSONRenderer
+from .rows import LOAN_DETAIL_COLUMNS, loan_detail_row
+
+
+response_cache = VersionedCache.from_settings(
+    'response', getattr(settings, 'RESPONSE_CACHE', {})
+)
+# loan_id -> customer_id, filled from rows and cache entries. An entry built
+# for a stale owner names the right one, so the lookup retries with it
+_loan_owners = LRUCache(response_cache.local.maxsize, response_cache.timeout)
+
+
+def _etag(*parts):
+    digest = hashlib.sha256('|'.join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def _render(data):
+    return FastJSONRenderer().render(data)
+
+
+LOAN_VALIDATOR_COLUMNS = ('customer_id', 'updated_at', 'customer__updated_at')
+
+
+def _loan_query(loan_id, columns):
+    return Loan.objects.filter(loan_id=loan_id).values_list(*columns)
+
+
+def _validators_from_row(loan_id, row):
+    if row is None:
+        return None
+    customer_id, loan_updated_at, customer_updated_at = row
+    return {
+        'loan_id': loan_id,
+        'customer_id': customer_id,
+        'etag': _etag('loan', loan_id, loan_updated_at, customer_updated_at),
+        'last_modified': max(loan_updated_at, customer_updated_at),
+    }
+
+
+def _body_from_row(loan_id, row):
+    if row is None:
+        return None
+    data = loan_detail_row(row)
+    return {'loan_id': loan_id, 'customer_id': data['customer']['id'], 'body': _render(data)}
+
+
+def _owner_version_names(loan_id):
+    # Moving a loan to another customer bumps loan:<id>
+    return [f'loan:{loan_id}']
+
+
+def _loan_version_names(loan_id, customer_id):
+    return [f'loan:{loan_id}', f'customer:{customer_id}']
+
+
+def _known_owner(loan_id):
+    """Owner of a loan if this process or the shared cache has seen it"""
+    customer_id = _loan_owners.get(loan_id)
+    if customer_id is None:
+        customer_id = response_cache.get(f'loan-owner:{loan_id}', _owner_version_names(loan_id))
+        if customer_id is not None:
+            _loan_owners.set(loan_id, customer_id)
+    return customer_id
+
+
+async def _aknown_owner(loan_id):
+    customer_id = _loan_owners.get(loan_id)
+    if customer_id is None:
+        customer_id = await response_cache.aget(f'loan-owner:{loan_id}', _owner_version_names(loan_id))
+        if customer_id is not None:
+            _loan_owners.set(loan_id, customer_id)
+    return customer_id
+
+
+def _remember_owner(entry):
+    _loan_owners.set(entry['loan_id'], entry['customer_id'])
+    response_cache.get_or_compute(
+        f'loan-owner:{entry["loan_id"]}', _owner_version_names(entry['loan_id']),
+        lambda: entry['customer_id']
+    )
+
+
+async def _aremember_owner(entry):
+    _loan_owners.set(entry['loan_id'], entry['customer_id'])
+
+    async def compute():
+        return entry['customer_id']
+
+    await response_cache.aget_or_compute(
+        f'loan-owner:{entry["loan_id"]}', _owner_version_names(entry['loan_id']), compute
+    )
+
+
+def _loan_lookup(kind, loan_id, columns, from_row):
+    """
+    Cached {loan_id, customer_id, ...} entry of one kind for a loan, or None
+    if it does not exist. Entries are keyed on the owner, which comes from
+    this process's mapping or the owner record cached alongside them; a loan
+    neither has seen is read first to learn it.
+    """
+    def build():
+        entry = from_row(loan_id, _loan_query(loan_id, columns).first())
+        if entry is not None:
+            _remember_owner(entry)
+        return entry
+
+    customer_id = _known_owner(loan_id)
+    built = build() if customer_id is None else None
+    entry = built
+    if customer_id is not None:
+        entry = response_cache.get_or_compute(
+            f'{kind}:{loan_id}', _loan_version_names(loan_id, customer_id), build
+        )
+    if entry is not None and entry['customer_id'] != customer_id:
+        # Read to learn the owner, or cached under a stale one: key it on the real one
+        _loan_owners.set(loan_id, entry['customer_id'])
+        entry = response_cache.get_or_compute(
+            f'{kind}:{loan_id}', _loan_version_names(loan_id, entry['customer_id']),
+            (lambda: built) if built is not None else build
+        )
+    return entry
+
+
+async def _aloan_lookup(kind, loan_id, columns, from_row):
+    """Async _loan_lookup"""
+    async def build():
+        entry = from_row(loan_id, await _loan_query(loan_id, columns).afirst())
+        if entry is not None:
+            await _aremember_owner(entry)
+        return entry
+
+    customer_id = await _aknown_owner(loan_id)
+    built = await build() if customer_id is None else None
+    entry = built
+    if customer_id is not None:
+        entry = await response_cache.aget_or_compute(
+            f'{kind}:{loan_id}', _loan_version_names(loan_id, customer_id), build
+        )
+    if entry is not None and entry['customer_id'] != customer_id:
+        _loan_owners.set(loan_id, entry['customer_id'])
+
+        async def rebuild():
+            return built if built is not None else await build()
+
+        entry = await response_cache.aget_or_compute(
+            f'{kind}:{loan_id}', _loan_version_names(loan_id, entry['customer_id']), rebuild
+        )
+    return entry
+
+
+def loan_validators(loan_id):
+    """
+    {loan_id, customer_id, etag, last_modified} for /view-loan/<loan_id>, or
+    None if the loan does not exist. A miss reads only the updated_at columns.
+    """
+    return _loan_lookup('loan-validators', loan_id, LOAN_VALIDATOR_COLUMNS, _validators_from_row)
+
+
+async def aloan_validators(loan_id):
+    """Async loan_validators"""
+    return await _aloan_lookup('loan-validators', loan_id, LOAN_VALIDATOR_COLUMNS, _validators_from_row)
+
+
+def loan_body(loan_id):
+    """Rendered /view-loan/<loan_id> body, or None if the loan does not exist"""
+    entry = _loan_lookup('loan', loan_id, LOAN_DETAIL_COLUMNS, _body_from_row)
+    return entry['body'] if entry else None
+
+
+async def aloan_body(loan_id):
+    """Async loan_body"""
+    entry = await _aloan_lookup('loan', loan_id, LOAN_DETAIL_COLUMNS, _body_from_row)
+    return entry['body'] if entry else None
+
+
+def customer_loans_version_names(customer_id):
+    return [f'customer-loans:{customer_id}', f'customer:{customer_id}']
+
+
+def customer_loans_etag(customer_id, query_string):
+    """
+    ETag for /view-loans/<customer_id>, or None for unknown customers. The
+    loan count is part of it so deleting a loan changes it, and the query
+    string too since limit/cursor/stream select different representations.
+    The list sends no Last-Modified: the newest updated_at moves backwards
+    when the newest loan is deleted, so If-Modified-Since would wrongly match.
+    """
+    etag = response_cache.get_or_compute(
+        f'customer-loans-etag:{customer_id}',
+        customer_loans_version_names(customer_id),
+        lambda: _etag_from_aggregate(
+            customer_id, _customer_loans_query(customer_id).aggregate(**_customer_loans_aggregates())
+        )
+    )
+    return _with_query(etag, query_string)
+
+
+async def acustomer_loans_etag(customer_id, query_string):
+    """Async customer_loans_etag"""
+    async def compute():
+        row = await _customer_loans_query(customer_id).aaggregate(**_customer_loans_aggregates())
+        return _etag_from_aggregate(customer_id, row)
+
+    etag = await response_cache.aget_or_compute(
+        f'customer-loans-etag:{customer_id}',
+        customer_loans_version_names(customer_id),
+        compute
+    )
+    return _with_query(etag, query_string)
+
+
+def _customer_loans_query(customer_id):
+    return Customer.objects.filter(customer_id=customer_id)
+
+
+def _customer_loans_aggregates():
+    return {
+        'found': Count('customer_id', distinct=True),
+        'loan_count': Count('loans'),
+        'last_updated': Max('loans__updated_at'),
+    }
+
+
+def _etag_from_aggregate(customer_id, row):
+    if not row['found']:
+        return None
+    return _etag('customer-loans', customer_id, row['loan_count'], row['last_updated'])
+
+
+def _with_query(etag, query_string):
+    if etag is None or not query_string:
+        return etag
+    return _etag(etag, query_string)
+
+
+def customer_loans_body(customer_id, url, compute):
+    """
+    Rendered /view-loans body for one URL (pages embed their absolute next
+    link, so the URL is the key); compute returns the response data.
+    """
+    url_hash = hashlib.sha256(url.encode()).hexdigest()[:32]
+    return response_cache.get_or_compute(
+        f'customer-loans:{customer_id}:{url_hash}',
+        customer_loans_version_names(customer_id),
+        lambda: _render(compute())
+    )
+
+
+async def acustomer_loans_body(customer_id, url, compute):
+    """Async customer_loans_body; compute is a coroutine function"""
+    async def render():
+        return _render(await compute())
+
+    url_hash = hashlib.sha256(url.encode()).hexdigest()[:32]
+    return await response_cache.aget_or_compute(
+        f'customer-loans:{customer_id}:{url_hash}',
+        customer_loans_version_names(customer_id),
+        render
+    )
+
+
+def cache_stats():
+    return response_cache.stats()
@@ -0,0 +1,99 @@
+"""
+Precompiled row-to-dict functions for the hot read endpoints.
+
+Each function turns one values_list() row into exactly the dict the matching
+serializer would produce for a model instance, without building the instance
+or walking serializer fields per row. Decimal formatting is derived from the
+serializer fields once at import, so it follows COERCE_DECIMAL_TO_STRING.
+"""
+from decimal import Decimal
+
+from rest_framework.settings import api_settings
+
+from .serializers import CustomerLoanListSerializer, LoanDetailSerializer
+
+
+def _decimal_formatter(field):
+    """Row-level equivalent of DecimalField.to_representation for stored values"""
+    coerce_to_string = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+    if not coerce_to_string or field.localize or field.decimal_places is None:
+        return field.to_representation
+    exponent = Decimal(1).scaleb(-field.decimal_places)
+
+    def to_string(value):
+        return format(value.quantize(exponent), 'f')
+    return to_string
+
+
+def _formatters(serializer_class, names):
+    fields = serializer_class().fields
+    return tuple(_decimal_formatter(fields[name]) for name in names)
+
+
+LOAN_LIST_COLUMNS = (
+    'loan_id', 'loan_amount', 'interest_rate', 'monthly_installment',
+    'tenure', 'emis_paid_on_time', 'status'
+)
+
+LOAN_DETAIL_COLUMNS = (
+    'loan_id', 'customer_id', 'customer__first_name', 'customer__last_name',
+    'customer__phone_number', 'customer__age', 'loan_amount', 'interest_rate',
+    'monthly_installment', 'tenure'
+)
+
+_list_amount, _list_rate, _list_emi = _formatters(
+    CustomerLoanListSerializer, ('loan_amount', 'interest_rate', 'monthly_installment')
+)
+_detail_amount, _detail_rate, _detail_emi = _formatters(
+    LoanDetailSerializer, ('loan_amount', 'interest_rate', 'monthly_installment')
+)
+
+
+def loan_list_row(row):
+    """LOAN_LIST_COLUMNS row -> CustomerLoanListSerializer data"""
+    loan_id, loan_amount, interest_rate, monthly_installment, tenure, emis_paid_on_time, loan_status = row
+    return {
+        'loan_id': loan_id,
+        'loan_amount': _list_amount(loan_amount),
+        'interest_rate': _list_rate(interest_rate),
+        'monthly_installment': _list_emi(monthly_installment),
+        # Same rule as Loan.repayments_left
+        'repayments_left': 0 if loan_status == 'completed' else max(0, tenure - emis_paid_on_time),
+    }
+
+
+def loan_detail_row(row):
+    """LOAN_DETAIL_COLUMNS row -> LoanDetailSerializer data"""
+    (loan_id, customer_id, first_name, last_name, phone_number, age,
+     loan_amount, interest_rate, monthly_installment, tenure) = row
+    return {
+        'loan_id': loan_id,
+        'customer': {
+            'id': customer_id,
+            'first_name': first_name,
+            'last_name': last_name,
+            'phone_number': phone_number,
+            'age': age,
+        },
+        'loan_amount': _detail_amount(loan_amount),
+        'interest_rate': _detail_rate(interest_rate),
+        'monthly_installment': _detail_emi(monthly_installment),
+        'tenure': tenure,
+    }
+
+
+def loan_list_page(request, rows, limit):
+    """
+    One keyset page from up to limit + 1 LOAN_LIST_COLUMNS rows (the extra
+    row only signals that another page follows), with a link to the next
+    """
+    page = [loan_list_row(row) for row in rows]
+    next_cursor = None
+    next_url = None
+    if len(page) > limit:
+        page = page[:limit]
+        next_cursor = page[-1]['loan_id']
+        query = request.GET.copy()
+        query['cursor'] = next_cursor
+        next_url = request.build_absolute_uri(f'{request.path}?{query.urlencode()}')
+    return {'results': page, 'next_cursor': next_cursor, 'next': next_url}
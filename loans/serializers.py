@@ -1,6 +1,7 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework import serializers
-from .models import Customer, Loan
-from decimal import Decimal
+from .models import Customer, Loan, LoanApplication
+from .services import CustomerCreditContext
 
 
 class CustomerSerializer(serializers.ModelSerializer):
@@ -72,32 +73,169 @@ class RegisterCustomerSerializer(serializers.ModelSerializer):
         }
 
 
-class CheckEligibilitySerializer(serializers.Serializer):
+class RegisterCustomerItemSerializer(RegisterCustomerSerializer):
+    """/register/batch item; phone numbers are checked for the whole batch at once"""
+
+    class Meta(RegisterCustomerSerializer.Meta):
+        extra_kwargs = {'phone_number': {'validators': []}}
+
+
+def compile_item_validator(serializer):
+    """
+    Precompile a fast validator for batch items from a serializer's plain
+    CharFields and IntegerFields. It returns the validated dict for rows DRF
+    would accept unchanged (exact str/int types, field validators passing),
+    or None so the caller falls back to run_validation for anything else,
+    including every row that needs an error message. Returns None when the
+    serializer has fields or hooks it cannot reproduce.
+    """
+    if serializer.validators or type(serializer).validate is not serializers.Serializer.validate:
+        return None
+
+    checks = []
+    for name, field in serializer.fields.items():
+        if field.read_only:
+            continue
+        if not field.required or hasattr(serializer, f'validate_{name}') or field.source != name:
+            return None
+        if any(getattr(validator, 'requires_context', False) for validator in field.validators):
+            return None  # e.g. UniqueValidator, which needs the field and queries
+        if type(field) is serializers.CharField and field.trim_whitespace and not field.allow_blank:
+            checks.append((name, str, field.validators))
+        elif type(field) is serializers.IntegerField:
+            checks.append((name, int, field.validators))
+        else:
+            return None
+
+    def validate(item):
+        data = {}
+        for name, kind, validators in checks:
+            value = item.get(name)
+            if type(value) is not kind:
+                return None
+            if kind is str:
+                value = value.strip()
+                if not value:
+                    return None
+            try:
+                for validator in validators:
+                    validator(value)
+            except DjangoValidationError:
+                return None
+            data[name] = value
+        return data
+
+    return validate
+
+
+class LoanRequestSerializer(serializers.Serializer):
+    """Loan request fields, without the per-request customer lookup"""
     customer_id = serializers.IntegerField()
     loan_amount = serializers.DecimalField(max_digits=15, decimal_places=2)
     interest_rate = serializers.DecimalField(max_digits=5, decimal_places=2)
     tenure = serializers.IntegerField(min_value=1, max_value=120)
 
+
+class LoanApplicationSerializer(serializers.ModelSerializer):
+    customer_id = serializers.IntegerField(read_only=True)
+    loan_id = serializers.IntegerField(read_only=True)
+    loan_approved = serializers.SerializerMethodField()
+
+    class Meta:
+        model = LoanApplication
+        fields = [
+            'application_id', 'customer_id', 'loan_amount', 'interest_rate',
+            'tenure', 'status', 'loan_id', 'loan_approved', 'monthly_installment',
+            'message', 'created_at', 'updated_at'
+        ]
+
+    def get_loan_approved(self, obj):
+        """None until the application has been processed"""
+        if obj.status in ('approved', 'rejected'):
+            return obj.status == 'approved'
+        return None
+
+
+class CustomerCreditContextMixin:
+    """
+    Validates customer_id by loading the request's CustomerCreditContext,
+    which the view then passes on instead of looking the customer up again
+    """
+    credit_context = None
+
     def validate_customer_id(self, value):
-        try:
-            Customer.objects.get(customer_id=value)
-        except Customer.DoesNotExist:
+        self.credit_context = CustomerCreditContext.load(value)
+        if self.credit_context is None:
             raise serializers.ValidationError(f"Customer with ID {value} does not exist")
         return value
 
 
-class CreateLoanSerializer(serializers.Serializer):
+class CheckEligibilitySerializer(CustomerCreditContextMixin, LoanRequestSerializer):
+    pass
+
+
+class CreateLoanSerializer(CustomerCreditContextMixin, LoanRequestSerializer):
+    pass
+
+
+class BatchRequestSerializer(serializers.Serializer):
+    """Envelope for batch endpoints; items are validated individually"""
+    MAX_ITEMS = 1000
+
+    requests = serializers.ListField(
+        child=serializers.DictField(), allow_empty=False, max_length=MAX_ITEMS
+    )
+
+
+class BatchRegisterSerializer(BatchRequestSerializer):
+    MAX_ITEMS = 10000
+
+    requests = serializers.ListField(
+        child=serializers.DictField(), allow_empty=False, max_length=MAX_ITEMS
+    )
+
+
+class QuoteMatrixSerializer(serializers.Serializer):
+    MAX_CELLS = 20000
+
     customer_id = serializers.IntegerField()
-    loan_amount = serializers.DecimalField(max_digits=15, decimal_places=2)
-    interest_rate = serializers.DecimalField(max_digits=5, decimal_places=2)
-    tenure = serializers.IntegerField(min_value=1, max_value=120)
+    loan_amounts = serializers.ListField(
+        child=serializers.DecimalField(max_digits=15, decimal_places=2, min_value=1),
+        allow_empty=False, max_length=1000
+    )
+    tenures = serializers.ListField(
+        child=serializers.IntegerField(min_value=1, max_value=120),
+        allow_empty=False, max_length=120
+    )
+    interest_rates = serializers.ListField(
+        child=serializers.DecimalField(max_digits=5, decimal_places=2, min_value=0),
+        allow_empty=False, max_length=1000
+    )
 
-    def validate_customer_id(self, value):
-        try:
-            Customer.objects.get(customer_id=value)
-        except Customer.DoesNotExist:
-            raise serializers.ValidationError(f"Customer with ID {value} does not exist")
-        return value
+    def validate(self, data):
+        cells = len(data['loan_amounts']) * len(data['tenures']) * len(data['interest_rates'])
+        if cells > self.MAX_CELLS:
+            raise serializers.ValidationError(
+                f"Quote grid has {cells} cells; at most {self.MAX_CELLS} are allowed"
+            )
+        return data
+
+
+def customer_not_found_errors(customer_id):
+    """Validation errors matching the single-request serializers"""
+    return {'customer_id': [f"Customer with ID {customer_id} does not exist"]}
+
+
+class CustomerLoanListQuerySerializer(serializers.Serializer):
+    """
+    Query parameters for /view-loans/<customer_id>. Without limit or stream
+    the full list is returned as before; cursor is the last loan_id seen.
+    """
+    MAX_LIMIT = 1000
+
+    cursor = serializers.IntegerField(min_value=0, required=False)
+    limit = serializers.IntegerField(min_value=1, max_value=MAX_LIMIT, required=False)
+    stream = serializers.ChoiceField(choices=['ndjson'], required=False)
 
 
 class LoanDetailSerializer(serializers.ModelSerializer):
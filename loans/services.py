@@ -1,42 +1,258 @@
+import random
+import time
 from decimal import Decimal
 from datetime import datetime, date
-from django.db.models import Sum, Count, Q
-from .models import Customer, Loan
+import numpy as np
+from django.conf import settings
+from django.db import OperationalError, connection, transaction
+from django.db.models import Sum, Count, Q, F
+from django.db.models.functions import ExtractYear
+from django.utils import timezone
+from .cache import VersionedCache, bump_versions
+from .emi import calculate_emi
+from .models import Customer, Loan, CustomerCreditProfile, LoanApplication, customer_locks
+
+
+credit_score_cache = VersionedCache.from_settings(
+    'credit-score', getattr(settings, 'CREDIT_SCORE_CACHE', {})
+)
+
+
+class CustomerCreditContext:
+    """
+    A customer's credit state, loaded once per request and passed through
+    serializers, services and views instead of re-querying the customer.
+    """
+
+    def __init__(self, customer_id, state):
+        self.customer_id = customer_id
+        self.state = state
+
+    @classmethod
+    def load(cls, customer_id, use_cache=True):
+        """Load the context, or return None for unknown customers"""
+        state = CreditScoreService.get_credit_state(customer_id, use_cache=use_cache)
+        if state is None:
+            return None
+        return cls(customer_id, state)
+
+    @property
+    def credit_score(self):
+        return self.state['credit_score']
+
+    @property
+    def total_current_emis(self):
+        return self.state['active_emi_total']
+
+    @property
+    def monthly_income(self):
+        return self.state['monthly_income']
 
 
 class CreditScoreService:
     """Service for calculating credit scores and loan eligibility"""
     
     @staticmethod
-    def calculate_credit_score(customer_id):
+    def calculate_credit_score(customer_id, credit_context=None):
         """
         Calculate credit score (0-100) based on historical loan data
         """
-        try:
-            customer = Customer.objects.get(customer_id=customer_id)
-        except Customer.DoesNotExist:
+        if credit_context is not None:
+            return credit_context.credit_score
+
+        state = CreditScoreService.get_credit_state(customer_id)
+        if state is None:
             return 0
-        
+
+        return state['credit_score']
+
+    @staticmethod
+    def get_credit_state(customer_id, use_cache=True):
+        """
+        Return the customer's credit figures plus 'credit_score', or None for
+        unknown customers. Cached per customer and calendar year, and
+        invalidated whenever the customer or any of their loans is written.
+        """
+        if not use_cache:
+            return CreditScoreService._load_credit_state(customer_id)
+
+        return credit_score_cache.get_or_compute(
+            f'{customer_id}:{datetime.now().year}',
+            CreditScoreService.cache_version_names(customer_id),
+            lambda: CreditScoreService._load_credit_state(customer_id),
+        )
+
+    @staticmethod
+    async def aget_credit_state(customer_id):
+        """Async get_credit_state for ASGI views; misses load with the async ORM"""
+        return await credit_score_cache.aget_or_compute(
+            f'{customer_id}:{datetime.now().year}',
+            CreditScoreService.cache_version_names(customer_id),
+            lambda: CreditScoreService._aload_credit_state(customer_id),
+        )
+
+    @staticmethod
+    async def _aload_credit_state(customer_id):
+        """Async _load_credit_state"""
+        profile = await CustomerCreditProfile.objects.select_related('customer').filter(
+            customer_id=customer_id
+        ).afirst()
+        if profile is not None:
+            state = profile.as_credit_state()
+        else:
+            rows = [row async for row in CreditScoreService._loan_aggregates_query([customer_id])]
+            state = CreditScoreService._aggregates_from_rows(rows).get(customer_id)
+
+        if state is not None:
+            state['credit_score'] = CreditScoreService.score_from_state(state)
+        return state
+
+    @staticmethod
+    def get_credit_states(customer_ids, use_cache=True):
+        """
+        Batch version of get_credit_state: returns {customer_id: state or None}
+        using one cache round trip and grouped queries for the misses.
+        """
+        customer_ids = list(dict.fromkeys(customer_ids))
+        if not use_cache:
+            return CreditScoreService._load_credit_states(customer_ids)
+
+        year = datetime.now().year
+        return credit_score_cache.get_or_compute_many(
+            {
+                customer_id: (
+                    f'{customer_id}:{year}',
+                    CreditScoreService.cache_version_names(customer_id),
+                )
+                for customer_id in customer_ids
+            },
+            CreditScoreService._load_credit_states,
+        )
+
+    @staticmethod
+    def cache_version_names(customer_id):
+        """Version names a customer's cached credit state depends on"""
+        return [f'customer:{customer_id}', f'customer-loans:{customer_id}']
+
+    @staticmethod
+    def cache_stats():
+        return credit_score_cache.stats()
+
+    @staticmethod
+    def _load_credit_state(customer_id):
+        return CreditScoreService._load_credit_states([customer_id])[customer_id]
+
+    @staticmethod
+    def _load_credit_states(customer_ids):
+        """
+        Load credit figures from the materialized profile rows, falling back
+        to live loan aggregates for customers without a profile yet.
+        """
+        states = dict.fromkeys(customer_ids)
+        profiles = CustomerCreditProfile.objects.select_related('customer').filter(
+            customer_id__in=customer_ids
+        )
+        for profile in profiles:
+            states[profile.customer_id] = profile.as_credit_state()
+
+        missing = [customer_id for customer_id, state in states.items() if state is None]
+        if missing:
+            states.update(CreditScoreService._get_loan_aggregates_many(missing))
+
+        for state in states.values():
+            if state is not None:
+                state['credit_score'] = CreditScoreService.score_from_state(state)
+        return states
+
+    @staticmethod
+    def score_from_state(state):
+        """Score a credit state as returned by get_credit_state"""
+        return CreditScoreService.compute_score(
+            approved_limit=state['approved_limit'],
+            active_loan_sum=state['active_loan_sum'],
+            total_loans=state['total_loans'],
+            completed_loans=state['completed_loans'],
+            on_time_completed_loans=state['on_time_completed_loans'],
+            current_year_loans=state['current_year_loans'],
+            total_volume=state['total_volume'],
+        )
+
+    @staticmethod
+    def _loan_aggregate_annotations():
+        """Conditional aggregates over Customer.loans shared by scoring and profiles"""
+        active = Q(loans__status='active')
+        completed = Q(loans__status='completed')
+        return {
+            'active_loan_sum': Sum('loans__loan_amount', filter=active),
+            'active_emi_total': Sum('loans__monthly_installment', filter=active),
+            'total_loans': Count('loans'),
+            'completed_loans': Count('loans', filter=completed),
+            'on_time_completed_loans': Count(
+                'loans', filter=completed & Q(loans__emis_paid_on_time__gte=F('loans__tenure'))
+            ),
+            'total_volume': Sum('loans__loan_amount'),
+        }
+
+    @staticmethod
+    def _get_loan_aggregates(customer_id):
+        """
+        Fetch the customer and every score component in a single
+        conditional-aggregate query. Returns None for unknown customers.
+        """
+        return CreditScoreService._get_loan_aggregates_many([customer_id]).get(customer_id)
+
+    @staticmethod
+    def _get_loan_aggregates_many(customer_ids):
+        """Grouped version of _get_loan_aggregates: {customer_id: aggregates}"""
+        return CreditScoreService._aggregates_from_rows(
+            CreditScoreService._loan_aggregates_query(customer_ids)
+        )
+
+    @staticmethod
+    def _loan_aggregates_query(customer_ids):
+        current_year = datetime.now().year
+        annotations = CreditScoreService._loan_aggregate_annotations()
+        annotations['current_year_loans'] = Count(
+            'loans', filter=Q(loans__start_date__year=current_year)
+        )
+
+        return Customer.objects.filter(customer_id__in=customer_ids).annotate(
+            **annotations
+        ).values('customer_id', 'approved_limit', 'monthly_income', *annotations)
+
+    @staticmethod
+    def _aggregates_from_rows(rows):
+        aggregates = {}
+        for row in rows:
+            for field in ('active_loan_sum', 'active_emi_total', 'total_volume'):
+                if row[field] is None:
+                    row[field] = Decimal('0')
+            aggregates[row.pop('customer_id')] = row
+        return aggregates
+
+    @staticmethod
+    def compute_score(approved_limit, active_loan_sum, total_loans, completed_loans,
+                      on_time_completed_loans, current_year_loans, total_volume):
+        """
+        Combine pre-aggregated loan figures into the weighted credit score
+        """
         # Check if current loans exceed approved limit
-        total_current_loans = customer.loans.filter(status='active').aggregate(
-            total=Sum('loan_amount')
-        )['total'] or 0
-        
-        if total_current_loans > customer.approved_limit:
+        if active_loan_sum > approved_limit:
             return 0
-        
-        # Get all historical loans for the customer
-        all_loans = customer.loans.all()
-        
-        if not all_loans.exists():
+
+        if total_loans == 0:
             return 0
-        
+
         # Calculate components
-        past_loans_paid_on_time = CreditScoreService._calculate_past_loans_paid_on_time(all_loans)
-        number_of_loans_taken = CreditScoreService._calculate_number_of_loans_taken(all_loans)
-        loan_activity_current_year = CreditScoreService._calculate_loan_activity_current_year(all_loans)
-        loan_approved_volume = CreditScoreService._calculate_loan_approved_volume(all_loans)
-        
+        past_loans_paid_on_time = CreditScoreService._calculate_past_loans_paid_on_time(
+            completed_loans, on_time_completed_loans
+        )
+        number_of_loans_taken = CreditScoreService._calculate_number_of_loans_taken(total_loans)
+        loan_activity_current_year = CreditScoreService._calculate_loan_activity_current_year(
+            current_year_loans
+        )
+        loan_approved_volume = CreditScoreService._calculate_loan_approved_volume(total_volume)
+
         # Calculate weighted credit score
         credit_score = (
             past_loans_paid_on_time * 0.35 +
@@ -44,31 +260,21 @@ class CreditScoreService:
             loan_activity_current_year * 0.25 +
             loan_approved_volume * 0.15
         )
-        
+
         return min(100, max(0, credit_score))
-    
+
     @staticmethod
-    def _calculate_past_loans_paid_on_time(loans):
+    def _calculate_past_loans_paid_on_time(completed_loans, on_time_loans):
         """Calculate score based on past loans paid on time (0-35 points)"""
-        completed_loans = loans.filter(status='completed')
-        if not completed_loans.exists():
+        if completed_loans == 0:
             return 0
-        
-        total_loans = completed_loans.count()
-        on_time_loans = 0
-        
-        for loan in completed_loans:
-            if loan.emis_paid_on_time >= loan.tenure:
-                on_time_loans += 1
-        
-        percentage = (on_time_loans / total_loans) * 100
+
+        percentage = (on_time_loans / completed_loans) * 100
         return min(35, percentage)
-    
+
     @staticmethod
-    def _calculate_number_of_loans_taken(loans):
+    def _calculate_number_of_loans_taken(total_loans):
         """Calculate score based on number of loans taken (0-25 points)"""
-        total_loans = loans.count()
-        
         if total_loans == 0:
             return 0
         elif total_loans == 1:
@@ -79,33 +285,27 @@ class CreditScoreService:
             return 20
         else:
             return 25
-    
+
     @staticmethod
-    def _calculate_loan_activity_current_year(loans):
+    def _calculate_loan_activity_current_year(loan_count):
         """Calculate score based on loan activity in current year (0-25 points)"""
-        current_year = datetime.now().year
-        current_year_loans = loans.filter(start_date__year=current_year)
-        
-        if not current_year_loans.exists():
+        if loan_count == 0:
             return 0
-        
+
         # Score based on number of loans in current year
-        loan_count = current_year_loans.count()
         if loan_count == 1:
             return 15
         elif loan_count == 2:
             return 20
         else:
             return 25
-    
+
     @staticmethod
-    def _calculate_loan_approved_volume(loans):
+    def _calculate_loan_approved_volume(total_volume):
         """Calculate score based on loan approved volume (0-15 points)"""
-        total_volume = loans.aggregate(total=Sum('loan_amount'))['total'] or 0
-        
         # Convert to lakhs for scoring
         volume_in_lakhs = float(total_volume) / 100000
-        
+
         if volume_in_lakhs == 0:
             return 0
         elif volume_in_lakhs <= 10:
@@ -120,13 +320,43 @@ class LoanEligibilityService:
     """Service for checking loan eligibility and calculating interest rates"""
     
     @staticmethod
-    def check_eligibility(customer_id, loan_amount, interest_rate, tenure):
+    def check_eligibility(customer_id, loan_amount, interest_rate, tenure, credit_context=None):
         """
         Check loan eligibility and return appropriate response
         """
-        try:
-            customer = Customer.objects.get(customer_id=customer_id)
-        except Customer.DoesNotExist:
+        if credit_context is not None:
+            state = credit_context.state
+        else:
+            state = CreditScoreService.get_credit_state(customer_id)
+        return LoanEligibilityService.evaluate(state, customer_id, loan_amount, interest_rate, tenure)
+
+    @staticmethod
+    def check_eligibility_many(requests):
+        """
+        Check eligibility for a list of request dicts (customer_id, loan_amount,
+        interest_rate, tenure), loading every customer's credit state at once.
+        Results are returned in request order.
+        """
+        states = CreditScoreService.get_credit_states(
+            [request['customer_id'] for request in requests]
+        )
+        return [
+            LoanEligibilityService.evaluate(
+                states.get(request['customer_id']),
+                request['customer_id'],
+                request['loan_amount'],
+                request['interest_rate'],
+                request['tenure'],
+            )
+            for request in requests
+        ]
+
+    @staticmethod
+    def evaluate(state, customer_id, loan_amount, interest_rate, tenure):
+        """
+        Apply the eligibility rules to a credit state from get_credit_state
+        """
+        if state is None:
             return {
                 'customer_id': customer_id,
                 'approval': False,
@@ -138,11 +368,11 @@ class LoanEligibilityService:
             }
         
         # Calculate credit score
-        credit_score = CreditScoreService.calculate_credit_score(customer_id)
+        credit_score = state['credit_score']
         
         # Check if current EMIs exceed 50% of monthly salary
-        total_current_emis = customer.get_total_current_emis()
-        if total_current_emis > (customer.monthly_income * 0.5):
+        total_current_emis = state['active_emi_total']
+        if total_current_emis > (state['monthly_income'] * 0.5):
             return {
                 'customer_id': customer_id,
                 'approval': False,
@@ -172,6 +402,80 @@ class LoanEligibilityService:
             'monthly_installment': monthly_installment
         }
     
+    @staticmethod
+    def quote_matrix(customer_id, loan_amounts, tenures, interest_rates):
+        """
+        Evaluate eligibility and EMI for every (amount, tenure, rate)
+        combination with NumPy broadcasting. The credit state is loaded once
+        and approval rules are applied per distinct rate. Returns None for
+        unknown customers.
+        """
+        state = CreditScoreService.get_credit_state(customer_id)
+        if state is None:
+            return None
+
+        credit_score = state['credit_score']
+        emi_cap_exceeded = state['active_emi_total'] > (state['monthly_income'] * 0.5)
+
+        decisions = [
+            (False, rate) if emi_cap_exceeded
+            else LoanEligibilityService._determine_approval(credit_score, rate)
+            for rate in interest_rates
+        ]
+        approvals = np.array([approval for approval, _ in decisions], dtype=bool)
+        corrected_rates = np.array([float(rate) for _, rate in decisions], dtype='float64')
+
+        # Shape (amounts, tenures, rates)
+        amounts = np.asarray([float(amount) for amount in loan_amounts], dtype='float64')[:, None, None]
+        months = np.asarray(tenures, dtype='int64')[None, :, None]
+        monthly_rate = (corrected_rates / 100 / 12)[None, None, :]
+
+        growth = (1 + monthly_rate) ** months
+        with np.errstate(divide='ignore', invalid='ignore'):
+            emi = np.where(
+                monthly_rate > 0,
+                amounts * monthly_rate * growth / (growth - 1),
+                amounts / months,
+            )
+        # Round half up to the paisa like calculate_emi. Float error can only
+        # flip cells within a hair of a half paisa, so those are redone exactly
+        paise = emi * 100
+        rounded = np.floor(paise + 0.5) / 100
+        for a, t, r in zip(*np.nonzero(np.abs(paise - np.floor(paise) - 0.5) < 1e-4)):
+            rounded[a, t, r] = float(calculate_emi(loan_amounts[a], decisions[r][1], tenures[t]))
+        # Like evaluate: a rejection on score still quotes the EMI; only the EMI cap zeroes it
+        emi = np.zeros_like(rounded) if emi_cap_exceeded else rounded
+
+        grid_shape = emi.shape
+        amount_grid, tenure_grid, rate_grid = np.meshgrid(
+            np.arange(len(loan_amounts)), np.arange(len(tenures)), np.arange(len(interest_rates)),
+            indexing='ij',
+        )
+        quotes = [
+            {
+                'loan_amount': loan_amounts[a],
+                'tenure': tenures[t],
+                'interest_rate': interest_rates[r],
+                'approval': bool(approvals[r]),
+                'corrected_interest_rate': decisions[r][1],
+                'monthly_installment': installment,
+            }
+            for a, t, r, installment in zip(
+                amount_grid.ravel().tolist(), tenure_grid.ravel().tolist(),
+                rate_grid.ravel().tolist(), emi.ravel().tolist(),
+            )
+        ]
+
+        result = {
+            'customer_id': customer_id,
+            'credit_score': credit_score,
+            'shape': list(grid_shape),
+            'quotes': quotes,
+        }
+        if emi_cap_exceeded:
+            result['message'] = 'Total current EMIs exceed 50% of monthly salary'
+        return result
+
     @staticmethod
     def _determine_approval(credit_score, interest_rate):
         """
@@ -197,23 +501,372 @@ class LoanEligibilityService:
         """
         Calculate monthly installment using compound interest formula
         """
-        from decimal import Decimal
-        
-        # Convert to Decimal for precise calculation
-        loan_amount = Decimal(str(loan_amount))
-        interest_rate = Decimal(str(interest_rate))
-        tenure = int(tenure)
-        
-        if interest_rate == 0:
-            return float(loan_amount / tenure)
-        
-        # Convert annual interest rate to monthly
-        monthly_rate = (interest_rate / 100) / 12
-        
-        # EMI formula: P * r * (1 + r)^n / ((1 + r)^n - 1)
-        if monthly_rate > 0:
-            emi = loan_amount * monthly_rate * (1 + monthly_rate)**tenure
-            emi = emi / ((1 + monthly_rate)**tenure - 1)
-            return float(emi)
-        else:
-            return float(loan_amount / tenure) 
\ No newline at end of file
+        return float(calculate_emi(loan_amount, interest_rate, tenure))
+
+
+class LoanOriginationService:
+    """Eligibility check plus loan creation, shared by the sync and async paths"""
+
+    MAX_ATTEMPTS = 3
+    RETRY_BACKOFF = 0.05  # seconds, doubled after each failed attempt
+    MAX_BACKOFF = 1.0
+    BATCH_CHUNK_SIZE = 500
+
+    @staticmethod
+    def originate(customer_id, loan_amount, interest_rate, tenure, credit_context=None):
+        """
+        Check eligibility and create the loan if approved.
+        Returns (eligibility_result, loan); loan is None when not approved.
+        """
+        # Rejections are decided on the request's (possibly cached) context
+        # and never take the customer lock
+        eligibility_result = LoanEligibilityService.check_eligibility(
+            customer_id, loan_amount, interest_rate, tenure,
+            credit_context=credit_context
+        )
+        if not eligibility_result['approval']:
+            return eligibility_result, None
+
+        return LoanOriginationService.run_serialized(
+            customer_id,
+            lambda: LoanOriginationService._create_if_eligible(
+                customer_id, loan_amount, interest_rate, tenure
+            )
+        )
+
+    @staticmethod
+    def originate_many(requests):
+        """
+        Originate a list of request dicts (customer_id, loan_amount,
+        interest_rate, tenure) in order. Returns [(eligibility_result, loan)]
+        in request order; loan is None for rejected items.
+        """
+        chunk_size = LoanOriginationService.BATCH_CHUNK_SIZE
+        outcomes = []
+        for start in range(0, len(requests), chunk_size):
+            chunk = requests[start:start + chunk_size]
+            outcomes.extend(LoanOriginationService.run_serialized(
+                [request['customer_id'] for request in chunk],
+                lambda: LoanOriginationService._originate_chunk(chunk)
+            ))
+        return outcomes
+
+    @staticmethod
+    def _originate_chunk(requests):
+        """
+        Evaluate a chunk against credit states loaded once for all of its
+        customers, applying each approval to the in-memory state so later
+        items count it toward the EMI cap and score. Call under the lock.
+        """
+        states = CreditScoreService.get_credit_states(
+            [request['customer_id'] for request in requests], use_cache=False
+        )
+        start_date = date.today()
+
+        outcomes = []
+        loans = []
+        for request in requests:
+            customer_id = request['customer_id']
+            state = states.get(customer_id)
+            eligibility_result = LoanEligibilityService.evaluate(
+                state, customer_id, request['loan_amount'], request['interest_rate'], request['tenure']
+            )
+            if not eligibility_result['approval']:
+                outcomes.append((eligibility_result, None))
+                continue
+
+            loan = Loan(
+                customer_id=customer_id,
+                loan_amount=request['loan_amount'],
+                tenure=request['tenure'],
+                interest_rate=eligibility_result['corrected_interest_rate'],
+                monthly_installment=Decimal(str(eligibility_result['monthly_installment'])),
+                start_date=start_date,
+                end_date=start_date.replace(year=start_date.year + request['tenure'] // 12),
+                status='active'
+            )
+            loans.append(loan)
+            outcomes.append((eligibility_result, loan))
+            LoanOriginationService._apply_approval(state, loan)
+
+        if loans:
+            # bulk_create skips post_save, so refresh profiles for the chunk here
+            Loan.objects.bulk_create(loans)
+            CreditProfileService.refresh_profiles({loan.customer_id for loan in loans})
+        return outcomes
+
+    @staticmethod
+    def _apply_approval(state, loan):
+        """Add a new active loan to a credit state and rescore it"""
+        state['active_loan_sum'] += loan.loan_amount
+        state['active_emi_total'] += loan.monthly_installment
+        state['total_loans'] += 1
+        state['current_year_loans'] += 1
+        state['total_volume'] += loan.loan_amount
+        state['credit_score'] = CreditScoreService.score_from_state(state)
+
+    @staticmethod
+    def run_serialized(customer_ids, func):
+        """
+        Run func in a transaction holding the row locks of the given
+        customer(s), so loan creation is serialized per customer while
+        different customers proceed in parallel. Lock timeouts, deadlocks and
+        SQLite "database is locked" errors are retried up to MAX_ATTEMPTS times.
+        """
+        if isinstance(customer_ids, int):
+            customer_ids = [customer_ids]
+        # Lock in id order so overlapping batches cannot deadlock each other
+        customer_ids = sorted(set(customer_ids))
+
+        # Inside an outer transaction a retry would hit the same conflict
+        attempts = 1 if connection.in_atomic_block else LoanOriginationService.MAX_ATTEMPTS
+        for attempt in range(attempts):
+            try:
+                with transaction.atomic(), customer_locks(customer_ids):
+                    return func()
+            except OperationalError:
+                if attempt == attempts - 1:
+                    raise
+                # Full jitter keeps retrying writers from colliding again
+                backoff = min(
+                    LoanOriginationService.RETRY_BACKOFF * 2 ** attempt,
+                    LoanOriginationService.MAX_BACKOFF
+                )
+                time.sleep(random.uniform(0, backoff))
+
+    @staticmethod
+    def _create_if_eligible(customer_id, loan_amount, interest_rate, tenure):
+        """Re-check eligibility on uncached state and create the loan; call under the customer lock"""
+        state = CreditScoreService.get_credit_state(customer_id, use_cache=False)
+        eligibility_result = LoanEligibilityService.evaluate(
+            state, customer_id, loan_amount, interest_rate, tenure
+        )
+        if not eligibility_result['approval']:
+            return eligibility_result, None
+
+        start_date = date.today()
+        end_date = start_date.replace(year=start_date.year + tenure // 12)
+
+        loan = Loan.objects.create(
+            customer_id=customer_id,
+            loan_amount=loan_amount,
+            tenure=tenure,
+            interest_rate=eligibility_result['corrected_interest_rate'],
+            monthly_installment=eligibility_result['monthly_installment'],
+            start_date=start_date,
+            end_date=end_date,
+            status='active'
+        )
+        return eligibility_result, loan
+
+    @staticmethod
+    def process_application(application_id):
+        """
+        Originate a pending LoanApplication and record the outcome on it.
+        Returns None if the application does not exist or was already decided.
+        """
+        customer_id = LoanApplication.objects.filter(
+            application_id=application_id, status='pending'
+        ).values_list('customer_id', flat=True).first()
+        if customer_id is None:
+            return None
+
+        def decide():
+            # Claim the application in the same transaction as its outcome: a
+            # redelivered task waits on the row lock and then finds it decided,
+            # and a worker dying midway rolls the claim back to pending
+            application = LoanApplication.objects.select_for_update().filter(
+                application_id=application_id, status='pending'
+            ).first()
+            if application is None:
+                return None
+
+            eligibility_result, loan = LoanOriginationService._create_if_eligible(
+                application.customer_id,
+                application.loan_amount,
+                application.interest_rate,
+                application.tenure
+            )
+            if loan is not None:
+                application.status = 'approved'
+                application.loan = loan
+                application.monthly_installment = loan.monthly_installment
+                application.message = 'Loan approved successfully'
+            else:
+                application.status = 'rejected'
+                application.message = eligibility_result.get('message', 'Loan not approved')
+            application.save()
+            return application
+
+        try:
+            return LoanOriginationService.run_serialized(customer_id, decide)
+        except Exception as e:
+            LoanApplication.objects.filter(application_id=application_id, status='pending').update(
+                status='failed', loan=None, message=str(e)[:255], updated_at=timezone.now()
+            )
+            raise
+
+
+class CustomerRegistrationService:
+    """Bulk customer onboarding"""
+
+    BATCH_SIZE = 1000
+
+    @staticmethod
+    def approved_limits(monthly_incomes):
+        """
+        Vectorized approved_limit: 36 x monthly income rounded to the nearest
+        lakh. np.round rounds half to even, exactly like the built-in round().
+        """
+        incomes = np.asarray(monthly_incomes, dtype='int64')
+        return (np.round(36 * incomes / 100000) * 100000).astype('int64')
+
+    @staticmethod
+    def register_many(rows):
+        """
+        Insert validated registration dicts with bulk_create.
+        Returns the created Customers, with customer_id set, in input order.
+        """
+        limits = CustomerRegistrationService.approved_limits([row['monthly_income'] for row in rows])
+        customers = [
+            Customer(**row, approved_limit=int(limit))
+            for row, limit in zip(rows, limits.tolist())
+        ]
+        with transaction.atomic():
+            customers = Customer.objects.bulk_create(
+                customers, batch_size=CustomerRegistrationService.BATCH_SIZE
+            )
+            # bulk_create skips post_save; drop entries cached while these ids were unknown
+            bump_versions(f'customer:{customer.customer_id}' for customer in customers)
+        return customers
+
+
+class CreditProfileService:
+    """Service for maintaining the materialized CustomerCreditProfile table"""
+
+    PROFILE_FIELDS = [
+        'active_loan_sum', 'active_emi_total', 'total_loans', 'completed_loans',
+        'on_time_completed_loans', 'loans_per_year', 'total_volume',
+    ]
+    CHUNK_SIZE = 500
+
+    @staticmethod
+    def refresh_profiles(customer_ids):
+        """
+        Recompute and upsert the profiles of the given customers from live
+        loan aggregates, and invalidate the scores and responses cached from
+        their old profiles. Unknown customer ids are ignored.
+        """
+        customer_ids = sorted(set(customer_ids))
+        refreshed = 0
+        for i in range(0, len(customer_ids), CreditProfileService.CHUNK_SIZE):
+            chunk = customer_ids[i:i + CreditProfileService.CHUNK_SIZE]
+            live = CreditProfileService._collect_live_aggregates(chunk)
+            current_year = str(datetime.now().year)
+
+            profiles = []
+            for customer_id, aggregates in live.items():
+                profile = CustomerCreditProfile(
+                    customer_id=customer_id,
+                    **{field: aggregates[field] for field in CreditProfileService.PROFILE_FIELDS}
+                )
+                profile.credit_score = CreditScoreService.compute_score(
+                    approved_limit=aggregates['approved_limit'],
+                    active_loan_sum=aggregates['active_loan_sum'],
+                    total_loans=aggregates['total_loans'],
+                    completed_loans=aggregates['completed_loans'],
+                    on_time_completed_loans=aggregates['on_time_completed_loans'],
+                    current_year_loans=aggregates['loans_per_year'].get(current_year, 0),
+                    total_volume=aggregates['total_volume'],
+                )
+                profiles.append(profile)
+
+            CustomerCreditProfile.objects.bulk_create(
+                profiles,
+                update_conflicts=True,
+                unique_fields=['customer'],
+                update_fields=CreditProfileService.PROFILE_FIELDS + ['credit_score', 'updated_at'],
+            )
+            bump_versions(f'customer-loans:{customer_id}' for customer_id in chunk)
+            refreshed += len(profiles)
+        return refreshed
+
+    @staticmethod
+    def rebuild_all_profiles(chunk_size=None):
+        """Rebuild every customer's profile from scratch"""
+        chunk_size = chunk_size or CreditProfileService.CHUNK_SIZE
+        customer_ids = Customer.objects.order_by('customer_id').values_list('customer_id', flat=True)
+
+        rebuilt = 0
+        chunk = []
+        for customer_id in customer_ids.iterator(chunk_size=chunk_size):
+            chunk.append(customer_id)
+            if len(chunk) >= chunk_size:
+                rebuilt += CreditProfileService.refresh_profiles(chunk)
+                chunk = []
+        if chunk:
+            rebuilt += CreditProfileService.refresh_profiles(chunk)
+        return rebuilt
+
+    @staticmethod
+    def find_drift(customer_ids=None):
+        """
+        Diff stored profiles against live loan aggregates.
+        Returns a list of {'customer_id', 'field', 'profile', 'live'} entries;
+        a missing profile is reported with field 'profile'.
+        """
+        if customer_ids is None:
+            customer_ids = Customer.objects.values_list('customer_id', flat=True)
+        customer_ids = sorted(set(customer_ids))
+
+        drift = []
+        for i in range(0, len(customer_ids), CreditProfileService.CHUNK_SIZE):
+            chunk = customer_ids[i:i + CreditProfileService.CHUNK_SIZE]
+            live = CreditProfileService._collect_live_aggregates(chunk)
+            stored = CustomerCreditProfile.objects.in_bulk(chunk)
+
+            for customer_id, aggregates in live.items():
+                profile = stored.get(customer_id)
+                if profile is None:
+                    if aggregates['total_loans']:
+                        drift.append({
+                            'customer_id': customer_id,
+                            'field': 'profile',
+                            'profile': None,
+                            'live': 'missing',
+                        })
+                    continue
+
+                for field in CreditProfileService.PROFILE_FIELDS:
+                    if getattr(profile, field) != aggregates[field]:
+                        drift.append({
+                            'customer_id': customer_id,
+                            'field': field,
+                            'profile': getattr(profile, field),
+                            'live': aggregates[field],
+                        })
+        return drift
+
+    @staticmethod
+    def _collect_live_aggregates(customer_ids):
+        """Aggregate the loans table for a chunk of customers (two grouped queries)"""
+        annotations = CreditScoreService._loan_aggregate_annotations()
+        rows = Customer.objects.filter(customer_id__in=customer_ids).annotate(
+            **annotations
+        ).values('customer_id', 'approved_limit', *annotations)
+
+        live = {}
+        for row in rows:
+            for field in ('active_loan_sum', 'active_emi_total', 'total_volume'):
+                if row[field] is None:
+                    row[field] = Decimal('0')
+            row['loans_per_year'] = {}
+            live[row['customer_id']] = row
+
+        yearly = Loan.objects.filter(customer_id__in=customer_ids).annotate(
+            year=ExtractYear('start_date')
+        ).values('customer_id', 'year').annotate(count=Count('loan_id'))
+        for row in yearly:
+            if row['customer_id'] in live:
+                live[row['customer_id']]['loans_per_year'][str(row['year'])] = row['count']
+        return live
@@ -0,0 +1,98 @@
+import threading
+from contextlib import contextmanager
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .cache import bump_versions
+from .models import Customer, Loan
+from .services import CreditProfileService
+
+
+_state = threading.local()
+
+
+@contextmanager
+def defer_profile_updates():
+    """
+    Collect the customers touched by Loan and Customer writes inside the
+    block and refresh their credit profiles and cache versions once on exit,
+    instead of once per write. Use inside the same transaction as the writes.
+    """
+    if getattr(_state, 'pending', None) is not None:
+        # Nested block: the outermost one does the refresh
+        yield
+        return
+
+    _state.pending = {'profiles': set(), 'versions': set()}
+    try:
+        yield
+        pending = _state.pending
+    finally:
+        _state.pending = None
+    if pending['profiles']:
+        CreditProfileService.refresh_profiles(pending['profiles'])
+    bump_versions(pending['versions'])
+
+
+def profiles_changed(customer_ids, loan_ids=()):
+    """
+    Refresh profiles and invalidate cached scores and responses for
+    customers whose loans changed
+    """
+    customer_ids = set(customer_ids)
+    # The profile refresh bumps customer-loans:<id> itself
+    versions = {f'loan:{loan_id}' for loan_id in loan_ids}
+    pending = getattr(_state, 'pending', None)
+    if pending is not None:
+        pending['profiles'].update(customer_ids)
+        pending['versions'].update(versions)
+    else:
+        CreditProfileService.refresh_profiles(customer_ids)
+        bump_versions(versions)
+
+
+def customers_changed(customer_ids, refresh_profiles=True):
+    """Invalidate cached data derived from the given customer rows"""
+    customer_ids = set(customer_ids)
+    versions = {f'customer:{customer_id}' for customer_id in customer_ids}
+    pending = getattr(_state, 'pending', None)
+    if pending is not None:
+        if refresh_profiles:
+            pending['profiles'].update(customer_ids)
+        pending['versions'].update(versions)
+    else:
+        if refresh_profiles:
+            CreditProfileService.refresh_profiles(customer_ids)
+        bump_versions(versions)
+
+
+def _is_customer_cascade(origin):
+    """True when a loan is being deleted because its customer is"""
+    return isinstance(origin, Customer) or getattr(origin, 'model', None) is Customer
+
+
+@receiver(post_save, sender=Loan)
+def loan_saved(sender, instance, **kwargs):
+    # Loan.save has locked the owner rows; a moved loan changes both owners
+    moved_from = getattr(instance, 'moved_from', None)
+    owners = [instance.customer_id] + ([moved_from] if moved_from is not None else [])
+    profiles_changed(owners, [instance.loan_id])
+
+
+@receiver(post_delete, sender=Loan)
+def loan_deleted(sender, instance, origin=None, **kwargs):
+    if _is_customer_cascade(origin):
+        return
+    profiles_changed([instance.customer_id], [instance.loan_id])
+
+
+@receiver(post_save, sender=Customer)
+def customer_saved(sender, instance, created, **kwargs):
+    # approved_limit feeds into the stored score; new customers have no loans yet
+    customers_changed([instance.customer_id], refresh_profiles=not created)
+
+
+@receiver(post_delete, sender=Customer)
+def customer_deleted(sender, instance, **kwargs):
+    customers_changed([instance.customer_id], refresh_profiles=False)
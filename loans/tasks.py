@@ -1,52 +1,109 @@
+import os
+import shutil
+import time
+
 import pandas as pd
-from celery import shared_task
+from celery import chain, chord, shared_task
 from datetime import datetime
 from decimal import Decimal
 from django.db import transaction
+from django.utils import timezone
+from .cache import bump_versions
 from .models import Customer, Loan
+from .readers import count_records, iter_chunks, record_offsets
+from .services import LoanOriginationService
+from .signals import customers_changed, defer_profile_updates
+
+
+# Rows written per bulk upsert statement during file ingestion
+INGEST_CHUNK_SIZE = 5000
+
+# Source column -> Customer field
+CUSTOMER_COLUMNS = {
+    'customer_id': 'customer_id',
+    'first_name': 'first_name',
+    'last_name': 'last_name',
+    'phone_number': 'phone_number',
+    'monthly_salary': 'monthly_income',
+    'approved_limit': 'approved_limit',
+    'current_debt': 'current_debt',
+}
+CUSTOMER_INT_FIELDS = ['customer_id', 'phone_number', 'monthly_income', 'approved_limit', 'current_debt']
+CUSTOMER_STR_FIELDS = ['first_name', 'last_name']
+CUSTOMER_UPDATE_FIELDS = [
+    'first_name', 'last_name', 'age', 'phone_number', 'monthly_income',
+    'approved_limit', 'current_debt', 'updated_at',
+]
+
+
+def _customer_frame(df):
+    """Rename and coerce the customer sheet's columns in bulk"""
+    df = df[list(CUSTOMER_COLUMNS)].rename(columns=CUSTOMER_COLUMNS)
+    df[CUSTOMER_INT_FIELDS] = df[CUSTOMER_INT_FIELDS].astype('int64')
+    df[CUSTOMER_STR_FIELDS] = df[CUSTOMER_STR_FIELDS].astype(str)
+    df['age'] = 30  # Default age since not in original data
+    # A chunk may list a customer more than once; the last row wins, as it did row by row
+    return df.drop_duplicates('customer_id', keep='last')
 
 
 @shared_task
-def ingest_customer_data(file_path):
+def ingest_customer_data(file_path, chunk_size=None, file_format=None, start=0, stop=None, seek=None):
     """
-    Ingest customer data from Excel file
+    Ingest customer data from an xlsx, csv, parquet or ndjson file (see
+    readers.FORMATS; detected from the extension unless file_format is
+    given), streaming it chunk_size rows at a time and upserting each chunk
+    in one statement. start and stop restrict it to one row range (a shard),
+    and seek locates record start in csv and ndjson files (plan_file_shards).
+    Each chunk commits on its own, so a failure keeps the chunks before it;
+    running the file again is safe, as rows are upserted.
     """
     try:
-        # Read Excel file
-        df = pd.read_excel(file_path)
+        started = time.monotonic()
+        chunk_size = chunk_size or INGEST_CHUNK_SIZE
         
         customers_created = 0
         customers_updated = 0
         
-        with transaction.atomic():
-            for _, row in df.iterrows():
-                customer_data = {
-                    'customer_id': int(row['customer_id']),
-                    'first_name': str(row['first_name']),
-                    'last_name': str(row['last_name']),
-                    'phone_number': int(row['phone_number']),
-                    'monthly_income': int(row['monthly_salary']),
-                    'approved_limit': int(row['approved_limit']),
-                    'current_debt': int(row['current_debt']),
-                    'age': 30,  # Default age since not in original data
-                }
-                
-                # Try to update existing customer or create new one
-                customer, created = Customer.objects.update_or_create(
-                    customer_id=customer_data['customer_id'],
-                    defaults=customer_data
+        # Each chunk commits on its own, so invalidation state never spans the file
+        for chunk in iter_chunks(
+            file_path, list(CUSTOMER_COLUMNS), chunk_size, file_format, start, stop, seek
+        ):
+            with transaction.atomic(), defer_profile_updates():
+                chunk = _customer_frame(chunk)
+                fields = list(chunk.columns)
+                customer_ids = chunk['customer_id'].tolist()
+                existing = set(
+                    Customer.objects.filter(customer_id__in=customer_ids)
+                    .values_list('customer_id', flat=True)
                 )
-                
-                if created:
-                    customers_created += 1
-                else:
-                    customers_updated += 1
-        
+
+                Customer.objects.bulk_create(
+                    [
+                        Customer(**dict(zip(fields, values)))
+                        for values in zip(*(chunk[field].tolist() for field in fields))
+                    ],
+                    update_conflicts=True,
+                    unique_fields=['customer_id'],
+                    update_fields=CUSTOMER_UPDATE_FIELDS
+                )
+
+                # bulk_create skips post_save: invalidate as customer_saved would.
+                # approved_limit feeds into the stored score of existing customers
+                created_ids = [customer_id for customer_id in customer_ids if customer_id not in existing]
+                customers_changed(existing)
+                customers_changed(created_ids, refresh_profiles=False)
+                customers_created += len(created_ids)
+                customers_updated += len(existing)
+    
+        elapsed = time.monotonic() - started
+        rows = customers_created + customers_updated
         return {
             'status': 'success',
             'message': f'Customer data ingested successfully. Created: {customers_created}, Updated: {customers_updated}',
             'customers_created': customers_created,
-            'customers_updated': customers_updated
+            'customers_updated': customers_updated,
+            'elapsed_seconds': round(elapsed, 3),
+            'rows_per_second': round(rows / elapsed, 1) if elapsed else None
         }
         
     except Exception as e:
@@ -56,65 +113,175 @@ def ingest_customer_data(file_path):
         }
 
 
+# Source column -> Loan field
+LOAN_COLUMNS = {
+    'customer_id': 'customer_id',
+    'loan_id': 'loan_id',
+    'loan_amount': 'loan_amount',
+    'tenure': 'tenure',
+    'interest_rate': 'interest_rate',
+    'monthly_repayment': 'monthly_installment',
+    'EMIs_paid_on_time': 'emis_paid_on_time',
+    'start_date': 'start_date',
+    'end_date': 'end_date',
+}
+LOAN_INT_FIELDS = ['customer_id', 'loan_id', 'tenure', 'emis_paid_on_time']
+LOAN_DECIMAL_FIELDS = ['loan_amount', 'interest_rate', 'monthly_installment']
+LOAN_DATE_FIELDS = ['start_date', 'end_date']
+LOAN_UPDATE_FIELDS = [
+    'customer_id', 'loan_amount', 'tenure', 'interest_rate', 'monthly_installment',
+    'emis_paid_on_time', 'start_date', 'end_date', 'status', 'updated_at',
+]
+
+
+def _loan_frame(df):
+    """
+    Rename and coerce the loan sheet's columns in bulk. Returns the loans
+    and the rejected source rows, each with a 'reason'.
+    """
+    loans = df[list(LOAN_COLUMNS)].rename(columns=LOAN_COLUMNS)
+    numeric = LOAN_INT_FIELDS + LOAN_DECIMAL_FIELDS
+    loans[numeric] = loans[numeric].apply(pd.to_numeric, errors='coerce')
+    for field in LOAN_DATE_FIELDS:
+        loans[field] = pd.to_datetime(loans[field], errors='coerce')
+
+    invalid = loans.isna().any(axis=1)
+    rejects = df[invalid].assign(reason='invalid value')
+    loans = loans[~invalid].copy()
+
+    loans[LOAN_INT_FIELDS] = loans[LOAN_INT_FIELDS].astype('int64')
+    for field in LOAN_DECIMAL_FIELDS:
+        loans[field] = loans[field].astype(str).map(Decimal)
+    loans['status'] = (loans['end_date'] < pd.Timestamp(datetime.now().date())).map(
+        {True: 'completed', False: 'active'}
+    )
+    for field in LOAN_DATE_FIELDS:
+        loans[field] = loans[field].dt.date
+    # A chunk may list a loan more than once; the last row wins, as it did row by row
+    return loans.drop_duplicates('loan_id', keep='last'), rejects
+
+
+def _rejects_path(file_path, shard=None):
+    suffix = '' if shard is None else f'_{shard}'
+    return f'{os.path.splitext(file_path)[0]}_rejects{suffix}.csv'
+
+
+def _append_rejects(rejects, rejects_path, header):
+    """Append rejected rows, with their row number in the source file, to the rejects report"""
+    rejects.insert(0, 'row', rejects.index)
+    rejects.to_csv(rejects_path, mode='a', header=header, index=False)
+
+
+def _write_loan_chunk(chunk):
+    """
+    Insert and update one chunk of loans and refresh the profiles of their
+    customers. Call under the customers' row locks (run_serialized).
+    Returns (created, updated).
+    """
+    fields = [field for field in chunk.columns if field != 'customer_id']
+    customer_ids = set(chunk['customer_id'].tolist())
+    previous_owners = dict(
+        Loan.objects.filter(loan_id__in=chunk['loan_id'].tolist()).values_list('loan_id', 'customer_id')
+    )
+    moved = {
+        loan_id for loan_id, customer_id in zip(chunk['loan_id'].tolist(), chunk['customer_id'].tolist())
+        if previous_owners.get(loan_id, customer_id) != customer_id
+    }
+    moved_from = {previous_owners[loan_id] for loan_id in moved} - customer_ids
+    if moved_from:
+        # Loans changing hands: their previous owners' profiles change too
+        list(Customer.objects.select_for_update().filter(
+            customer_id__in=moved_from
+        ).order_by('customer_id').values_list('customer_id', flat=True))
+
+    new_loans = []
+    changed_loans = []
+    now = timezone.now()
+    for customer_id, values in zip(
+        chunk['customer_id'].tolist(),
+        zip(*(chunk[field].tolist() for field in fields))
+    ):
+        loan = Loan(customer_id=customer_id, **dict(zip(fields, values)))
+        if loan.loan_id in previous_owners:
+            loan.updated_at = now  # bulk_update skips auto_now
+            changed_loans.append(loan)
+        else:
+            new_loans.append(loan)
+
+    Loan.objects.bulk_create(new_loans)
+    Loan.objects.bulk_update(changed_loans, LOAN_UPDATE_FIELDS)
+
+    # bulk writes skip post_save: refresh and invalidate the chunk's customers
+    # and the previous owners of loans that changed hands. Every cached loan
+    # entry also depends on its owner's customer:<id> version, so bumping
+    # that (rather than one loan:<id> per row) keeps the state per customer
+    customers_changed(customer_ids | moved_from)
+    # Cached loan owners are keyed on loan:<id>
+    bump_versions(f'loan:{loan_id}' for loan_id in moved)
+    return len(new_loans), len(changed_loans)
+
+
 @shared_task
-def ingest_loan_data(file_path):
+def ingest_loan_data(file_path, chunk_size=None, file_format=None, start=0, stop=None, rejects_path=None,
+                     seek=None):
     """
-    Ingest loan data from Excel file
+    Ingest loan data from an xlsx, csv, parquet or ndjson file (detected as
+    for ingest_customer_data), streaming it chunk_size rows at a time;
+    start, stop and seek restrict it to one row range (a shard), as for
+    ingest_customer_data. Each chunk commits on its own, as there.
+    Rows with unparseable values or unknown customers are not loaded; they
+    are written with the reason to rejects_path (<file>_rejects.csv by default).
     """
     try:
-        # Read Excel file
-        df = pd.read_excel(file_path)
+        started = time.monotonic()
+        chunk_size = chunk_size or INGEST_CHUNK_SIZE
+        rejects_path = rejects_path or _rejects_path(file_path)
+        if os.path.exists(rejects_path):
+            os.remove(rejects_path)  # left by an earlier run of this file
         
         loans_created = 0
         loans_updated = 0
+        loans_rejected = 0
         
-        with transaction.atomic():
-            for _, row in df.iterrows():
-                try:
-                    # Get customer
-                    customer = Customer.objects.get(customer_id=int(row['customer_id']))
-                    
-                    # Parse dates
-                    start_date = pd.to_datetime(row['start_date']).date()
-                    end_date = pd.to_datetime(row['end_date']).date()
-                    
-                    loan_data = {
-                        'customer': customer,
-                        'loan_id': int(row['loan_id']),
-                        'loan_amount': Decimal(str(row['loan_amount'])),
-                        'tenure': int(row['tenure']),
-                        'interest_rate': Decimal(str(row['interest_rate'])),
-                        'monthly_installment': Decimal(str(row['monthly_repayment'])),
-                        'emis_paid_on_time': int(row['EMIs_paid_on_time']),
-                        'start_date': start_date,
-                        'end_date': end_date,
-                        'status': 'completed' if end_date < datetime.now().date() else 'active',
-                    }
-                    
-                    # Try to update existing loan or create new one
-                    loan, created = Loan.objects.update_or_create(
-                        loan_id=loan_data['loan_id'],
-                        defaults=loan_data
-                    )
-                    
-                    if created:
-                        loans_created += 1
-                    else:
-                        loans_updated += 1
-                        
-                except Customer.DoesNotExist:
-                    # Skip loans for non-existent customers
-                    continue
-                except Exception as e:
-                    # Log error but continue processing
-                    print(f"Error processing loan {row.get('loan_id', 'unknown')}: {str(e)}")
-                    continue
-        
+        for df in iter_chunks(file_path, list(LOAN_COLUMNS), chunk_size, file_format, start, stop, seek):
+            chunk, rejects = _loan_frame(df)
+            known = Customer.objects.filter(
+                customer_id__in=set(chunk['customer_id'].tolist())
+            ).values_list('customer_id', flat=True)
+            orphaned = ~chunk['customer_id'].isin(list(known))
+            rejects = pd.concat([
+                rejects, df.loc[chunk.index[orphaned]].assign(reason='unknown customer')
+            ]).sort_index()
+            if len(rejects):
+                _append_rejects(rejects, rejects_path, header=not loans_rejected)
+                loans_rejected += len(rejects)
+            chunk = chunk[~orphaned]
+            if chunk.empty:
+                continue
+
+            # Each chunk commits on its own, with its profile refresh, holding
+            # its customers' row locks: parallel shards may write loans of the
+            # same customer, and each refresh must see the other's loans
+            created, updated = LoanOriginationService.run_serialized(
+                chunk['customer_id'].tolist(), lambda: _write_loan_chunk(chunk)
+            )
+            loans_created += created
+            loans_updated += updated
+
+        elapsed = time.monotonic() - started
+        rows = loans_created + loans_updated
         return {
             'status': 'success',
-            'message': f'Loan data ingested successfully. Created: {loans_created}, Updated: {loans_updated}',
+            'message': (
+                f'Loan data ingested successfully. Created: {loans_created}, '
+                f'Updated: {loans_updated}, Rejected: {loans_rejected}'
+            ),
             'loans_created': loans_created,
-            'loans_updated': loans_updated
+            'loans_updated': loans_updated,
+            'loans_rejected': loans_rejected,
+            'rejects_path': rejects_path if loans_rejected else None,
+            'elapsed_seconds': round(elapsed, 3),
+            'rows_per_second': round(rows / elapsed, 1) if elapsed else None
         }
         
     except Exception as e:
@@ -125,20 +292,20 @@ def ingest_loan_data(file_path):
 
 
 @shared_task
-def ingest_all_data(customer_file_path, loan_file_path):
+def ingest_all_data(customer_file_path, loan_file_path, chunk_size=None, file_format=None):
     """
     Ingest both customer and loan data
     """
     try:
         # Ingest customer data first
-        customer_result = ingest_customer_data.delay(customer_file_path)
+        customer_result = ingest_customer_data.delay(customer_file_path, chunk_size, file_format)
         customer_result = customer_result.get()
         
         if customer_result['status'] == 'error':
             return customer_result
         
         # Ingest loan data
-        loan_result = ingest_loan_data.delay(loan_file_path)
+        loan_result = ingest_loan_data.delay(loan_file_path, chunk_size, file_format)
         loan_result = loan_result.get()
         
         return {
@@ -152,4 +319,283 @@ def ingest_all_data(customer_file_path, loan_file_path):
         return {
             'status': 'error',
             'message': f'Failed to ingest data: {str(e)}'
-        } 
\ No newline at end of file
+        }
+
+
+def plan_shards(records, shards):
+    """
+    Split record positions [0, records) into at most shards contiguous
+    (start, stop) ranges. The last range is open-ended (stop None) so rows
+    beyond a file's recorded size are still read.
+    """
+    size = max(-(-records // max(shards, 1)), 1)
+    ranges = [(start, start + size) for start in range(0, max(records, 1), size)]
+    ranges[-1] = (ranges[-1][0], None)
+    return ranges
+
+
+def plan_file_shards(file_path, shards, file_format=None):
+    """
+    plan_shards for a file, as (start, stop, seek) ranges: seek is where the
+    range's first record starts in csv and ndjson files, so each shard reads
+    from there rather than from the top of the file, and None otherwise.
+    """
+    ranges = plan_shards(count_records(file_path, file_format), shards)
+    seeks = record_offsets(file_path, [start for start, _ in ranges], file_format)
+    return [
+        (start, stop, seeks[i] if seeks else None)
+        for i, (start, stop) in enumerate(ranges)
+    ]
+
+
+def _summarize_shards(results, counts):
+    """Totals of the given counts over shard results, and the shards' error messages"""
+    errors = [result['message'] for result in results if result['status'] == 'error']
+    totals = {count: sum(result.get(count, 0) for result in results) for count in counts}
+    # Shards run side by side, so the slowest one bounds the stage
+    totals['elapsed_seconds'] = max(result.get('elapsed_seconds', 0) for result in results)
+    return totals, errors
+
+
+def ingest_all_data_sharded(customer_file_path, loan_file_path, shards, chunk_size=None, file_format=None):
+    """
+    Celery workflow ingesting both files as parallel row-range shards: a
+    chord of customer shards whose callback totals their counts, chained to
+    a chord of loan shards, which therefore only start once every customer
+    shard has committed. Run it with .apply_async() (or .apply()); its
+    result has the same shape as ingest_all_data's.
+    """
+    customer_shards = plan_file_shards(customer_file_path, shards, file_format)
+    loan_shards = plan_file_shards(loan_file_path, shards, file_format)
+    return chain(
+        chord(
+            [
+                ingest_customer_data.si(customer_file_path, chunk_size, file_format, start, stop, seek)
+                for start, stop, seek in customer_shards
+            ],
+            summarize_customer_shards.s()
+        ),
+        # Each loan shard receives the customer stage's result from the chain
+        chord(
+            [
+                ingest_loan_shard.s(loan_file_path, chunk_size, file_format, start, stop, seek)
+                for start, stop, seek in loan_shards
+            ],
+            summarize_loan_shards.s(loan_file_path)
+        )
+    )
+
+
+@shared_task
+def summarize_customer_shards(results):
+    """Chord callback: total the customer shard results"""
+    totals, errors = _summarize_shards(results, ['customers_created', 'customers_updated'])
+    if errors:
+        return {
+            'status': 'error',
+            'message': f"Failed to ingest customer data: {'; '.join(errors)}"
+        }
+
+    rows = totals['customers_created'] + totals['customers_updated']
+    elapsed = totals['elapsed_seconds']
+    return {
+        'status': 'success',
+        'message': (
+            f"Customer data ingested successfully in {len(results)} shards. "
+            f"Created: {totals['customers_created']}, Updated: {totals['customers_updated']}"
+        ),
+        **totals,
+        'shards': len(results),
+        'rows_per_second': round(rows / elapsed, 1) if elapsed else None
+    }
+
+
+@shared_task
+def ingest_loan_shard(customer_result, loan_file_path, chunk_size, file_format, start, stop, seek=None):
+    """
+    One loan shard of ingest_all_data_sharded; skipped when the customer
+    stage failed. Writes its rejects to a report of its own.
+    """
+    if customer_result['status'] == 'error':
+        return {'status': 'skipped', 'customer_result': customer_result}
+
+    result = ingest_loan_data(
+        loan_file_path, chunk_size, file_format, start, stop,
+        _rejects_path(loan_file_path, shard=start), seek
+    )
+    return {**result, 'customer_result': customer_result}
+
+
+@shared_task
+def summarize_loan_shards(results, loan_file_path):
+    """Chord callback: total the loan shard results and merge their rejects reports"""
+    customer_result = results[0]['customer_result']
+    if customer_result['status'] == 'error':
+        return customer_result
+
+    totals, errors = _summarize_shards(results, ['loans_created', 'loans_updated', 'loans_rejected'])
+
+    # Shards cover the file in order, so concatenating keeps the report in row order
+    rejects_path = _rejects_path(loan_file_path)
+    if os.path.exists(rejects_path):
+        os.remove(rejects_path)  # left by an earlier run of this file
+    shard_paths = [result['rejects_path'] for result in results if result.get('rejects_path')]
+    if shard_paths:
+        with open(rejects_path, 'wb') as merged:
+            for i, shard_path in enumerate(shard_paths):
+                with open(shard_path, 'rb') as shard:
+                    if i:
+                        shard.readline()  # header
+                    shutil.copyfileobj(shard, merged)
+                os.remove(shard_path)
+
+    if errors:
+        return {
+            'status': 'error',
+            'message': f"Failed to ingest loan data: {'; '.join(errors)}"
+        }
+
+    rows = totals['loans_created'] + totals['loans_updated']
+    elapsed = totals['elapsed_seconds']
+    return {
+        'status': 'success',
+        'customer_result': customer_result,
+        'loan_result': {
+            'status': 'success',
+            'message': (
+                f"Loan data ingested successfully in {len(results)} shards. "
+                f"Created: {totals['loans_created']}, Updated: {totals['loans_updated']}, "
+                f"Rejected: {totals['loans_rejected']}"
+            ),
+            **totals,
+            'rejects_path': rejects_path if shard_paths else None,
+            'shards': len(results),
+            'rows_per_second': round(rows / elapsed, 1) if elapsed else None
+        },
+        'message': 'All data ingested successfully'
+    }
+
+
+@shared_task
+def rescore_customers(start_id=None, end_id=None, chunk_size=10000):
+    """
+    Rescore customers in the given customer ID range with the bulk engine
+    """
+    from .scoring import BulkScoringEngine
+
+    try:
+        summary = BulkScoringEngine(chunk_size=chunk_size).run(start_id, end_id)
+        return {
+            'status': 'success',
+            'message': f"Rescored {summary['customers_scored']} customers",
+            **summary
+        }
+
+    except Exception as e:
+        return {
+            'status': 'error',
+            'message': f'Failed to rescore customers: {str(e)}'
+        }
+
+
+@shared_task
+def export_loan_schedules(output_path, customer_id=None, chunk_size=10000):
+    """
+    Write amortization schedules for all loans (or one customer's) to a CSV file
+    """
+    from .schedules import iter_schedule_csv
+
+    try:
+        loans = Loan.objects.all()
+        if customer_id is not None:
+            loans = loans.filter(customer_id=customer_id)
+
+        rows = 0
+        with open(output_path, 'w', newline='') as output:
+            for block in iter_schedule_csv(loans, chunk_size=chunk_size):
+                output.write(block)
+                rows += block.count('\n')
+
+        return {
+            'status': 'success',
+            'message': f'Exported {rows - 1} schedule rows to {output_path}',
+            'rows': rows - 1
+        }
+
+    except Exception as e:
+        return {
+            'status': 'error',
+            'message': f'Failed to export loan schedules: {str(e)}'
+        }
+
+
+@shared_task
+def process_loan_application(application_id):
+    """
+    Run eligibility and loan creation for a queued loan application
+    """
+    try:
+        application = LoanOriginationService.process_application(application_id)
+        if application is None:
+            return {
+                'status': 'error',
+                'message': f'Loan application {application_id} is not pending'
+            }
+
+        return {
+            'status': 'success',
+            'message': f'Loan application {application_id} {application.status}',
+            'application_id': application_id,
+            'application_status': application.status,
+            'loan_id': application.loan_id
+        }
+
+    except Exception as e:
+        return {
+            'status': 'error',
+            'message': f'Failed to process loan application: {str(e)}'
+        }
+
+
+@shared_task
+def purge_idempotency_keys():
+    """
+    Delete expired Idempotency-Key records
+    """
+    from .idempotency import purge_expired
+
+    try:
+        purged = purge_expired()
+        return {
+            'status': 'success',
+            'message': f'Purged {purged} expired idempotency keys',
+            'purged': purged
+        }
+
+    except Exception as e:
+        return {
+            'status': 'error',
+            'message': f'Failed to purge idempotency keys: {str(e)}'
+        }
+
+
+@shared_task
+def refresh_health_stats():
+    """
+    Refresh the row count estimates reported by /health
+    """
+    from .health import table_stats
+
+    try:
+        stats = table_stats(refresh=True)
+        return {
+            'status': 'success',
+            'message': 'Refreshed health check stats',
+            'stats': stats
+        }
+
+    except Exception as e:
+        return {
+            'status': 'error',
+            'message': f'Failed to refresh health check stats: {str(e)}'
+        }
@@ -1,12 +1,53 @@
-from django.test import TestCase
-from django.urls import reverse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from io import StringIO
+from unittest import mock
+
+import pandas as pd
+from openpyxl import Workbook
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, transaction
+from django.db.models import QuerySet
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APITestCase
-from rest_framework import status
-from decimal import Decimal
-from datetime import date, datetime
+from rest_framework import serializers, status
+from decimal import Decimal, ROUND_HALF_UP
+from datetime import date, datetime, timedelta
 
-from .models import Customer, Loan
-from .services import CreditScoreService, LoanEligibilityService
+from .cache import LRUCache, _dirty_names, get_versions
+from .emi import annuity_factor, calculate_emi, rate_to_basis_points
+from .health import estimate_row_counts, table_stats
+from .idempotency import purge_expired, request_fingerprint
+from .models import Customer, Loan, CustomerCreditProfile, IdempotencyKey, LoanApplication
+from .readers import count_records, iter_chunks, iter_excel_chunks
+from .services import (
+    CreditScoreService, LoanEligibilityService, CreditProfileService, LoanOriginationService,
+    CustomerRegistrationService
+)
+from .schedules import SCHEDULE_COLUMNS, build_schedule
+from .renderers import FastJSONRenderer
+from .response_cache import _loan_owners, cache_stats as response_cache_stats, response_cache
+from .serializers import (
+    CustomerLoanListSerializer, LoanDetailSerializer, RegisterCustomerItemSerializer,
+    RegisterCustomerSerializer, compile_item_validator
+)
+from .scoring import BulkScoringEngine
+from .tasks import (
+    ingest_all_data_sharded, ingest_customer_data, ingest_loan_data, plan_file_shards, plan_shards,
+    process_loan_application, refresh_health_stats, rescore_customers
+)
 
 
 class CustomerModelTest(TestCase):
@@ -83,6 +124,42 @@ class LoanModelTest(TestCase):
         self.assertGreater(emi, 0)
 
 
+class EMICalculationTest(TestCase):
+    def test_calculate_emi(self):
+        self.assertEqual(calculate_emi(100000, 10.5, 12), Decimal('8814.86'))
+        self.assertEqual(calculate_emi(Decimal('100000.00'), Decimal('10.50'), 12), Decimal('8814.86'))
+        self.assertEqual(calculate_emi(1200, 0, 7), Decimal('171.43'))
+
+    def test_matches_unrounded_formula(self):
+        for amount, rate, tenure in [(50000, 8, 6), (123456.78, 13.37, 37), (2500000, 17.99, 120)]:
+            monthly_rate = Decimal(str(rate)) / 100 / 12
+            growth = (1 + monthly_rate) ** tenure
+            exact = Decimal(str(amount)) * monthly_rate * growth / (growth - 1)
+            self.assertEqual(
+                calculate_emi(amount, rate, tenure),
+                exact.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+            )
+
+    def test_annuity_factor_is_memoized(self):
+        annuity_factor.cache_clear()
+        calculate_emi(100000, 10.5, 12)
+        calculate_emi(250000, Decimal('10.50'), 12)
+        info = annuity_factor.cache_info()
+        self.assertEqual((info.hits, info.misses), (1, 1))
+        self.assertEqual(rate_to_basis_points(10.5), 1050)
+
+    def test_call_sites_share_engine(self):
+        customer = Customer.objects.create(
+            first_name="John", last_name="Doe", age=30, phone_number=9876543210,
+            monthly_income=50000, approved_limit=1800000,
+        )
+        loan = Loan(customer=customer, loan_amount=100000, tenure=12, interest_rate=10.5)
+        self.assertEqual(loan.calculate_monthly_installment(), Decimal('8814.86'))
+        self.assertEqual(
+            LoanEligibilityService._calculate_monthly_installment(100000, 10.5, 12), 8814.86
+        )
+
+
 class CreditScoreServiceTest(TestCase):
     def setUp(self):
         self.customer = Customer.objects.create(
@@ -117,6 +194,59 @@ class CreditScoreServiceTest(TestCase):
         score = CreditScoreService.calculate_credit_score(self.customer.customer_id)
         self.assertGreater(score, 0)
 
+    def test_calculate_credit_score_components(self):
+        # Two completed loans (one paid on time) and one active loan this year
+        last_year = date.today().replace(year=date.today().year - 1)
+        Loan.objects.create(
+            customer=self.customer, loan_amount=400000, tenure=12, interest_rate=10.5,
+            monthly_installment=35000, emis_paid_on_time=12,
+            start_date=last_year, end_date=last_year, status='completed'
+        )
+        Loan.objects.create(
+            customer=self.customer, loan_amount=400000, tenure=12, interest_rate=10.5,
+            monthly_installment=35000, emis_paid_on_time=8,
+            start_date=last_year, end_date=last_year, status='completed'
+        )
+        Loan.objects.create(
+            customer=self.customer, loan_amount=300000, tenure=12, interest_rate=10.5,
+            monthly_installment=26000, start_date=date.today(),
+            end_date=date.today().replace(year=date.today().year + 1), status='active'
+        )
+
+        # 35 * 0.35 (50% on time, capped) + 20 * 0.25 (3 loans)
+        # + 15 * 0.25 (1 loan this year) + 10 * 0.15 (11 lakhs)
+        score = CreditScoreService.calculate_credit_score(self.customer.customer_id)
+        self.assertAlmostEqual(score, 35 * 0.35 + 20 * 0.25 + 15 * 0.25 + 10 * 0.15)
+
+    def test_calculate_credit_score_active_loans_exceed_limit(self):
+        Loan.objects.create(
+            customer=self.customer, loan_amount=2000000, tenure=12, interest_rate=10.5,
+            monthly_installment=175000, start_date=date.today(),
+            end_date=date.today().replace(year=date.today().year + 1), status='active'
+        )
+        score = CreditScoreService.calculate_credit_score(self.customer.customer_id)
+        self.assertEqual(score, 0)
+
+    def test_calculate_credit_score_unknown_customer(self):
+        self.assertEqual(CreditScoreService.calculate_credit_score(999), 0)
+
+    def test_calculate_credit_score_query_count_is_constant(self):
+        for i in range(25):
+            Loan.objects.create(
+                customer=self.customer,
+                loan_amount=10000,
+                tenure=12,
+                interest_rate=10.5,
+                monthly_installment=880,
+                emis_paid_on_time=12 if i % 2 else 6,
+                start_date=date.today().replace(year=date.today().year - 1),
+                end_date=date.today().replace(year=date.today().year - 1, month=12),
+                status='completed'
+            )
+
+        with self.assertNumQueries(1):
+            CreditScoreService.calculate_credit_score(self.customer.customer_id)
+
 
 class LoanEligibilityServiceTest(TestCase):
     def setUp(self):
@@ -157,6 +287,517 @@ class LoanEligibilityServiceTest(TestCase):
         self.assertTrue(result['approval'])
 
 
+class CreditProfileServiceTest(TestCase):
+    def setUp(self):
+        self.customer = Customer.objects.create(
+            first_name="John",
+            last_name="Doe",
+            age=30,
+            phone_number=9876543210,
+            monthly_income=50000,
+            approved_limit=1800000,
+            current_debt=0
+        )
+
+    def _create_loan(self, **kwargs):
+        data = {
+            'customer': self.customer,
+            'loan_amount': 100000,
+            'tenure': 12,
+            'interest_rate': 10.5,
+            'monthly_installment': 8791.59,
+            'emis_paid_on_time': 12,
+            'start_date': date.today(),
+            'end_date': date.today().replace(year=date.today().year + 1),
+            'status': 'active',
+        }
+        data.update(kwargs)
+        return Loan.objects.create(**data)
+
+    def test_profile_follows_loan_writes(self):
+        loan = self._create_loan()
+        self._create_loan(status='completed', emis_paid_on_time=6)
+
+        profile = CustomerCreditProfile.objects.get(customer=self.customer)
+        self.assertEqual(profile.total_loans, 2)
+        self.assertEqual(profile.active_loan_sum, Decimal('100000'))
+        self.assertEqual(profile.active_emi_total, Decimal('8791.59'))
+        self.assertEqual(profile.completed_loans, 1)
+        self.assertEqual(profile.on_time_completed_loans, 0)
+        self.assertEqual(profile.loans_in_year(date.today().year), 2)
+        self.assertEqual(profile.total_volume, Decimal('200000'))
+        self.assertIsNotNone(profile.credit_score)
+
+        loan.status = 'completed'
+        loan.save()
+        profile.refresh_from_db()
+        self.assertEqual(profile.active_loan_sum, 0)
+        self.assertEqual(profile.on_time_completed_loans, 1)
+
+        loan.delete()
+        profile.refresh_from_db()
+        self.assertEqual(profile.total_loans, 1)
+        self.assertEqual(CreditProfileService.find_drift(), [])
+
+    def test_moving_a_loan_refreshes_both_owners(self):
+        other = Customer.objects.create(
+            first_name="Jane", last_name="Roe", age=31, phone_number=9876543219,
+            monthly_income=60000, approved_limit=2200000, current_debt=0
+        )
+        loan = self._create_loan()
+        for moved in (Loan.objects.get(pk=loan.pk), Loan(**{
+            field.attname: getattr(loan, field.attname) for field in Loan._meta.concrete_fields
+        })):
+            owner = other if moved.customer_id == self.customer.customer_id else self.customer
+            previous = moved.customer_id
+            moved.customer = owner
+            moved.save()
+            self.assertEqual(CustomerCreditProfile.objects.get(customer_id=previous).total_loans, 0)
+            self.assertEqual(CustomerCreditProfile.objects.get(customer=owner).total_loans, 1)
+        self.assertEqual(CreditProfileService.find_drift(), [])
+
+    def test_loan_writes_lock_their_owners(self):
+        loan = self._create_loan()
+        with mock.patch.object(
+            QuerySet, 'select_for_update', autospec=True, side_effect=QuerySet.select_for_update
+        ) as select_for_update:
+            loan.status = 'completed'
+            loan.save()
+            loan.delete()
+            # Already held by run_serialized: not locked again
+            LoanOriginationService.run_serialized(self.customer.customer_id, self._create_loan)
+        locked = [call.args[0].model for call in select_for_update.call_args_list]
+        self.assertEqual(locked, [Customer] * 3)
+
+    def test_customer_delete_cascades(self):
+        self._create_loan()
+        self.customer.delete()
+        self.assertFalse(CustomerCreditProfile.objects.exists())
+
+    def test_eligibility_reads_single_profile_row(self):
+        for i in range(5):
+            self._create_loan(status='completed')
+
+        with self.assertNumQueries(1):
+            result = LoanEligibilityService.check_eligibility(
+                self.customer.customer_id, 100000, 10.5, 12
+            )
+        self.assertTrue(result['approval'])
+
+    def test_score_matches_live_aggregates(self):
+        self._create_loan(status='completed')
+        self._create_loan(status='completed', emis_paid_on_time=3)
+        self._create_loan(loan_amount=1500000)
+
+        from_profile = CreditScoreService.calculate_credit_score(self.customer.customer_id)
+        CustomerCreditProfile.objects.all().delete()
+        live = CreditScoreService.calculate_credit_score(self.customer.customer_id)
+        self.assertEqual(from_profile, live)
+
+    def test_check_and_rebuild_commands(self):
+        loan = self._create_loan()
+        # Bypass signals so the profile drifts
+        Loan.objects.filter(pk=loan.pk).update(status='completed')
+
+        drift = CreditProfileService.find_drift()
+        self.assertEqual(
+            {entry['field'] for entry in drift},
+            {'active_loan_sum', 'active_emi_total', 'completed_loans', 'on_time_completed_loans'}
+        )
+        with self.assertRaises(CommandError):
+            call_command('check_credit_profiles', stdout=StringIO())
+
+        call_command('rebuild_credit_profiles', stdout=StringIO())
+        self.assertEqual(CreditProfileService.find_drift(), [])
+
+    def test_ingest_loan_data_updates_profiles(self):
+        path = os.path.join(tempfile.mkdtemp(), 'loan_data.xlsx')
+        pd.DataFrame([{
+            'customer_id': self.customer.customer_id,
+            'loan_id': 501,
+            'loan_amount': 250000,
+            'tenure': 24,
+            'interest_rate': 12.5,
+            'monthly_repayment': 11827,
+            'EMIs_paid_on_time': 24,
+            'start_date': date(2019, 1, 1),
+            'end_date': date(2021, 1, 1),
+        }]).to_excel(path, index=False)
+
+        result = ingest_loan_data(path)
+        self.assertEqual(result['loans_created'], 1)
+        profile = CustomerCreditProfile.objects.get(customer=self.customer)
+        self.assertEqual(profile.completed_loans, 1)
+        self.assertEqual(profile.loans_in_year(2019), 1)
+
+    def test_ingest_loan_data_rejects_orphans_and_bad_rows(self):
+        existing = self._create_loan(status='active')
+        other = Customer.objects.create(
+            first_name="Jane", last_name="Roe", age=40, phone_number=9876543211,
+            monthly_income=60000, approved_limit=2200000, current_debt=0
+        )
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, 'loan_data.xlsx')
+        row = {
+            'customer_id': self.customer.customer_id,
+            'loan_id': 601,
+            'loan_amount': 250000,
+            'tenure': 24,
+            'interest_rate': 12.5,
+            'monthly_repayment': 11827.3,
+            'EMIs_paid_on_time': 24,
+            'start_date': date(2019, 1, 1),
+            'end_date': date(2021, 1, 1),
+        }
+        pd.DataFrame([
+            row,
+            # Moves the existing loan to the other customer
+            {**row, 'loan_id': existing.loan_id, 'customer_id': other.customer_id},
+            {**row, 'loan_id': 602, 'customer_id': 99999},
+            {**row, 'loan_id': 603, 'start_date': 'not a date'},
+            {**row, 'loan_id': 604, 'customer_id': other.customer_id},
+        ]).to_excel(path, index=False)
+
+        owner_version = get_versions([f'loan:{existing.loan_id}'])
+        result = ingest_loan_data(path, chunk_size=2)
+        self.assertEqual(result['status'], 'success', result['message'])
+        self.assertEqual(
+            (result['loans_created'], result['loans_updated'], result['loans_rejected']), (2, 1, 2)
+        )
+        # Cached owners of moved loans are dropped
+        self.assertNotEqual(get_versions([f'loan:{existing.loan_id}']), owner_version)
+
+        rejects = pd.read_csv(result['rejects_path'])
+        self.assertEqual(result['rejects_path'], os.path.join(directory, 'loan_data_rejects.csv'))
+        self.assertEqual(rejects['row'].tolist(), [4, 5])
+        self.assertEqual(rejects['loan_id'].tolist(), [602, 603])
+        self.assertEqual(rejects['reason'].tolist(), ['unknown customer', 'invalid value'])
+
+        loan = Loan.objects.get(loan_id=601)
+        self.assertEqual(loan.monthly_installment, Decimal('11827.30'))
+        self.assertEqual(loan.status, 'completed')
+        existing.refresh_from_db()
+        self.assertEqual(existing.customer_id, other.customer_id)
+        self.assertEqual(existing.loan_amount, Decimal('250000'))
+        self.assertGreater(existing.updated_at, existing.created_at)
+
+        # Both the old and the new owner's profiles follow the moved loan
+        profile = CustomerCreditProfile.objects.get(customer=self.customer)
+        self.assertEqual((profile.total_loans, profile.completed_loans), (1, 1))
+        profile = CustomerCreditProfile.objects.get(customer=other)
+        self.assertEqual((profile.total_loans, profile.completed_loans), (2, 2))
+
+    def test_ingest_loan_data_without_rejects(self):
+        path = os.path.join(tempfile.mkdtemp(), 'loan_data.xlsx')
+        pd.DataFrame([{
+            'customer_id': self.customer.customer_id,
+            'loan_id': 700 + i,
+            'loan_amount': 100000,
+            'tenure': 12,
+            'interest_rate': 10,
+            'monthly_repayment': 8792,
+            'EMIs_paid_on_time': 12,
+            'start_date': date(2020, 1, 1),
+            'end_date': date(2021, 1, 1),
+        } for i in range(4)]).to_excel(path, index=False)
+
+        # Per chunk of 2: the customer lookup, then in a savepoint pair holding
+        # the customer lock, the loan lookup, one insert and the profile
+        # refresh (three queries)
+        with self.assertNumQueries(2 * (1 + 3 + 2 + 3)):
+            result = ingest_loan_data(path, chunk_size=2)
+        self.assertEqual((result['loans_created'], result['loans_rejected']), (4, 0))
+        self.assertIsNone(result['rejects_path'])
+
+    def _customer_sheet(self, rows):
+        path = os.path.join(tempfile.mkdtemp(), 'customer_data.xlsx')
+        pd.DataFrame([{
+            'customer_id': customer_id,
+            'first_name': 'Ingested',
+            'last_name': str(customer_id),
+            'phone_number': 7000000000 + customer_id,
+            'monthly_salary': 40000,
+            'approved_limit': approved_limit,
+            'current_debt': 0,
+        } for customer_id, approved_limit in rows]).to_excel(path, index=False)
+        return path
+
+    def test_ingest_customer_data_upserts_in_chunks(self):
+        self._create_loan()
+        self.assertGreater(CustomerCreditProfile.objects.get(customer=self.customer).credit_score, 0)
+        new_id = self.customer.customer_id + 100
+        path = self._customer_sheet([
+            (self.customer.customer_id, 1500000),
+            (new_id, 1400000),
+            (new_id + 1, 1400000),
+            # Repeated id in a later chunk: the last row wins
+            (self.customer.customer_id, 50000),
+        ])
+
+        result = ingest_customer_data(path, chunk_size=2)
+        self.assertEqual(result['status'], 'success', result['message'])
+        self.assertEqual(result['customers_created'], 2)
+        self.assertEqual(result['customers_updated'], 2)
+        self.assertIn('rows_per_second', result)
+
+        self.customer.refresh_from_db()
+        self.assertEqual(self.customer.approved_limit, 50000)
+        self.assertEqual(self.customer.first_name, 'Ingested')
+        self.assertEqual(Customer.objects.get(customer_id=new_id).monthly_income, 40000)
+        # The stored score follows the new approved_limit (active loans now exceed it)
+        self.assertEqual(CustomerCreditProfile.objects.get(customer=self.customer).credit_score, 0)
+
+        # Within one chunk a repeated id is written, and counted, once
+        result = ingest_customer_data(path)
+        self.assertEqual((result['customers_created'], result['customers_updated']), (0, 3))
+
+    def test_ingest_customer_data_commits_per_chunk(self):
+        path = self._customer_sheet([(1000 + i, 1400000) for i in range(4)])
+        df = pd.read_excel(path).astype({'monthly_salary': object})
+        df.loc[3, 'monthly_salary'] = 'unknown'
+        df.to_excel(path, index=False)
+
+        result = ingest_customer_data(path, chunk_size=2)
+        self.assertEqual(result['status'], 'error')
+        # The first chunk stays committed; re-running the file upserts it again
+        self.assertEqual(
+            sorted(Customer.objects.filter(customer_id__gte=1000).values_list('customer_id', flat=True)),
+            [1000, 1001]
+        )
+
+    def test_ingest_customer_data_queries_per_chunk(self):
+        path = self._customer_sheet([(1000 + i, 1400000) for i in range(10)])
+        # Per chunk of 5: existing-id lookup and the upsert inside the chunk's
+        # savepoint pair; new customers need no profile refresh
+        with self.assertNumQueries(2 * 4):
+            result = ingest_customer_data(path, chunk_size=5)
+        self.assertEqual(result['customers_created'], 10)
+
+
+class CreditScoreCacheTest(TestCase):
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.customer = Customer.objects.create(
+                first_name="John",
+                last_name="Doe",
+                age=30,
+                phone_number=9876543210,
+                monthly_income=50000,
+                approved_limit=1800000,
+                current_debt=0
+            )
+
+    def _create_loan(self, **kwargs):
+        data = {
+            'customer': self.customer,
+            'loan_amount': 100000,
+            'tenure': 12,
+            'interest_rate': 10.5,
+            'monthly_installment': 8791.59,
+            'emis_paid_on_time': 12,
+            'start_date': date.today().replace(year=date.today().year - 1),
+            'end_date': date.today().replace(year=date.today().year - 1, month=12),
+            'status': 'completed',
+        }
+        data.update(kwargs)
+        # Run commit hooks so the customer is no longer dirty for this thread
+        with self.captureOnCommitCallbacks(execute=True):
+            return Loan.objects.create(**data)
+
+    def test_cache_hit_skips_database(self):
+        self._create_loan()
+        first = CreditScoreService.calculate_credit_score(self.customer.customer_id)
+
+        with self.assertNumQueries(0):
+            second = CreditScoreService.calculate_credit_score(self.customer.customer_id)
+        self.assertEqual(first, second)
+
+    def test_loan_write_invalidates(self):
+        self._create_loan()
+        before = CreditScoreService.calculate_credit_score(self.customer.customer_id)
+
+        self._create_loan()
+        after = CreditScoreService.calculate_credit_score(self.customer.customer_id)
+        self.assertGreater(after, before)
+
+    def test_customer_write_invalidates(self):
+        self._create_loan(status='active', start_date=date.today())
+        self.assertGreater(CreditScoreService.calculate_credit_score(self.customer.customer_id), 0)
+
+        self.customer.approved_limit = 50000
+        with self.captureOnCommitCallbacks(execute=True):
+            self.customer.save()
+        self.assertEqual(CreditScoreService.calculate_credit_score(self.customer.customer_id), 0)
+
+    def test_profile_rebuild_invalidates(self):
+        loan = self._create_loan(status='active', start_date=date.today())
+        self.assertEqual(
+            CreditScoreService.get_credit_state(self.customer.customer_id)['active_emi_total'],
+            Decimal('8791.59')
+        )
+        # Bypass signals so the profile drifts, then repair it
+        Loan.objects.filter(pk=loan.pk).update(monthly_installment=30000)
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('check_credit_profiles', '--fix', stdout=StringIO())
+        self.assertEqual(
+            CreditScoreService.get_credit_state(self.customer.customer_id)['active_emi_total'],
+            Decimal('30000')
+        )
+
+        Loan.objects.filter(pk=loan.pk).update(monthly_installment=1000)
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('rebuild_credit_profiles', stdout=StringIO())
+        self.assertEqual(
+            CreditScoreService.get_credit_state(self.customer.customer_id)['active_emi_total'],
+            Decimal('1000')
+        )
+
+    def test_uncommitted_writes_bypass_cache(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            Loan.objects.create(
+                customer=self.customer, loan_amount=100000, tenure=12, interest_rate=10.5,
+                monthly_installment=8791.59, start_date=date.today(),
+                end_date=date.today().replace(year=date.today().year + 1), status='active'
+            )
+            bypasses = CreditScoreService.cache_stats()['bypasses']
+            CreditScoreService.calculate_credit_score(self.customer.customer_id)
+            self.assertEqual(CreditScoreService.cache_stats()['bypasses'], bypasses + 1)
+
+    def test_rolled_back_writes_stop_bypassing(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            Loan.objects.create(
+                customer=self.customer, loan_amount=100000, tenure=12, interest_rate=10.5,
+                monthly_installment=8791.59, start_date=date.today(),
+                end_date=date.today().replace(year=date.today().year + 1), status='active'
+            )
+            self.assertIn(f'customer-loans:{self.customer.customer_id}', _dirty_names())
+            raise RuntimeError
+        self.assertEqual(_dirty_names(), set())
+
+        bypasses = CreditScoreService.cache_stats()['bypasses']
+        CreditScoreService.calculate_credit_score(self.customer.customer_id)
+        with self.assertNumQueries(0):
+            CreditScoreService.calculate_credit_score(self.customer.customer_id)
+        self.assertEqual(CreditScoreService.cache_stats()['bypasses'], bypasses)
+
+    def test_year_rollover(self):
+        self._create_loan(start_date=date.today())
+        this_year = CreditScoreService.calculate_credit_score(self.customer.customer_id)
+
+        class NextYear(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return datetime.now(tz).replace(year=datetime.now(tz).year + 1, month=1, day=1)
+
+        with mock.patch('loans.services.datetime', NextYear), \
+                mock.patch('loans.models.datetime', NextYear):
+            next_year = CreditScoreService.calculate_credit_score(self.customer.customer_id)
+        self.assertEqual(this_year - next_year, 15 * 0.25)
+
+    def test_lru_eviction_counter(self):
+        lru = LRUCache(maxsize=2)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual(lru.get('a'), 1)
+        self.assertEqual(lru.stats(), {
+            'size': 2, 'max_entries': 2, 'hits': 2, 'misses': 1, 'evictions': 1,
+        })
+
+    def test_lru_entries_expire(self):
+        lru = LRUCache(maxsize=2, timeout=60)
+        with mock.patch('loans.cache.time.monotonic', return_value=1000):
+            lru.set('a', 1)
+        with mock.patch('loans.cache.time.monotonic', return_value=1059):
+            self.assertEqual(lru.get('a'), 1)
+        with mock.patch('loans.cache.time.monotonic', return_value=1060):
+            self.assertIsNone(lru.get('a'))
+        self.assertEqual(len(lru), 0)
+        self.assertEqual(lru.stats()['misses'], 1)
+
+
+class BulkScoringEngineTest(TestCase):
+    def _random_portfolio(self, rng, customers=60):
+        this_year = date.today().year
+        amounts = [50000, 100000, 250000, 333333.33, 500000, 1000000, 1500000, 2500000]
+        for i in range(customers):
+            customer = Customer.objects.create(
+                first_name="Customer", last_name=str(i), age=30,
+                phone_number=9000000000 + i, monthly_income=50000,
+                approved_limit=rng.choice([0, 500000, 1000000, 1800000, 5000000]),
+            )
+            loans = []
+            for _ in range(rng.choice([0, 1, 2, 3, 4, 7])):
+                tenure = rng.choice([6, 12, 24])
+                loans.append(Loan(
+                    customer=customer,
+                    loan_amount=Decimal(str(rng.choice(amounts))),
+                    tenure=tenure,
+                    interest_rate=Decimal('10.50'),
+                    monthly_installment=Decimal(str(rng.choice([999.99, 8791.59, 20000]))),
+                    emis_paid_on_time=rng.choice([0, tenure - 1, tenure, tenure + 1]),
+                    start_date=date(rng.choice([this_year, this_year - 1, this_year - 3]), 1, 15),
+                    end_date=date(this_year + 1, 1, 15),
+                    status=rng.choice(['active', 'completed', 'defaulted']),
+                ))
+            # bulk_create skips signals, so no profiles exist until the engine runs
+            Loan.objects.bulk_create(loans)
+
+    def test_matches_scalar_service(self):
+        for seed in range(5):
+            rng = random.Random(seed)
+            Customer.objects.all().delete()
+            self._random_portfolio(rng)
+
+            summary = BulkScoringEngine(chunk_size=7).run()
+            self.assertEqual(summary['customers_scored'], 60)
+
+            profiles = CustomerCreditProfile.objects.in_bulk()
+            for customer_id, profile in profiles.items():
+                state = CreditScoreService._get_loan_aggregates(customer_id)
+                self.assertEqual(
+                    profile.credit_score, CreditScoreService.score_from_state(state),
+                    f'seed={seed} customer={customer_id}'
+                )
+            self.assertEqual(CreditProfileService.find_drift(), [])
+
+    def test_windows_are_scored_under_customer_locks(self):
+        self._random_portfolio(random.Random(1), customers=4)
+        ids = sorted(Customer.objects.values_list('customer_id', flat=True))
+        run_serialized = LoanOriginationService.run_serialized
+
+        def create_loan_then_lock(customer_ids, func):
+            # A loan created after the window was listed, before it is scored
+            Loan.objects.create(
+                customer_id=customer_ids[0], loan_amount=100000, tenure=12, interest_rate=10.5,
+                monthly_installment=8791.59, start_date=date.today(),
+                end_date=date.today().replace(year=date.today().year + 1), status='active'
+            )
+            return run_serialized(customer_ids, func)
+
+        with mock.patch.object(
+            LoanOriginationService, 'run_serialized', side_effect=create_loan_then_lock
+        ) as locked:
+            BulkScoringEngine(chunk_size=2).run()
+        self.assertEqual([call.args[0] for call in locked.call_args_list], [ids[:2], ids[2:]])
+        self.assertEqual(CreditProfileService.find_drift(), [])
+
+    def test_customer_id_range(self):
+        self._random_portfolio(random.Random(0), customers=10)
+        ids = sorted(Customer.objects.values_list('customer_id', flat=True))
+
+        result = rescore_customers(start_id=ids[2], end_id=ids[5], chunk_size=2)
+        self.assertEqual(result['status'], 'success')
+        self.assertEqual(result['customers_scored'], 4)
+        self.assertEqual(
+            sorted(CustomerCreditProfile.objects.values_list('customer_id', flat=True)),
+            ids[2:6]
+        )
+
+
 class APITest(APITestCase):
     def setUp(self):
         self.customer = Customer.objects.create(
@@ -227,6 +868,41 @@ class APITest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertTrue(response.data['loan_approved'])
 
+    def test_create_loan_query_budget(self):
+        # Customer row and loan aggregates are loaded once per request, so the
+        # budget does not grow with the customer's loan history
+        url = reverse('create_loan')
+        data = {
+            'customer_id': self.customer.customer_id,
+            'loan_amount': 100000,
+            'interest_rate': 16.5,
+            'tenure': 12
+        }
+        for history in (1, 10):
+            with self.captureOnCommitCallbacks(execute=True):
+                Loan.objects.bulk_create([
+                    Loan(
+                        customer=self.customer,
+                        loan_amount=10000,
+                        tenure=12,
+                        interest_rate=10.5,
+                        monthly_installment=879.16,
+                        emis_paid_on_time=12,
+                        start_date=date.today().replace(year=date.today().year - 1),
+                        end_date=date.today(),
+                        status='completed'
+                    )
+                    for _ in range(history)
+                ])
+                CreditProfileService.refresh_profiles([self.customer.customer_id])
+
+            # context read; savepoint, customer row lock and uncached state
+            # re-check; loan insert savepoint, insert, two aggregate reads and
+            # the profile upsert from the post_save signal; two releases
+            with self.assertNumQueries(11):
+                response = self.client.post(url, data, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
     def test_view_loan(self):
         loan = Loan.objects.create(
             customer=self.customer,
@@ -262,3 +938,1594 @@ class APITest(APITestCase):
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data), 2)
+
+
+# Only row locks serialize the writers; SQLite merely serializes every write,
+# which passes by way of its global lock and lock-conflict retries
+@skipUnlessDBFeature('has_select_for_update')
+class ConcurrentLoanCreationTest(TransactionTestCase):
+    def setUp(self):
+        self.customer = self._customer(9000000300)
+        self.other = self._customer(9000000301)
+
+    def _customer(self, phone_number):
+        # Cap: active EMIs may not exceed 10000; each test loan adds 9096.76
+        customer = Customer.objects.create(
+            first_name="Parallel", last_name="Borrower", age=35, phone_number=phone_number,
+            monthly_income=20000, approved_limit=5000000, current_debt=0
+        )
+        for _ in range(2):
+            Loan.objects.create(
+                customer=customer, loan_amount=100000, tenure=12, interest_rate=10.5,
+                monthly_installment=8791.59, emis_paid_on_time=12,
+                start_date=date.today().replace(year=date.today().year - 1),
+                end_date=date.today(), status='completed'
+            )
+        return customer
+
+    def _originate_in_parallel(self, customer_ids):
+        barrier = threading.Barrier(len(customer_ids))
+        outcomes = []
+
+        def worker(customer_id):
+            try:
+                barrier.wait()
+                _, loan = LoanOriginationService.originate(customer_id, 100000, 16.5, 12)
+                outcomes.append((customer_id, loan is not None))
+            except Exception as e:
+                outcomes.append((customer_id, e))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(customer_id,)) for customer_id in customer_ids]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return outcomes
+
+    def test_parallel_creates_respect_emi_cap(self):
+        requests = [self.customer.customer_id] * 8 + [self.other.customer_id] * 8
+        load_state = CreditScoreService.get_credit_state
+
+        def slow_state(*args, **kwargs):
+            # Widen the window between the EMI check and the insert
+            state = load_state(*args, **kwargs)
+            time.sleep(0.01)
+            return state
+
+        with mock.patch.object(CreditScoreService, 'get_credit_state', side_effect=slow_state):
+            outcomes = self._originate_in_parallel(requests)
+
+        self.assertEqual([o for o in outcomes if not isinstance(o[1], bool)], [])
+        for customer in (self.customer, self.other):
+            approved = sum(1 for customer_id, ok in outcomes if customer_id == customer.customer_id and ok)
+            # Serially: approve at 0 and 9096.76 active EMIs, reject from 18193.52
+            self.assertEqual(approved, 2)
+            self.assertEqual(customer.loans.filter(status='active').count(), 2)
+
+
+class BatchRegistrationAPITest(APITestCase):
+    def _item(self, i, monthly_income=50000):
+        return {
+            'first_name': 'Campaign',
+            'last_name': str(i),
+            'age': 25 + i % 40,
+            'monthly_income': monthly_income,
+            'phone_number': 8000000000 + i
+        }
+
+    def test_batch_matches_single_endpoint(self):
+        # Includes incomes whose limit lands exactly on a half lakh
+        incomes = [50000, 12500, 37500, 1, 250000, 62500]
+        items = [self._item(i, income) for i, income in enumerate(incomes)]
+        response = self.client.post(reverse('register_customer_batch'), {'requests': items}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['succeeded'], len(items))
+
+        for i, (item, result) in enumerate(zip(items, response.data['results'])):
+            single = self.client.post(
+                reverse('register_customer'), {**item, 'phone_number': 8100000000 + i}, format='json'
+            )
+            customer = Customer.objects.get(customer_id=result['result']['customer_id'])
+            self.assertEqual(result['result']['phone_number'], customer.phone_number)
+            self.assertEqual(result['result']['approved_limit'], single.data['approved_limit'])
+            self.assertEqual(customer.approved_limit, customer.calculate_approved_limit())
+
+    def test_duplicates_within_batch_and_database(self):
+        self.client.post(reverse('register_customer'), self._item(0), format='json')
+        items = [self._item(0), self._item(1), self._item(1), {'first_name': 'Incomplete'}]
+        response = self.client.post(reverse('register_customer_batch'), {'requests': items}, format='json')
+
+        results = response.data['results']
+        self.assertEqual([result['success'] for result in results], [False, True, False, False])
+        self.assertEqual(results[0]['errors'], {
+            'phone_number': ['customer with this phone number already exists.']
+        })
+        self.assertIn('index 1', results[2]['errors']['phone_number'][0])
+        self.assertIn('monthly_income', results[3]['errors'])
+        self.assertEqual(Customer.objects.count(), 2)
+
+    def test_query_count_independent_of_batch_size(self):
+        def run(size, offset):
+            items = [self._item(offset + i) for i in range(size)]
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(
+                    reverse('register_customer_batch'), {'requests': items}, format='json'
+                )
+            self.assertEqual(response.data['succeeded'], size)
+            return len(queries)
+
+        # Phone lookup plus one INSERT per batch (SQLite's parameter limit caps
+        # batches at 111 rows here)
+        self.assertEqual(run(10, 0), run(100, 100))
+
+    def test_fast_validation_matches_serializer(self):
+        serializer = RegisterCustomerItemSerializer()
+        fast_validate = compile_item_validator(serializer)
+        items = [
+            self._item(1),
+            {**self._item(2), 'first_name': '  Padded '},
+            {**self._item(3), 'age': '30'},
+            {**self._item(4), 'age': 17},
+            {**self._item(5), 'last_name': 'x' * 101},
+            {**self._item(6), 'monthly_income': True},
+        ]
+        for item in items:
+            fast = fast_validate(item)
+            if fast is None:
+                continue
+            self.assertEqual(fast, dict(serializer.run_validation(item)))
+        self.assertEqual([fast_validate(item) is None for item in items],
+                         [False, False, True, True, True, True])
+
+    def test_fast_validation_rejects_whatever_the_serializer_rejects(self):
+        serializer = RegisterCustomerItemSerializer()
+        fast_validate = compile_item_validator(serializer)
+        text = [None, '', '   ', 'x' * 101, 42, 4.2, True, ['John'], {'a': 1}]
+        number = [None, '', '30', 30.0, 30.5, True, 'thirty', [30], 2 ** 31, -2 ** 31 - 1]
+        invalid = {
+            'first_name': text,
+            'last_name': text,
+            'age': number + [17, 101],
+            'monthly_income': number,
+            'phone_number': number[:-2] + [2 ** 63],
+        }
+        self.assertEqual(set(invalid), {
+            name for name, field in serializer.fields.items() if not field.read_only
+        })
+        for name, values in invalid.items():
+            for value in values + ['<missing>']:
+                item = self._item(7)
+                if value == '<missing>':
+                    del item[name]
+                else:
+                    item[name] = value
+                with self.subTest(field=name, value=value):
+                    try:
+                        expected = dict(serializer.run_validation(item))
+                    except serializers.ValidationError:
+                        expected = None
+                    fast = fast_validate(item)
+                    # The fast path may defer to DRF, but never accepts what it rejects
+                    self.assertIn(fast, (None, expected))
+                    if expected is None:
+                        self.assertIsNone(fast)
+
+    def test_fast_validation_defers_context_validators(self):
+        # The plain serializer checks phone numbers with a UniqueValidator
+        self.assertIsNone(compile_item_validator(RegisterCustomerSerializer()))
+
+    def test_approved_limits_match_round(self):
+        incomes = list(range(0, 200000, 125)) + [13888, 41666, 69444]
+        self.assertEqual(
+            CustomerRegistrationService.approved_limits(incomes).tolist(),
+            [round((36 * income) / 100000) * 100000 for income in incomes]
+        )
+
+
+class BatchEligibilityAPITest(APITestCase):
+    def setUp(self):
+        self.customers = []
+        for i in range(4):
+            customer = Customer.objects.create(
+                first_name="Customer",
+                last_name=str(i),
+                age=30,
+                phone_number=9876543210 + i,
+                monthly_income=50000,
+                approved_limit=1800000,
+                current_debt=0
+            )
+            for j in range(i):
+                Loan.objects.create(
+                    customer=customer,
+                    loan_amount=100000,
+                    tenure=12,
+                    interest_rate=10.5,
+                    monthly_installment=8791.59,
+                    emis_paid_on_time=12,
+                    start_date=date.today().replace(year=date.today().year - 1),
+                    end_date=date.today().replace(year=date.today().year - 1, month=12),
+                    status='completed'
+                )
+            self.customers.append(customer)
+
+    def test_batch_matches_single_endpoint(self):
+        items = [
+            {'customer_id': customer.customer_id, 'loan_amount': 100000,
+             'interest_rate': rate, 'tenure': 12}
+            for customer in self.customers for rate in (8, 14.5)
+        ]
+        response = self.client.post(
+            reverse('check_eligibility_batch'), {'requests': items}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['succeeded'], len(items))
+
+        for item, batch_result in zip(items, response.data['results']):
+            single = self.client.post(reverse('check_eligibility'), item, format='json')
+            self.assertTrue(batch_result['success'])
+            self.assertEqual(batch_result['result'], single.data)
+
+    def test_partial_failures_reported_in_order(self):
+        items = [
+            {'customer_id': self.customers[2].customer_id, 'loan_amount': 100000,
+             'interest_rate': 10, 'tenure': 12},
+            {'customer_id': 999, 'loan_amount': 100000, 'interest_rate': 10, 'tenure': 12},
+            {'customer_id': self.customers[1].customer_id, 'loan_amount': 100000,
+             'interest_rate': 10, 'tenure': 500},
+        ]
+        response = self.client.post(
+            reverse('check_eligibility_batch'), {'requests': items}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data['results']
+        self.assertEqual([result['index'] for result in results], [0, 1, 2])
+        self.assertEqual([result['success'] for result in results], [True, False, False])
+        self.assertIn('customer_id', results[1]['errors'])
+        self.assertIn('tenure', results[2]['errors'])
+        self.assertEqual(response.data['failed'], 2)
+
+    def test_query_count_independent_of_batch_size(self):
+        items = [
+            {'customer_id': customer.customer_id, 'loan_amount': 100000,
+             'interest_rate': 10, 'tenure': 12}
+            for customer in self.customers
+        ] * 25
+        # in_bulk validation, credit profiles, live aggregates for customers without a profile
+        with self.assertNumQueries(3):
+            response = self.client.post(
+                reverse('check_eligibility_batch'), {'requests': items}, format='json'
+            )
+        self.assertEqual(response.data['succeeded'], 100)
+
+    def test_empty_batch_rejected(self):
+        response = self.client.post(
+            reverse('check_eligibility_batch'), {'requests': []}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class BatchLoanCreationAPITest(APITestCase):
+    def setUp(self):
+        # Identical twins: one borrows through the batch, one through /create-loan
+        self.customers = [self._customer(9000000400 + i) for i in range(2)]
+
+    def _customer(self, phone_number):
+        customer = Customer.objects.create(
+            first_name="Partner", last_name="Borrower", age=35, phone_number=phone_number,
+            monthly_income=20000, approved_limit=5000000, current_debt=0
+        )
+        for _ in range(2):
+            Loan.objects.create(
+                customer=customer, loan_amount=100000, tenure=12, interest_rate=10.5,
+                monthly_installment=8791.59, emis_paid_on_time=12,
+                start_date=date.today().replace(year=date.today().year - 1),
+                end_date=date.today(), status='completed'
+            )
+        return customer
+
+    def _items(self, customer):
+        return [
+            {'customer_id': customer.customer_id, 'loan_amount': amount,
+             'interest_rate': rate, 'tenure': tenure}
+            for amount, rate, tenure in [
+                (50000, 8, 12), (100000, 16.5, 12), (20000, 12, 24),
+                (100000, 16.5, 12), (30000, 18, 6),
+            ]
+        ]
+
+    def _without_loan_id(self, decision):
+        return {key: value for key, value in decision.items() if key != 'loan_id'}
+
+    def test_batch_matches_sequential_creates(self):
+        batched, single = self.customers
+        response = self.client.post(
+            reverse('create_loan_batch'), {'requests': self._items(batched)}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        sequential = [
+            self.client.post(reverse('create_loan'), item, format='json').data
+            for item in self._items(single)
+        ]
+        self.assertEqual(
+            [self._without_loan_id(result['result']) for result in response.data['results']],
+            [self._without_loan_id({**decision, 'customer_id': batched.customer_id}) for decision in sequential]
+        )
+        # Approvals earlier in the batch pushed later items over the EMI cap
+        self.assertIn('Total current EMIs exceed 50% of monthly salary',
+                      [result['result']['message'] for result in response.data['results']])
+        self.assertEqual(response.data['approved'], batched.loans.filter(status='active').count())
+        self.assertEqual(
+            batched.credit_profile.active_emi_total,
+            sum(loan.monthly_installment for loan in batched.loans.filter(status='active'))
+        )
+
+    def test_chunks_see_earlier_chunks(self):
+        items = self._items(self.customers[0])
+        with mock.patch.object(LoanOriginationService, 'BATCH_CHUNK_SIZE', 2):
+            chunked = self.client.post(reverse('create_loan_batch'), {'requests': items}, format='json')
+        whole = self.client.post(
+            reverse('create_loan_batch'), {'requests': self._items(self.customers[1])}, format='json'
+        )
+        self.assertEqual(chunked.data['approved'], whole.data['approved'])
+        self.assertEqual(CreditProfileService.find_drift(), [])
+
+    def test_partial_failures_reported_in_order(self):
+        items = self._items(self.customers[0])[:2]
+        items.insert(1, {'customer_id': 999, 'loan_amount': 1000, 'interest_rate': 10, 'tenure': 12})
+        response = self.client.post(reverse('create_loan_batch'), {'requests': items}, format='json')
+
+        results = response.data['results']
+        self.assertEqual([result['success'] for result in results], [True, False, True])
+        self.assertIn('customer_id', results[1]['errors'])
+        self.assertTrue(results[0]['result']['loan_approved'])
+        self.assertEqual(response.data['failed'], 1)
+
+    def test_query_count_independent_of_batch_size(self):
+        def run(copies):
+            items = [
+                {'customer_id': customer.customer_id, 'loan_amount': 1000,
+                 'interest_rate': 16.5, 'tenure': 12}
+                for customer in self.customers
+            ] * copies
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(reverse('create_loan_batch'), {'requests': items}, format='json')
+            self.assertEqual(response.data['succeeded'], len(items))
+            return len(queries)
+
+        # Kept under SQLite's bound-parameter limit, which splits larger inserts
+        self.assertEqual(run(5), run(25))
+
+
+class QuoteMatrixAPITest(APITestCase):
+    def setUp(self):
+        self.customer = Customer.objects.create(
+            first_name="John",
+            last_name="Doe",
+            age=30,
+            phone_number=9876543210,
+            monthly_income=50000,
+            approved_limit=1800000,
+            current_debt=0
+        )
+        for i in range(2):
+            Loan.objects.create(
+                customer=self.customer,
+                loan_amount=100000,
+                tenure=12,
+                interest_rate=10.5,
+                monthly_installment=8791.59,
+                emis_paid_on_time=12,
+                start_date=date.today().replace(year=date.today().year - 1),
+                end_date=date.today().replace(year=date.today().year - 1, month=12),
+                status='completed'
+            )
+
+    def test_quotes_match_scalar_eligibility(self):
+        # Approved on score; no loan history (rejected on score); over the EMI cap
+        no_history = Customer.objects.create(
+            first_name="New", last_name="Borrower", age=30, phone_number=9876543211,
+            monthly_income=50000, approved_limit=1800000, current_debt=0
+        )
+        capped = Customer.objects.create(
+            first_name="Capped", last_name="Borrower", age=30, phone_number=9876543212,
+            monthly_income=10000, approved_limit=1800000, current_debt=0
+        )
+        Loan.objects.create(
+            customer=capped, loan_amount=100000, tenure=12, interest_rate=10.5,
+            monthly_installment=8791.59, start_date=date.today(),
+            end_date=date.today().replace(year=date.today().year + 1), status='active'
+        )
+
+        for customer in (self.customer, no_history, capped):
+            data = {
+                'customer_id': customer.customer_id,
+                'loan_amounts': [50000, 123456.78, 1000000],
+                'tenures': [1, 7, 12, 60, 120],
+                'interest_rates': [0, 8.5, 16, 17.25],
+            }
+            response = self.client.post(reverse('quote_matrix'), data, format='json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data['shape'], [3, 5, 4])
+            self.assertEqual(len(response.data['quotes']), 60)
+
+            for quote in response.data['quotes']:
+                expected = LoanEligibilityService.check_eligibility(
+                    customer.customer_id, quote['loan_amount'],
+                    quote['interest_rate'], quote['tenure']
+                )
+                self.assertEqual(quote['approval'], expected['approval'])
+                self.assertEqual(quote['corrected_interest_rate'], expected['corrected_interest_rate'])
+                self.assertEqual(
+                    quote['monthly_installment'], round(expected['monthly_installment'], 2), quote
+                )
+
+        no_history_quotes = self.client.post(reverse('quote_matrix'), {
+            'customer_id': no_history.customer_id, 'loan_amounts': [100000],
+            'tenures': [12], 'interest_rates': [10.5],
+        }, format='json').data['quotes']
+        self.assertFalse(no_history_quotes[0]['approval'])
+        self.assertGreater(no_history_quotes[0]['monthly_installment'], 0)
+
+    def test_large_grid(self):
+        data = {
+            'customer_id': self.customer.customer_id,
+            'loan_amounts': list(range(100000, 2100000, 100000)),
+            'tenures': list(range(1, 121, 4)),
+            'interest_rates': [8 + i * 0.5 for i in range(17)],
+        }
+        response = self.client.post(reverse('quote_matrix'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['quotes']), 20 * 30 * 17)
+
+    def test_invalid_requests(self):
+        response = self.client.post(reverse('quote_matrix'), {
+            'customer_id': 999, 'loan_amounts': [1000], 'tenures': [12], 'interest_rates': [10],
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        response = self.client.post(reverse('quote_matrix'), {
+            'customer_id': self.customer.customer_id,
+            'loan_amounts': list(range(1, 201)),
+            'tenures': list(range(1, 121)),
+            'interest_rates': [10],
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class LoanScheduleTest(APITestCase):
+    def setUp(self):
+        self.customer = Customer.objects.create(
+            first_name="John",
+            last_name="Doe",
+            age=30,
+            phone_number=9876543210,
+            monthly_income=50000,
+            approved_limit=1800000,
+            current_debt=0
+        )
+        self.loan = Loan.objects.create(
+            customer=self.customer,
+            loan_amount=100000,
+            tenure=12,
+            interest_rate=10.5,
+            monthly_installment=calculate_emi(100000, 10.5, 12),
+            start_date=date(2024, 1, 31),
+            end_date=date(2025, 1, 31),
+            status='active'
+        )
+
+    def test_schedule_matches_iterative_amortization(self):
+        response = self.client.get(reverse('view_loan_schedule', kwargs={'loan_id': self.loan.loan_id}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        schedule = response.data['schedule']
+        self.assertEqual(len(schedule), 12)
+
+        balance = 100000.0
+        monthly_rate = 10.5 / 100 / 12
+        for row in schedule:
+            interest = balance * monthly_rate
+            principal = min(8814.86 - interest, balance) if row['installment'] < 12 else balance
+            balance -= principal
+            self.assertAlmostEqual(row['interest'], interest, delta=0.01)
+            self.assertAlmostEqual(row['principal'], principal, delta=0.01)
+            self.assertAlmostEqual(row['balance'], balance, delta=0.01)
+        self.assertEqual(schedule[-1]['balance'], 0)
+        self.assertAlmostEqual(sum(row['principal'] for row in schedule), 100000, places=2)
+
+        # Due dates keep the start day, clamped to short months
+        self.assertEqual(schedule[0]['due_date'], '2024-02-29')
+        self.assertEqual(schedule[1]['due_date'], '2024-03-31')
+        self.assertEqual(schedule[2]['due_date'], '2024-04-30')
+
+    def test_zero_rate_schedule(self):
+        loan = Loan.objects.create(
+            customer=self.customer, loan_amount=1200, tenure=7, interest_rate=0,
+            monthly_installment=calculate_emi(1200, 0, 7), start_date=date(2024, 1, 1),
+            end_date=date(2024, 8, 1), status='active'
+        )
+        schedule = build_schedule(loan)['schedule']
+        self.assertEqual([row['interest'] for row in schedule], [0.0] * 7)
+        self.assertEqual(schedule[-1]['balance'], 0)
+        self.assertAlmostEqual(sum(row['principal'] for row in schedule), 1200, places=2)
+
+    def test_missing_loan(self):
+        response = self.client.get(reverse('view_loan_schedule', kwargs={'loan_id': 999}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_export_matches_single_schedule(self):
+        Loan.objects.create(
+            customer=self.customer, loan_amount=250000, tenure=24, interest_rate=14,
+            monthly_installment=calculate_emi(250000, 14, 24), start_date=date(2024, 3, 15),
+            end_date=date(2026, 3, 15), status='active'
+        )
+        response = self.client.get(reverse('export_schedules'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], ','.join(SCHEDULE_COLUMNS))
+        self.assertEqual(len(lines), 1 + 12 + 24)
+
+        expected = build_schedule(self.loan)['schedule'][0]
+        self.assertEqual(lines[1].split(','), [
+            str(self.loan.loan_id), '1', expected['due_date'], f"{expected['payment']:.2f}",
+            f"{expected['principal']:.2f}", f"{expected['interest']:.2f}", f"{expected['balance']:.2f}",
+        ])
+
+
+    def test_export_command_writes_to_its_stdout(self):
+        stdout = StringIO()
+        call_command('export_schedules', '--chunk-size', '1', stdout=stdout)
+        response = self.client.get(reverse('export_schedules'))
+        self.assertEqual(stdout.getvalue(), b''.join(response.streaming_content).decode())
+        self.assertFalse(stdout.closed)
+
+class LoanApplicationAPITest(APITestCase):
+    def setUp(self):
+        self.customer = Customer.objects.create(
+            first_name="Async", last_name="Applicant", age=35, phone_number=9000000100,
+            monthly_income=80000, approved_limit=2900000, current_debt=0
+        )
+        for _ in range(2):
+            Loan.objects.create(
+                customer=self.customer, loan_amount=100000, tenure=12, interest_rate=10.5,
+                monthly_installment=8791.59, emis_paid_on_time=12,
+                start_date=date.today().replace(year=date.today().year - 1),
+                end_date=date.today(), status='completed'
+            )
+        self.data = {
+            'customer_id': self.customer.customer_id,
+            'loan_amount': 100000,
+            'interest_rate': 16.5,
+            'tenure': 12
+        }
+
+    def test_async_create_loan_queues_application(self):
+        with mock.patch('loans.views.process_loan_application.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(reverse('create_loan_async'), self.data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        application_id = response.data['application_id']
+        delay.assert_called_once_with(application_id)
+        self.assertEqual(response.data['status'], 'pending')
+        self.assertFalse(Loan.objects.filter(status='active').exists())
+
+        status_response = self.client.get(response.data['status_url'])
+        self.assertEqual(status_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(status_response.data['status'], 'pending')
+        self.assertIsNone(status_response.data['loan_approved'])
+
+        # The worker creates the loan; polling then reports the outcome
+        result = process_loan_application(application_id)
+        self.assertEqual(result['status'], 'success')
+        status_response = self.client.get(response.data['status_url'])
+        self.assertEqual(status_response.data['status'], 'approved')
+        self.assertTrue(status_response.data['loan_approved'])
+        loan = Loan.objects.get(loan_id=status_response.data['loan_id'])
+        self.assertEqual(loan.monthly_installment, calculate_emi(100000, 16.5, 12))
+
+        # Redelivery of the same task does not originate a second loan
+        self.assertEqual(process_loan_application(application_id)['status'], 'error')
+        self.assertEqual(Loan.objects.filter(status='active').count(), 1)
+
+    def test_queueing_failure_fails_the_application(self):
+        with mock.patch(
+            'loans.views.process_loan_application.delay', side_effect=ConnectionError('broker down')
+        ):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(reverse('create_loan_async'), self.data, format='json')
+
+        # Inside the test transaction the queueing runs after the response;
+        # in autocommit it runs first and the response is a 503
+        status_response = self.client.get(response.data['status_url'])
+        self.assertEqual(status_response.data['status'], 'failed')
+        application = LoanApplication.objects.get(application_id=response.data['application_id'])
+        self.assertEqual(application.message, 'Failed to queue loan application: broker down')
+
+    def test_worker_dying_after_the_claim_leaves_it_pending(self):
+        application = LoanApplication.objects.create(
+            customer=self.customer, loan_amount=100000, interest_rate=16.5, tenure=12
+        )
+        # SystemExit is not caught by the task, like a worker being killed
+        with mock.patch.object(
+            LoanOriginationService, '_create_if_eligible', side_effect=SystemExit
+        ), self.assertRaises(SystemExit):
+            process_loan_application(application.application_id)
+
+        application.refresh_from_db()
+        self.assertEqual(application.status, 'pending')
+        self.assertFalse(Loan.objects.filter(status='active').exists())
+
+        # The redelivered task processes it
+        result = process_loan_application(application.application_id)
+        self.assertEqual(result['application_status'], 'approved')
+
+    def test_async_rejection_is_recorded(self):
+        Loan.objects.create(
+            customer=self.customer, loan_amount=1000000, tenure=12, interest_rate=10.5,
+            monthly_installment=87915.89, start_date=date.today(),
+            end_date=date.today().replace(year=date.today().year + 1), status='active'
+        )
+        application = LoanApplication.objects.create(
+            customer=self.customer, loan_amount=100000, interest_rate=16.5, tenure=12
+        )
+        process_loan_application(application.application_id)
+
+        application.refresh_from_db()
+        self.assertEqual(application.status, 'rejected')
+        self.assertIsNone(application.loan)
+        self.assertEqual(application.message, 'Total current EMIs exceed 50% of monthly salary')
+
+    def test_async_create_loan_validates_customer(self):
+        self.data['customer_id'] = 999
+        response = self.client.post(reverse('create_loan_async'), self.data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(LoanApplication.objects.exists())
+
+    def test_missing_application(self):
+        response = self.client.get(reverse('view_loan_application', kwargs={'application_id': 999}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class LoanApplicationQueueingTest(TransactionTestCase):
+    def test_queueing_failure_is_reported(self):
+        customer = Customer.objects.create(
+            first_name="Async", last_name="Applicant", age=35, phone_number=9000000110,
+            monthly_income=80000, approved_limit=2900000, current_debt=0
+        )
+        data = {'customer_id': customer.customer_id, 'loan_amount': 100000, 'interest_rate': 16.5, 'tenure': 12}
+        with mock.patch(
+            'loans.views.process_loan_application.delay', side_effect=ConnectionError('broker down')
+        ):
+            response = self.client.post(reverse('create_loan_async'), data, content_type='application/json')
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response.json()['status'], 'failed')
+        application = LoanApplication.objects.get(application_id=response.json()['application_id'])
+        self.assertEqual(application.status, 'failed')
+
+
+class IdempotencyKeyTest(APITestCase):
+    def setUp(self):
+        self.register_data = {
+            'first_name': 'Retry',
+            'last_name': 'Client',
+            'age': 40,
+            'monthly_income': 60000,
+            'phone_number': 9000000200
+        }
+
+    def test_register_replays_stored_response(self):
+        url = reverse('register_customer')
+        first = self.client.post(url, self.register_data, format='json', HTTP_IDEMPOTENCY_KEY='reg-1')
+        second = self.client.post(url, self.register_data, format='json', HTTP_IDEMPOTENCY_KEY='reg-1')
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(Customer.objects.count(), 1)
+
+    def test_create_loan_is_not_recomputed(self):
+        customer = Customer.objects.create(
+            first_name="Retry", last_name="Borrower", age=35, phone_number=9000000201,
+            monthly_income=80000, approved_limit=2900000, current_debt=0
+        )
+        for _ in range(2):
+            Loan.objects.create(
+                customer=customer, loan_amount=100000, tenure=12, interest_rate=10.5,
+                monthly_installment=8791.59, emis_paid_on_time=12,
+                start_date=date.today().replace(year=date.today().year - 1),
+                end_date=date.today(), status='completed'
+            )
+        url = reverse('create_loan')
+        data = {'customer_id': customer.customer_id, 'loan_amount': 50000, 'interest_rate': 16.5, 'tenure': 12}
+
+        with mock.patch.object(
+            LoanEligibilityService, 'check_eligibility', wraps=LoanEligibilityService.check_eligibility
+        ) as check:
+            responses = [
+                self.client.post(url, data, format='json', HTTP_IDEMPOTENCY_KEY='loan-1')
+                for _ in range(3)
+            ]
+
+        self.assertEqual(check.call_count, 1)
+        self.assertEqual({response.content for response in responses}, {responses[0].content})
+        self.assertEqual(responses[0].status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Loan.objects.filter(customer=customer, status='active').count(), 1)
+
+    def test_key_reused_with_different_body(self):
+        url = reverse('register_customer')
+        self.client.post(url, self.register_data, format='json', HTTP_IDEMPOTENCY_KEY='reg-2')
+        self.register_data['phone_number'] = 9000000202
+        response = self.client.post(url, self.register_data, format='json', HTTP_IDEMPOTENCY_KEY='reg-2')
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Customer.objects.count(), 1)
+
+    def test_duplicate_of_in_flight_request(self):
+        IdempotencyKey.objects.create(
+            scope='register', key='reg-3', request_hash=request_fingerprint(self.register_data),
+            expires_at=timezone.now() + timedelta(hours=1)
+        )
+        with self.settings(IDEMPOTENCY_KEYS={'WAIT_TIMEOUT': 0}):
+            response = self.client.post(
+                reverse('register_customer'), self.register_data, format='json', HTTP_IDEMPOTENCY_KEY='reg-3'
+            )
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(Customer.objects.exists())
+
+    def test_abandoned_claims_are_reclaimed_after_the_lease(self):
+        record = IdempotencyKey.objects.create(
+            scope='register', key='reg-6', request_hash=request_fingerprint(self.register_data),
+            expires_at=timezone.now() + timedelta(hours=1)
+        )
+        IdempotencyKey.objects.filter(pk=record.pk).update(created_at=timezone.now() - timedelta(seconds=61))
+
+        url = reverse('register_customer')
+        with self.settings(IDEMPOTENCY_KEYS={'WAIT_TIMEOUT': 0, 'LEASE': 60}):
+            response = self.client.post(url, self.register_data, format='json', HTTP_IDEMPOTENCY_KEY='reg-6')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            replayed = self.client.post(url, self.register_data, format='json', HTTP_IDEMPOTENCY_KEY='reg-6')
+        self.assertEqual(replayed['Idempotent-Replayed'], 'true')
+        self.assertEqual(Customer.objects.count(), 1)
+
+    def test_expired_keys_are_reclaimed_and_purged(self):
+        IdempotencyKey.objects.create(
+            scope='register', key='reg-4', request_hash='stale', status='completed',
+            response_status=201, response_body={}, expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        response = self.client.post(
+            reverse('register_customer'), self.register_data, format='json', HTTP_IDEMPOTENCY_KEY='reg-4'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Customer.objects.count(), 1)
+
+        IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(purge_expired(), 1)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_server_errors_release_the_key(self):
+        url = reverse('register_customer')
+        with mock.patch.object(RegisterCustomerSerializer, 'save', side_effect=RuntimeError('db down')):
+            failed = self.client.post(url, self.register_data, format='json', HTTP_IDEMPOTENCY_KEY='reg-5')
+        self.assertEqual(failed.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        retried = self.client.post(url, self.register_data, format='json', HTTP_IDEMPOTENCY_KEY='reg-5')
+        self.assertEqual(retried.status_code, status.HTTP_201_CREATED)
+
+
+class FastReadPathTest(APITestCase):
+    def setUp(self):
+        self.customer = Customer.objects.create(
+            first_name="Zoë",
+            last_name="O\u2028Brien",
+            age=30,
+            phone_number=9876543210,
+            monthly_income=50000,
+            approved_limit=1800000,
+            current_debt=0
+        )
+        for tenure, paid, loan_status in [(12, 3, 'active'), (24, 30, 'active'), (6, 2, 'completed')]:
+            Loan.objects.create(
+                customer=self.customer,
+                loan_amount=Decimal('123456.70'),
+                tenure=tenure,
+                interest_rate=Decimal('10.05'),
+                monthly_installment=calculate_emi(123456.70, 10.05, tenure),
+                emis_paid_on_time=paid,
+                start_date=date(2024, 1, 1),
+                end_date=date(2025, 1, 1),
+                status=loan_status
+            )
+
+    def test_view_loan_bytes_match_serializer(self):
+        loan = Loan.objects.first()
+        response = self.client.get(reverse('view_loan', kwargs={'loan_id': loan.loan_id}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.content, JSONRenderer().render(LoanDetailSerializer(loan).data))
+        self.assertIn(b'\\u2028', response.content)
+
+    def test_view_customer_loans_bytes_match_serializer(self):
+        loans = Loan.objects.filter(customer=self.customer).order_by('pk')
+        response = self.client.get(
+            reverse('view_customer_loans', kwargs={'customer_id': self.customer.customer_id})
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        expected = CustomerLoanListSerializer(loans, many=True).data
+        self.assertEqual(response.content, JSONRenderer().render(expected))
+        self.assertEqual([row['repayments_left'] for row in response.json()], [9, 0, 0])
+
+    def test_missing_records_keep_existing_errors(self):
+        response = self.client.get(reverse('view_loan', kwargs={'loan_id': 999}))
+        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        self.assertIn('No Loan matches the given query.', response.json()['error'])
+
+        response = self.client.get(reverse('view_customer_loans', kwargs={'customer_id': 999}))
+        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    def test_renderer_matches_json_renderer(self):
+        data = {'name': 'Zoë \u2029', 'values': [1, 2.5, None, True], 'nested': {'amount': '10.00'}}
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        # Types orjson cannot encode fall back to the DRF encoder
+        data = {'amount': Decimal('1.50')}
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+
+class CustomerLoanPaginationTest(APITestCase):
+    def setUp(self):
+        self.customer = Customer.objects.create(
+            first_name="John",
+            last_name="Doe",
+            age=30,
+            phone_number=9876543210,
+            monthly_income=50000,
+            approved_limit=1800000,
+            current_debt=0
+        )
+        Loan.objects.bulk_create([
+            Loan(
+                customer=self.customer,
+                loan_amount=Decimal(10000 + i),
+                tenure=12,
+                interest_rate=Decimal('10.50'),
+                monthly_installment=Decimal('881.50'),
+                emis_paid_on_time=i,
+                start_date=date(2024, 1, 1),
+                end_date=date(2025, 1, 1),
+                status='active'
+            )
+            for i in range(7)
+        ])
+        self.url = reverse('view_customer_loans', kwargs={'customer_id': self.customer.customer_id})
+
+    def test_default_response_is_the_full_list(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.json()), 7)
+
+    def test_keyset_pages_cover_every_loan_once(self):
+        expected = list(Loan.objects.order_by('loan_id').values_list('loan_id', flat=True))
+        seen = []
+        response = self.client.get(self.url, {'limit': 3})
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            page = response.json()
+            seen.extend(loan['loan_id'] for loan in page['results'])
+            if page['next'] is None:
+                self.assertIsNone(page['next_cursor'])
+                break
+            self.assertEqual(page['next_cursor'], page['results'][-1]['loan_id'])
+            response = self.client.get(page['next'])
+        self.assertEqual(seen, expected)
+
+    def test_pages_use_constant_queries(self):
+        with self.assertNumQueries(3):
+            self.client.get(self.url, {'limit': 2, 'cursor': 0})
+
+    def test_ndjson_stream_matches_list(self):
+        full = self.client.get(self.url).json()
+        response = self.client.get(self.url, {'stream': 'ndjson'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        body = b''.join(response.streaming_content)
+        self.assertTrue(body.endswith(b'\n'))
+        self.assertEqual([json.loads(line) for line in body.splitlines()], full)
+
+        cursor = full[2]['loan_id']
+        response = self.client.get(self.url, {'stream': 'ndjson', 'cursor': cursor, 'limit': 2})
+        lines = b''.join(response.streaming_content).splitlines()
+        self.assertEqual([json.loads(line) for line in lines], full[3:5])
+
+    def test_invalid_parameters_are_rejected(self):
+        for params in ({'limit': 0}, {'limit': 1001}, {'cursor': 'abc'}, {'stream': 'csv'}):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+
+class ConditionalGetTest(APITestCase):
+    def setUp(self):
+        self.customer = Customer.objects.create(
+            first_name="John",
+            last_name="Doe",
+            age=30,
+            phone_number=9876543210,
+            monthly_income=50000,
+            approved_limit=1800000,
+            current_debt=0
+        )
+        self.loan = Loan.objects.create(
+            customer=self.customer,
+            loan_amount=100000,
+            tenure=12,
+            interest_rate=10.5,
+            monthly_installment=calculate_emi(100000, 10.5, 12),
+            start_date=date(2024, 1, 1),
+            end_date=date(2025, 1, 1),
+            status='active'
+        )
+        self.loan_url = reverse('view_loan', kwargs={'loan_id': self.loan.loan_id})
+        self.list_url = reverse('view_customer_loans', kwargs={'customer_id': self.customer.customer_id})
+
+    def test_unchanged_loan_is_answered_with_304_from_one_query(self):
+        response = self.client.get(self.loan_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('Last-Modified', response)
+        etag = response['ETag']
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.loan_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+
+    def test_loan_or_customer_changes_invalidate_the_etag(self):
+        etag = self.client.get(self.loan_url)['ETag']
+
+        self.loan.emis_paid_on_time = 1
+        self.loan.save()
+        response = self.client.get(self.loan_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+
+        self.customer.first_name = "Jane"
+        self.customer.save()
+        response = self.client.get(self.loan_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['customer']['first_name'], "Jane")
+
+    def test_customer_loans_etag_tracks_deletes_and_query_variants(self):
+        response = self.client.get(self.list_url)
+        etag = response['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        response = self.client.get(self.list_url, {'limit': 1}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.loan.delete()
+        response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), [])
+
+    def test_if_modified_since(self):
+        last_modified = self.client.get(self.loan_url)['Last-Modified']
+        response = self.client.get(self.loan_url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_customer_loans_ignore_if_modified_since(self):
+        newest = Loan.objects.create(
+            customer=self.customer, loan_amount=50000, tenure=12, interest_rate=10.5,
+            monthly_installment=calculate_emi(50000, 10.5, 12),
+            start_date=date(2024, 6, 1), end_date=date(2025, 6, 1), status='active'
+        )
+        response = self.client.get(self.list_url)
+        self.assertNotIn('Last-Modified', response)
+
+        # Deleting the newest loan moves the newest updated_at backwards
+        newest.delete()
+        response = self.client.get(
+            self.list_url, HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60)
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.json()), 1)
+
+    def test_missing_records_and_bad_parameters_have_no_validators(self):
+        response = self.client.get(reverse('view_loan', kwargs={'loan_id': 999}))
+        self.assertNotIn('ETag', response)
+        response = self.client.get(self.list_url, {'limit': 0})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertNotIn('ETag', response)
+
+
+class ResponseCacheTest(APITestCase):
+    def setUp(self):
+        # Run commit hooks so the written rows are not dirty for this thread
+        with self.captureOnCommitCallbacks(execute=True):
+            self.customer = Customer.objects.create(
+                first_name="John",
+                last_name="Doe",
+                age=30,
+                phone_number=9876543210,
+                monthly_income=50000,
+                approved_limit=1800000,
+                current_debt=0
+            )
+            self.loan = Loan.objects.create(
+                customer=self.customer,
+                loan_amount=100000,
+                tenure=12,
+                interest_rate=10.5,
+                monthly_installment=calculate_emi(100000, 10.5, 12),
+                start_date=date(2024, 1, 1),
+                end_date=date(2025, 1, 1),
+                status='active'
+            )
+        self.loan_url = reverse('view_loan', kwargs={'loan_id': self.loan.loan_id})
+        self.list_url = reverse('view_customer_loans', kwargs={'customer_id': self.customer.customer_id})
+
+    def test_repeated_reads_skip_the_database(self):
+        self.client.get(self.loan_url)
+        first_loan = self.client.get(self.loan_url)
+        first_list = self.client.get(self.list_url)
+        first_page = self.client.get(self.list_url, {'limit': 1})
+
+        hits = response_cache_stats()['local_hits']
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.loan_url).content, first_loan.content)
+            self.assertEqual(self.client.get(self.list_url).content, first_list.content)
+            self.assertEqual(self.client.get(self.list_url, {'limit': 1}).content, first_page.content)
+            response = self.client.get(self.list_url, HTTP_IF_NONE_MATCH=first_list['ETag'])
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertGreater(response_cache_stats()['local_hits'], hits)
+
+    def test_conditional_get_miss_skips_the_body(self):
+        etag = self.client.get(self.loan_url)['ETag']
+        caches['default'].clear()
+        response_cache.clear_local()
+        with mock.patch('loans.response_cache.loan_detail_row') as loan_detail_row, \
+                mock.patch('loans.response_cache._render') as render, \
+                CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.loan_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"loans"."loan_amount"', queries[0]['sql'])
+        loan_detail_row.assert_not_called()
+        render.assert_not_called()
+
+    def test_new_process_finds_the_loan_owner_in_the_cache(self):
+        body = self.client.get(self.loan_url).content
+        # Another process: empty in-process tiers, shared cache still warm
+        _loan_owners.clear()
+        response_cache.clear_local()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.loan_url).content, body)
+
+    def test_stale_owner_mapping_is_corrected(self):
+        other = Customer.objects.create(
+            first_name="Jane", last_name="Roe", age=31, phone_number=9876543219,
+            monthly_income=60000, approved_limit=2200000, current_debt=0
+        )
+        self.client.get(self.loan_url)
+        # A process that missed the move still maps the loan to its old owner
+        _loan_owners.set(self.loan.loan_id, other.customer_id)
+        response = self.client.get(self.loan_url)
+        self.assertEqual(response.json()['customer']['id'], self.customer.customer_id)
+        self.assertEqual(
+            _loan_owners.get(self.loan.loan_id), self.customer.customer_id
+        )
+
+    def test_loan_and_customer_writes_invalidate(self):
+        self.client.get(self.loan_url)
+        self.client.get(self.loan_url)
+        self.client.get(self.list_url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.loan.emis_paid_on_time = 5
+            self.loan.save()
+        self.assertEqual(self.client.get(self.list_url).json()[0]['repayments_left'], 7)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.customer.first_name = "Jane"
+            self.customer.save()
+        self.assertEqual(self.client.get(self.loan_url).json()['customer']['first_name'], "Jane")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.loan.delete()
+        self.assertEqual(self.client.get(self.list_url).json(), [])
+        self.assertEqual(
+            self.client.get(self.loan_url).status_code, status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+    def test_bulk_writes_invalidate(self):
+        self.client.get(self.list_url)
+        with self.captureOnCommitCallbacks(execute=True):
+            LoanOriginationService.originate_many([{
+                'customer_id': self.customer.customer_id, 'loan_amount': Decimal('1000'),
+                'interest_rate': Decimal('12'), 'tenure': 6
+            }])
+        self.assertEqual(len(self.client.get(self.list_url).json()), Loan.objects.count())
+
+        unknown_url = reverse('view_customer_loans', kwargs={'customer_id': self.customer.customer_id + 1})
+        self.assertEqual(self.client.get(unknown_url).status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        with self.captureOnCommitCallbacks(execute=True):
+            CustomerRegistrationService.register_many([{
+                'first_name': 'Bulk', 'last_name': 'One', 'age': 40,
+                'monthly_income': 60000, 'phone_number': 9000000001
+            }])
+        response = self.client.get(unknown_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), [])
+        self.assertIn('ETag', response)
+
+    def test_health_reports_response_cache(self):
+        response = self.client.get(reverse('health_check'))
+        self.assertIn('response_cache', response.data)
+
+
+@override_settings(ROOT_URLCONF='credit_system.asgi_urls')
+class AsyncReadEndpointTest(APITestCase):
+    """The async views must answer exactly like the sync ones"""
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.customer = Customer.objects.create(
+                first_name="Zoë",
+                last_name="Doe",
+                age=30,
+                phone_number=9876543210,
+                monthly_income=50000,
+                approved_limit=1800000,
+                current_debt=0
+            )
+            for tenure in (12, 24, 36):
+                Loan.objects.create(
+                    customer=self.customer,
+                    loan_amount=100000,
+                    tenure=tenure,
+                    interest_rate=10.5,
+                    monthly_installment=calculate_emi(100000, 10.5, tenure),
+                    emis_paid_on_time=tenure,
+                    start_date=date(2020, 1, 1),
+                    end_date=date(2023, 1, 1),
+                    status='completed'
+                )
+        self.loan = Loan.objects.first()
+        self.async_client = AsyncClient()
+
+    def _sync_get(self, url, params=None, **extra):
+        with self.settings(ROOT_URLCONF='credit_system.urls'):
+            return self.client.get(url, params or {}, **extra)
+
+    def test_async_urlconf_routes_to_async_views(self):
+        from . import async_views
+        with self.settings(ROOT_URLCONF='credit_system.asgi_urls'):
+            match = resolve(reverse('view_loan', kwargs={'loan_id': 1}))
+        self.assertIs(match.func, async_views.view_loan)
+
+    async def test_view_loan_matches_sync(self):
+        url = reverse('view_loan', kwargs={'loan_id': self.loan.loan_id})
+        expected = await sync_to_async(self._sync_get)(url)
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.content, expected.content)
+        self.assertEqual(response['ETag'], expected['ETag'])
+
+        response = await self.async_client.get(url, headers={'If-None-Match': expected['ETag']})
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        missing = reverse('view_loan', kwargs={'loan_id': 999})
+        expected = await sync_to_async(self._sync_get)(missing)
+        response = await self.async_client.get(missing)
+        self.assertEqual((response.status_code, response.content), (expected.status_code, expected.content))
+
+    async def test_view_customer_loans_matches_sync(self):
+        url = reverse('view_customer_loans', kwargs={'customer_id': self.customer.customer_id})
+        for params in ({}, {'limit': 2}, {'limit': 2, 'cursor': self.loan.loan_id}, {'limit': 0}):
+            expected = await sync_to_async(self._sync_get)(url, params)
+            response = await self.async_client.get(url, params)
+            self.assertEqual(response.status_code, expected.status_code, params)
+            self.assertEqual(response.content, expected.content, params)
+
+        expected = (await sync_to_async(self._sync_get)(url)).json()
+        for chunk_size, limit in ((2000, None), (2, None), (2, 3)):
+            with mock.patch('loans.async_views.STREAM_CHUNK_SIZE', chunk_size):
+                params = {'stream': 'ndjson'} if limit is None else {'stream': 'ndjson', 'limit': limit}
+                response = await self.async_client.get(url, params)
+                self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+                body = b''.join([chunk async for chunk in response.streaming_content])
+            self.assertEqual([json.loads(line) for line in body.splitlines()], expected[:limit])
+
+    async def test_check_eligibility_matches_sync(self):
+        url = reverse('check_eligibility')
+        bodies = [
+            {'customer_id': self.customer.customer_id, 'loan_amount': 50000, 'interest_rate': 8, 'tenure': 12},
+            {'customer_id': 999, 'loan_amount': 50000, 'interest_rate': 8, 'tenure': 12},
+            {'customer_id': 999, 'loan_amount': 'x', 'interest_rate': 8, 'tenure': 500},
+            {'customer_id': 'abc'},
+        ]
+
+        def sync_post(body):
+            with self.settings(ROOT_URLCONF='credit_system.urls'):
+                return self.client.post(url, body, format='json')
+
+        for body in bodies:
+            expected = await sync_to_async(sync_post)(body)
+            response = await self.async_client.post(url, body, content_type='application/json')
+            self.assertEqual(response.status_code, expected.status_code, body)
+            self.assertEqual(response.content, expected.content, body)
+
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    async def test_health_check(self):
+        stats = await sync_to_async(table_stats)(refresh=True)
+        response = await self.async_client.get(reverse('health_check'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        body = json.loads(response.content)
+        self.assertEqual(body['stats'], stats)
+        self.assertIn('database_latency_ms', body)
+
+    async def test_health_probes(self):
+        response = await self.async_client.get(reverse('health_live'))
+        self.assertEqual(json.loads(response.content)['status'], 'alive')
+
+        response = await self.async_client.get(reverse('health_ready'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(response.content)['status'], 'ready')
+
+
+class HealthProbeTest(APITestCase):
+    def setUp(self):
+        self.customer = Customer.objects.create(
+            first_name="John",
+            last_name="Doe",
+            age=30,
+            phone_number=9876543210,
+            monthly_income=50000,
+            approved_limit=1800000,
+            current_debt=0
+        )
+        for tenure in (12, 24):
+            Loan.objects.create(
+                customer=self.customer,
+                loan_amount=100000,
+                tenure=tenure,
+                interest_rate=10.5,
+                monthly_installment=calculate_emi(100000, 10.5, tenure),
+                emis_paid_on_time=0,
+                start_date=date(2024, 1, 1),
+                end_date=date(2026, 1, 1),
+                status='active'
+            )
+
+    def test_liveness_never_queries(self):
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('health_live'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], 'alive')
+
+    def test_readiness_reports_latency(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('health_ready'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['database'], 'connected')
+        self.assertGreaterEqual(response.data['database_latency_ms'], 0)
+
+    def test_readiness_unavailable_without_database(self):
+        with mock.patch('loans.views.ping_database', side_effect=Exception('connection refused')):
+            response = self.client.get(reverse('health_ready'))
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response.data['database'], 'disconnected')
+        self.assertEqual(response.data['error'], 'connection refused')
+
+    def test_health_check_serves_cached_stats(self):
+        stats = table_stats(refresh=True)
+        # Only the SELECT 1 ping; the counts come from the cache
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('health_check'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['stats'], stats)
+        self.assertIn('as_of', response.data['stats'])
+        self.assertIn('database_latency_ms', response.data)
+
+    def test_sqlite_estimates_use_largest_primary_key(self):
+        self.assertEqual(estimate_row_counts(), {
+            'customers': Customer.objects.order_by('-customer_id').first().customer_id,
+            'loans': Loan.objects.order_by('-loan_id').first().loan_id,
+        })
+
+    def test_refresh_task_replaces_cached_stats(self):
+        table_stats(refresh=True)
+        Loan.objects.create(
+            customer=self.customer,
+            loan_amount=50000,
+            tenure=6,
+            interest_rate=10.5,
+            monthly_installment=calculate_emi(50000, 10.5, 6),
+            emis_paid_on_time=0,
+            start_date=date(2024, 1, 1),
+            end_date=date(2024, 7, 1),
+            status='active'
+        )
+        result = refresh_health_stats()
+        self.assertEqual(result['status'], 'success')
+        self.assertEqual(table_stats()['loans'], Loan.objects.order_by('-loan_id').first().loan_id)
+
+
+class ExcelReaderTest(TestCase):
+    def _workbook(self, rows):
+        path = os.path.join(tempfile.mkdtemp(), 'data.xlsx')
+        workbook = Workbook()
+        for row in rows:
+            workbook.active.append(row)
+        workbook.save(path)
+        return path
+
+    def test_yields_typed_chunks_of_the_named_columns(self):
+        path = self._workbook([
+            ['loan_id', 'ignored', 'start_date', 'loan_amount'],
+            [1, 'x', datetime(2020, 1, 1), 100.5],
+            [2, 'y', datetime(2020, 2, 1), 200],
+            [None, None, None, None],
+            [3, 'z', datetime(2020, 3, 1), 300],
+        ])
+
+        chunks = list(iter_excel_chunks(path, ['loan_amount', 'loan_id', 'start_date'], chunk_size=2))
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 1])
+        self.assertEqual(list(chunks[0].columns), ['loan_amount', 'loan_id', 'start_date'])
+        self.assertEqual(chunks[0]['loan_id'].tolist(), [1, 2])
+        self.assertEqual(chunks[0]['loan_amount'].tolist(), [100.5, 200])
+        self.assertEqual(chunks[0]['start_date'].iloc[0], datetime(2020, 1, 1))
+        # The index is the sheet row number, blank rows included
+        self.assertEqual(chunks[0].index.tolist(), [2, 3])
+        self.assertEqual(chunks[1].index.tolist(), [5])
+
+    def test_missing_columns(self):
+        path = self._workbook([['loan_id'], [1]])
+        with self.assertRaisesMessage(ValueError, 'Missing columns: start_date'):
+            list(iter_excel_chunks(path, ['loan_id', 'start_date'], chunk_size=10))
+
+
+class IngestionFormatTest(TestCase):
+    """Every input format goes through the same validation and bulk writes"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.customers = pd.DataFrame([{
+            'customer_id': 300 + i,
+            'first_name': 'Format',
+            'last_name': str(i),
+            'phone_number': 8000000000 + i,
+            'monthly_salary': 45000,
+            'approved_limit': 1600000,
+            'current_debt': 0,
+        } for i in range(3)])
+        self.loans = pd.DataFrame([{
+            'customer_id': customer_id,
+            'loan_id': 900 + i,
+            'loan_amount': 120000.5,
+            'tenure': 12,
+            'interest_rate': 11.25,
+            'monthly_repayment': 10612.4,
+            'EMIs_paid_on_time': 12,
+            'start_date': date(2019, 6, 1),
+            'end_date': date(2020, 6, 1),
+        } for i, customer_id in enumerate([300, 301, 302, 999])])
+
+    def _write(self, df, name, file_format):
+        path = os.path.join(self.directory, f'{name}.{file_format}')
+        if file_format == 'xlsx':
+            df.to_excel(path, index=False)
+        elif file_format == 'csv':
+            df.to_csv(path, index=False)
+        elif file_format == 'parquet':
+            df.to_parquet(path, index=False)
+        else:
+            df.to_json(path, orient='records', lines=True, date_format='iso')
+        return path
+
+    def test_formats_ingest_identically(self):
+        formats = ['xlsx', 'csv', 'ndjson']
+        try:
+            import pyarrow  # noqa: F401
+            formats.append('parquet')
+        except ImportError:
+            pass
+
+        for file_format in formats:
+            with self.subTest(file_format=file_format):
+                customer_result = ingest_customer_data(
+                    self._write(self.customers, 'customers', file_format), chunk_size=2
+                )
+                loan_result = ingest_loan_data(self._write(self.loans, 'loans', file_format), chunk_size=2)
+                self.assertEqual(customer_result['status'], 'success', customer_result['message'])
+                self.assertEqual(loan_result['status'], 'success', loan_result['message'])
+                self.assertEqual(customer_result['customers_created'] + customer_result['customers_updated'], 3)
+                self.assertEqual(loan_result['loans_created'] + loan_result['loans_updated'], 3)
+
+                rejects = pd.read_csv(loan_result['rejects_path'])
+                self.assertEqual(rejects['loan_id'].tolist(), [903])
+                self.assertEqual(rejects['reason'].tolist(), ['unknown customer'])
+
+                loan = Loan.objects.get(loan_id=900)
+                self.assertEqual(loan.loan_amount, Decimal('120000.50'))
+                self.assertEqual(loan.monthly_installment, Decimal('10612.40'))
+                self.assertEqual((loan.start_date, loan.status), (date(2019, 6, 1), 'completed'))
+                self.assertEqual(Customer.objects.get(customer_id=301).monthly_income, 45000)
+
+    def test_format_flag_overrides_extension(self):
+        path = os.path.join(self.directory, 'customers.txt')
+        self.customers.to_csv(path, index=False)
+
+        result = ingest_customer_data(path)
+        self.assertEqual(result['status'], 'error')
+        self.assertIn('Cannot detect the format', result['message'])
+
+        result = ingest_customer_data(path, file_format='csv')
+        self.assertEqual(result['customers_created'], 3)
+
+    def test_row_numbers_and_missing_columns(self):
+        path = self._write(self.loans, 'loans', 'csv')
+        chunks = list(iter_chunks(path, ['loan_id'], chunk_size=3))
+        self.assertEqual([chunk.index.tolist() for chunk in chunks], [[2, 3, 4], [5]])
+
+        path = self._write(self.loans, 'loans', 'ndjson')
+        chunks = list(iter_chunks(path, ['loan_id'], chunk_size=3))
+        self.assertEqual([chunk.index.tolist() for chunk in chunks], [[1, 2, 3], [4]])
+
+        for file_format in ('csv', 'ndjson'):
+            path = self._write(self.loans.drop(columns='tenure'), 'partial', file_format)
+            with self.subTest(file_format=file_format):
+                with self.assertRaisesMessage(ValueError, 'Missing columns: tenure'):
+                    list(iter_chunks(path, ['loan_id', 'tenure'], chunk_size=3))
+
+
+class ShardedIngestionTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.customers = pd.DataFrame([{
+            'customer_id': 400 + i,
+            'first_name': 'Shard',
+            'last_name': str(i),
+            'phone_number': 8100000000 + i,
+            'monthly_salary': 45000,
+            'approved_limit': 1600000,
+            'current_debt': 0,
+        } for i in range(7)])
+        # Customers' loans are spread over the shards; customer 999 does not exist
+        self.loans = pd.DataFrame([{
+            'customer_id': 999 if i in (4, 9) else 400 + i % 3,
+            'loan_id': 1000 + i,
+            'loan_amount': 100000,
+            'tenure': 12,
+            'interest_rate': 10,
+            'monthly_repayment': 8792,
+            'EMIs_paid_on_time': 12,
+            'start_date': date(2020, 1, 1),
+            'end_date': date(2021, 1, 1),
+        } for i in range(11)])
+
+    def _write(self, df, name, file_format):
+        path = os.path.join(self.directory, f'{name}.{file_format}')
+        if file_format == 'xlsx':
+            df.to_excel(path, index=False)
+        elif file_format == 'parquet':
+            df.to_parquet(path, index=False, row_group_size=4)
+        elif file_format == 'ndjson':
+            df.to_json(path, orient='records', lines=True, date_format='iso')
+        else:
+            df.to_csv(path, index=False)
+        return path
+
+    def test_plan_shards(self):
+        self.assertEqual(plan_shards(10, 3), [(0, 4), (4, 8), (8, None)])
+        self.assertEqual(plan_shards(2, 5), [(0, 1), (1, None)])
+        self.assertEqual(plan_shards(0, 4), [(0, None)])
+
+    def test_shards_cover_every_record_once(self):
+        formats = ['xlsx', 'csv', 'ndjson']
+        try:
+            import pyarrow  # noqa: F401
+            formats.append('parquet')
+        except ImportError:
+            pass
+
+        for file_format in formats:
+            path = self._write(self.loans, 'loans', file_format)
+            with self.subTest(file_format=file_format):
+                self.assertEqual(count_records(path), 11)
+                whole = pd.concat(iter_chunks(path, ['loan_id'], chunk_size=3))
+                shards = pd.concat([
+                    chunk
+                    for start, stop, seek in plan_file_shards(path, 3)
+                    for chunk in iter_chunks(path, ['loan_id'], 2, start=start, stop=stop, seek=seek)
+                ])
+                self.assertEqual(shards['loan_id'].tolist(), list(range(1000, 1011)))
+                self.assertEqual(shards.index.tolist(), whole.index.tolist())
+
+    def test_line_shards_seek_to_their_first_record(self):
+        for file_format in ('csv', 'ndjson'):
+            path = self._write(self.loans, 'loans', file_format)
+            with self.subTest(file_format=file_format), open(path, 'rb') as lines:
+                plan = plan_file_shards(path, 3)
+                self.assertEqual([(start, stop) for start, stop, _ in plan], plan_shards(11, 3))
+                for start, _, (offset, line_number) in plan:
+                    lines.seek(offset)
+                    self.assertIn(str(1000 + start).encode(), lines.readline())
+                    self.assertEqual(line_number, start + (2 if file_format == 'csv' else 1))
+
+    def test_blank_csv_lines_are_not_records(self):
+        path = os.path.join(self.directory, 'loans.csv')
+        self.loans.to_csv(path, index=False)
+        with open(path) as source:
+            lines = source.read().splitlines(keepends=True)
+        # Blank lines after the header, between records and at the end
+        with open(path, 'w') as target:
+            target.writelines(lines[:1] + ['\n'] + lines[1:6] + ['\n', '  \n'] + lines[6:] + ['\n'])
+
+        self.assertEqual(count_records(path), 11)
+        chunks = [
+            chunk
+            for start, stop, seek in plan_file_shards(path, 3)
+            for chunk in iter_chunks(path, ['loan_id'], 2, start=start, stop=stop, seek=seek)
+        ]
+        loans = pd.concat(chunks)
+        self.assertEqual(loans['loan_id'].tolist(), list(range(1000, 1011)))
+        # Indexed by line number in the file
+        self.assertEqual(loans.index.tolist(), [3, 4, 5, 6, 7] + list(range(10, 16)))
+        self.assertEqual(pd.concat(iter_chunks(path, ['loan_id'], 3)).index.tolist(), loans.index.tolist())
+
+    def test_sharded_ingestion_matches_serial(self):
+        customer_file = self._write(self.customers, 'customers', 'csv')
+        loan_file = self._write(self.loans, 'loans', 'csv')
+
+        result = ingest_all_data_sharded(customer_file, loan_file, 3, chunk_size=2).apply().get()
+        self.assertEqual(result['status'], 'success', result['message'])
+        customer_result, loan_result = result['customer_result'], result['loan_result']
+        self.assertEqual((customer_result['customers_created'], customer_result['shards']), (7, 3))
+        self.assertEqual(
+            (loan_result['loans_created'], loan_result['loans_rejected'], loan_result['shards']), (9, 2, 3)
+        )
+
+        # One merged report, in file order, with no shard reports left behind
+        rejects = pd.read_csv(loan_result['rejects_path'])
+        self.assertEqual(rejects['loan_id'].tolist(), [1004, 1009])
+        self.assertEqual(rejects['row'].tolist(), [6, 11])
+        self.assertEqual(sorted(os.listdir(self.directory)), ['customers.csv', 'loans.csv', 'loans_rejects.csv'])
+
+        profile = CustomerCreditProfile.objects.get(customer_id=400)
+        self.assertEqual(profile.total_loans, Loan.objects.filter(customer_id=400).count())
+        self.assertEqual(profile.total_loans, 3)
+
+    def test_profiles_commit_with_loan_chunks(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ingest_customer_data(self._write(self.customers, 'customers', 'csv'))
+        loan_file = self._write(self.loans.assign(end_date=date(2099, 1, 1)), 'loans', 'csv')
+        state = CreditScoreService.get_credit_state(400)
+        self.assertEqual(state['active_emi_total'], 0)
+
+        with mock.patch.object(CreditProfileService, 'refresh_profiles', side_effect=RuntimeError):
+            result = ingest_loan_data(loan_file, chunk_size=4)
+        self.assertEqual(result['status'], 'error')
+        self.assertFalse(Loan.objects.exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            result = ingest_loan_data(loan_file, chunk_size=4)
+        self.assertEqual(result['loans_created'], 9)
+        state = CreditScoreService.get_credit_state(400)
+        self.assertEqual(state['active_emi_total'], 3 * 8792)
+        self.assertEqual(state, CreditScoreService.get_credit_state(400, use_cache=False))
+
+    def test_loans_wait_for_customers(self):
+        customers = self.customers.astype({'monthly_salary': object})
+        customers.loc[5, 'monthly_salary'] = 'unknown'
+        customer_file = self._write(customers, 'customers', 'csv')
+        loan_file = self._write(self.loans, 'loans', 'csv')
+
+        result = ingest_all_data_sharded(customer_file, loan_file, 3).apply().get()
+        self.assertEqual(result['status'], 'error')
+        self.assertIn('Failed to ingest customer data', result['message'])
+        self.assertFalse(Loan.objects.exists())
@@ -4,9 +4,19 @@ from . import views
 urlpatterns = [
     path('', views.api_documentation, name='api_documentation'),
     path('health', views.health_check, name='health_check'),
+    path('health/live', views.health_live, name='health_live'),
+    path('health/ready', views.health_ready, name='health_ready'),
     path('register', views.register_customer, name='register_customer'),
+    path('register/batch', views.register_customer_batch, name='register_customer_batch'),
     path('check-eligibility', views.check_eligibility, name='check_eligibility'),
+    path('check-eligibility/batch', views.check_eligibility_batch, name='check_eligibility_batch'),
+    path('quote-matrix', views.quote_matrix, name='quote_matrix'),
     path('create-loan', views.create_loan, name='create_loan'),
+    path('create-loan/batch', views.create_loan_batch, name='create_loan_batch'),
+    path('create-loan/async', views.create_loan_async, name='create_loan_async'),
+    path('loan-applications/<int:application_id>', views.view_loan_application, name='view_loan_application'),
     path('view-loan/<int:loan_id>', views.view_loan, name='view_loan'),
+    path('view-loan/<int:loan_id>/schedule', views.view_loan_schedule, name='view_loan_schedule'),
+    path('schedules/export', views.export_schedules, name='export_schedules'),
     path('view-loans/<int:customer_id>', views.view_customer_loans, name='view_customer_loans'),
 ] 
\ No newline at end of file
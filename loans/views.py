@@ -1,17 +1,69 @@
-from rest_framework import status
-from rest_framework.decorators import api_view
+from rest_framework import serializers, status
+from rest_framework.decorators import api_view, renderer_classes
 from rest_framework.response import Response
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from datetime import datetime, date
-from decimal import Decimal
-from django.db import connection
+from django.views.decorators.http import condition
+from datetime import datetime
+from django.db import IntegrityError, transaction
+from django.urls import reverse
 
-from .models import Customer, Loan
+from .models import Customer, Loan, LoanApplication
 from .serializers import (
     RegisterCustomerSerializer, CheckEligibilitySerializer, 
-    CreateLoanSerializer, LoanDetailSerializer, CustomerLoanListSerializer
+    CreateLoanSerializer, CustomerLoanListQuerySerializer,
+    LoanRequestSerializer, BatchRequestSerializer, QuoteMatrixSerializer,
+    LoanApplicationSerializer, RegisterCustomerItemSerializer, BatchRegisterSerializer,
+    compile_item_validator, customer_not_found_errors
 )
-from .services import LoanEligibilityService
+from . import response_cache
+from .conditional import customer_loans_etag, loan_etag, loan_last_modified
+from .health import ping_database, table_stats
+from .idempotency import idempotent
+from .renderers import FastJSONRenderer, PrerenderedResponse, iter_ndjson
+from .rows import LOAN_LIST_COLUMNS, loan_list_page, loan_list_row
+from .schedules import build_schedule, iter_schedule_csv
+from .services import (
+    CreditScoreService, LoanEligibilityService, LoanOriginationService,
+    CustomerRegistrationService
+)
+from .tasks import process_loan_application
+
+
+@api_view(['GET'])
+def health_live(request):
+    """
+    Liveness probe: the process is serving requests. Never touches the database.
+    """
+    return Response({"status": "alive", "timestamp": datetime.now().isoformat()}, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+def health_ready(request):
+    """
+    Readiness probe: one SELECT 1 round trip, reported with its latency
+    """
+    try:
+        latency_ms = ping_database()
+    except Exception as e:
+        return Response(
+            {
+                "status": "unavailable",
+                "timestamp": datetime.now().isoformat(),
+                "database": "disconnected",
+                "error": str(e)
+            },
+            status=status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+    return Response(
+        {
+            "status": "ready",
+            "timestamp": datetime.now().isoformat(),
+            "database": "connected",
+            "database_latency_ms": latency_ms
+        },
+        status=status.HTTP_200_OK
+    )
 
 
 @api_view(['GET'])
@@ -21,21 +73,17 @@ def health_check(request):
     """
     try:
         # Test database connection
-        with connection.cursor() as cursor:
-            cursor.execute("SELECT 1")
-        
-        # Get basic stats
-        customer_count = Customer.objects.count()
-        loan_count = Loan.objects.count()
+        latency_ms = ping_database()
         
         health_status = {
             "status": "healthy",
             "timestamp": datetime.now().isoformat(),
             "database": "connected",
-            "stats": {
-                "customers": customer_count,
-                "loans": loan_count
-            }
+            "database_latency_ms": latency_ms,
+            # Estimated row counts, cached and refreshed in the background
+            "stats": table_stats(),
+            "credit_score_cache": CreditScoreService.cache_stats(),
+            "response_cache": response_cache.cache_stats()
         }
         
         return Response(health_status, status=status.HTTP_200_OK)
@@ -62,12 +110,22 @@ def api_documentation(request):
             "health_check": {
                 "method": "GET",
                 "url": "/health",
-                "description": "Health check endpoint"
+                "description": "Health check endpoint: database latency, estimated row counts and cache metrics"
+            },
+            "health_live": {
+                "method": "GET",
+                "url": "/health/live",
+                "description": "Liveness probe; does not touch the database"
+            },
+            "health_ready": {
+                "method": "GET",
+                "url": "/health/ready",
+                "description": "Readiness probe; 200 with database_latency_ms, or 503 if the database is unreachable"
             },
             "register": {
                 "method": "POST",
                 "url": "/register",
-                "description": "Register a new customer",
+                "description": "Register a new customer (accepts an Idempotency-Key header)",
                 "request_body": {
                     "first_name": "string",
                     "last_name": "string", 
@@ -84,6 +142,19 @@ def api_documentation(request):
                     "phone_number": "integer"
                 }
             },
+            "register_batch": {
+                "method": "POST",
+                "url": "/register/batch",
+                "description": "Register up to 10000 customers at once",
+                "request_body": {
+                    "requests": "array of register request bodies"
+                },
+                "response": {
+                    "results": "array of {index, success, result | errors} in request order; result is a register response",
+                    "succeeded": "integer",
+                    "failed": "integer"
+                }
+            },
             "check_eligibility": {
                 "method": "POST",
                 "url": "/check-eligibility",
@@ -103,10 +174,40 @@ def api_documentation(request):
                     "monthly_installment": "decimal"
                 }
             },
+            "check_eligibility_batch": {
+                "method": "POST",
+                "url": "/check-eligibility/batch",
+                "description": "Check loan eligibility for up to 1000 requests at once",
+                "request_body": {
+                    "requests": "array of check_eligibility request bodies"
+                },
+                "response": {
+                    "results": "array of {index, success, result | errors} in request order",
+                    "succeeded": "integer",
+                    "failed": "integer"
+                }
+            },
+            "quote_matrix": {
+                "method": "POST",
+                "url": "/quote-matrix",
+                "description": "Quote eligibility and EMI over a grid of amounts, tenures and rates",
+                "request_body": {
+                    "customer_id": "integer",
+                    "loan_amounts": "array of decimal",
+                    "tenures": "array of integer (1-120)",
+                    "interest_rates": "array of decimal"
+                },
+                "response": {
+                    "customer_id": "integer",
+                    "credit_score": "decimal",
+                    "shape": "[amounts, tenures, rates]",
+                    "quotes": "array of {loan_amount, tenure, interest_rate, approval, corrected_interest_rate, monthly_installment}"
+                }
+            },
             "create_loan": {
                 "method": "POST",
                 "url": "/create-loan",
-                "description": "Create a new loan for an eligible customer",
+                "description": "Create a new loan for an eligible customer (accepts an Idempotency-Key header)",
                 "request_body": {
                     "customer_id": "integer",
                     "loan_amount": "decimal",
@@ -121,6 +222,50 @@ def api_documentation(request):
                     "monthly_installment": "decimal"
                 }
             },
+            "create_loan_batch": {
+                "method": "POST",
+                "url": "/create-loan/batch",
+                "description": "Create loans for up to 1000 requests at once (accepts an Idempotency-Key header)",
+                "request_body": {
+                    "requests": "array of create_loan request bodies"
+                },
+                "response": {
+                    "results": "array of {index, success, result | errors} in request order; result is a create_loan response",
+                    "succeeded": "integer",
+                    "failed": "integer",
+                    "approved": "integer"
+                }
+            },
+            "create_loan_async": {
+                "method": "POST",
+                "url": "/create-loan/async",
+                "description": "Queue a loan request for background origination (202 Accepted)",
+                "request_body": {
+                    "customer_id": "integer",
+                    "loan_amount": "decimal",
+                    "interest_rate": "decimal",
+                    "tenure": "integer"
+                },
+                "response": {
+                    "application_id": "integer",
+                    "customer_id": "integer",
+                    "status": "string",
+                    "status_url": "string"
+                }
+            },
+            "view_loan_application": {
+                "method": "GET",
+                "url": "/loan-applications/{application_id}",
+                "description": "Status of a queued loan application",
+                "response": {
+                    "application_id": "integer",
+                    "status": "pending | approved | rejected | failed",
+                    "loan_id": "integer or null",
+                    "loan_approved": "boolean or null",
+                    "monthly_installment": "decimal or null",
+                    "message": "string"
+                }
+            },
             "view_loan": {
                 "method": "GET",
                 "url": "/view-loan/{loan_id}",
@@ -134,11 +279,33 @@ def api_documentation(request):
                     "tenure": "integer"
                 }
             },
+            "view_loan_schedule": {
+                "method": "GET",
+                "url": "/view-loan/{loan_id}/schedule",
+                "description": "Month-by-month amortization schedule of a loan",
+                "response": {
+                    "loan_id": "integer",
+                    "total_payment": "decimal",
+                    "total_interest": "decimal",
+                    "schedule": "array of {installment, due_date, payment, principal, interest, balance}"
+                }
+            },
+            "export_schedules": {
+                "method": "GET",
+                "url": "/schedules/export?customer_id={customer_id}",
+                "description": "Stream amortization schedules of all loans as CSV (customer_id optional)",
+                "response": "text/csv"
+            },
             "view_customer_loans": {
                 "method": "GET",
                 "url": "/view-loans/{customer_id}",
                 "description": "View all loans for a customer",
-                "response": "array of loan objects"
+                "query_params": {
+                    "limit": "integer 1-1000 (optional): return one page ordered by loan_id",
+                    "cursor": "integer (optional): next_cursor from the previous page",
+                    "stream": "'ndjson' (optional): stream one loan object per line"
+                },
+                "response": "array of loan objects; with limit, {results, next_cursor, next}"
             }
         },
         "credit_score_calculation": {
@@ -163,6 +330,7 @@ def api_documentation(request):
 
 
 @api_view(['POST'])
+@idempotent('register')
 def register_customer(request):
     """
     Register a new customer
@@ -180,6 +348,78 @@ def register_customer(request):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+def _validate_registration_batch(items):
+    """
+    Validate /register/batch items (precompiled fast path, falling back to
+    the item serializer for anything else), then check phone numbers for
+    duplicates within the batch and against the database in a single
+    indexed query. Returns (valid, errors) like _validate_loan_batch.
+    """
+    item_serializer = RegisterCustomerItemSerializer()
+    fast_validate = compile_item_validator(item_serializer)
+    valid = []
+    errors = {}
+    first_index = {}
+    for index, item in enumerate(items):
+        data = fast_validate(item) if fast_validate else None
+        if data is None:
+            try:
+                data = item_serializer.run_validation(item)
+            except serializers.ValidationError as exc:
+                errors[index] = exc.detail
+                continue
+
+        phone_number = data['phone_number']
+        if phone_number in first_index:
+            errors[index] = {'phone_number': [
+                f"Duplicate phone number in batch (first at index {first_index[phone_number]})"
+            ]}
+            continue
+        first_index[phone_number] = index
+        valid.append((index, data))
+
+    registered = set(Customer.objects.filter(
+        phone_number__in=list(first_index)
+    ).values_list('phone_number', flat=True))
+    for index, data in valid:
+        if data['phone_number'] in registered:
+            errors[index] = {'phone_number': ['customer with this phone number already exists.']}
+    valid = [(index, data) for index, data in valid if index not in errors]
+    return valid, errors
+
+
+@api_view(['POST'])
+def register_customer_batch(request):
+    """
+    Register many customers at once with a single bulk insert
+    """
+    serializer = BatchRegisterSerializer(data=request.data)
+    if serializer.is_valid():
+        try:
+            items = serializer.validated_data['requests']
+            valid, errors = _validate_registration_batch(items)
+
+            customers = CustomerRegistrationService.register_many([data for _, data in valid])
+            representation = RegisterCustomerSerializer().to_representation
+            results = {
+                index: representation(customer)
+                for (index, _), customer in zip(valid, customers)
+            }
+
+            return Response(_batch_response(len(items), results, errors), status=status.HTTP_200_OK)
+        except IntegrityError:
+            return Response(
+                {'error': 'A phone number in the batch was registered concurrently; retry the batch'},
+                status=status.HTTP_409_CONFLICT
+            )
+        except Exception as e:
+            return Response(
+                {'error': f'Failed to create customers: {str(e)}'}, 
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
 @api_view(['POST'])
 def check_eligibility(request):
     """
@@ -194,7 +434,8 @@ def check_eligibility(request):
             tenure = serializer.validated_data['tenure']
             
             result = LoanEligibilityService.check_eligibility(
-                customer_id, loan_amount, interest_rate, tenure
+                customer_id, loan_amount, interest_rate, tenure,
+                credit_context=serializer.credit_context
             )
             
             return Response(result, status=status.HTTP_200_OK)
@@ -206,7 +447,121 @@ def check_eligibility(request):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+def _validate_loan_batch(items):
+    """
+    Validate batch loan request items, checking every customer ID with a
+    single in_bulk query. Returns (valid, errors, customers) where valid is a
+    list of (index, validated_data) and errors maps index to field errors.
+    """
+    valid = []
+    errors = {}
+    for index, item in enumerate(items):
+        item_serializer = LoanRequestSerializer(data=item)
+        if item_serializer.is_valid():
+            valid.append((index, item_serializer.validated_data))
+        else:
+            errors[index] = item_serializer.errors
+
+    customers = Customer.objects.in_bulk({data['customer_id'] for _, data in valid})
+    for index, data in valid:
+        if data['customer_id'] not in customers:
+            errors[index] = customer_not_found_errors(data['customer_id'])
+    valid = [(index, data) for index, data in valid if index not in errors]
+    return valid, errors, customers
+
+
+def _batch_response(size, results, errors):
+    """Per-item results in request order, with failures reported inline"""
+    items = []
+    for index in range(size):
+        if index in errors:
+            items.append({'index': index, 'success': False, 'errors': errors[index]})
+        else:
+            items.append({'index': index, 'success': True, 'result': results[index]})
+    return {
+        'results': items,
+        'succeeded': size - len(errors),
+        'failed': len(errors),
+    }
+
+
 @api_view(['POST'])
+def check_eligibility_batch(request):
+    """
+    Check loan eligibility for many customers at once
+    """
+    serializer = BatchRequestSerializer(data=request.data)
+    if serializer.is_valid():
+        try:
+            items = serializer.validated_data['requests']
+            valid, errors, _ = _validate_loan_batch(items)
+
+            eligibility_results = LoanEligibilityService.check_eligibility_many(
+                [data for _, data in valid]
+            )
+            results = {
+                index: result for (index, _), result in zip(valid, eligibility_results)
+            }
+
+            return Response(_batch_response(len(items), results, errors), status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response(
+                {'error': f'Failed to check eligibility: {str(e)}'}, 
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['POST'])
+def quote_matrix(request):
+    """
+    Quote approval, corrected rate and EMI over a grid of amounts, tenures and rates
+    """
+    serializer = QuoteMatrixSerializer(data=request.data)
+    if serializer.is_valid():
+        try:
+            result = LoanEligibilityService.quote_matrix(
+                serializer.validated_data['customer_id'],
+                serializer.validated_data['loan_amounts'],
+                serializer.validated_data['tenures'],
+                serializer.validated_data['interest_rates'],
+            )
+            if result is None:
+                return Response(
+                    {'error': 'Customer not found'}, 
+                    status=status.HTTP_404_NOT_FOUND
+                )
+
+            return Response(result, status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response(
+                {'error': f'Failed to compute quotes: {str(e)}'}, 
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+def _loan_decision(customer_id, eligibility_result, loan):
+    """create-loan response body for an origination outcome"""
+    if loan is None:
+        return {
+            'loan_id': None,
+            'customer_id': customer_id,
+            'loan_approved': False,
+            'message': eligibility_result.get('message', 'Loan not approved'),
+            'monthly_installment': 0
+        }
+    return {
+        'loan_id': loan.loan_id,
+        'customer_id': customer_id,
+        'loan_approved': True,
+        'message': 'Loan approved successfully',
+        'monthly_installment': float(loan.monthly_installment)
+    }
+
+
+@api_view(['POST'])
+@idempotent('create_loan')
 def create_loan(request):
     """
     Create a new loan for a customer
@@ -219,68 +574,125 @@ def create_loan(request):
             interest_rate = serializer.validated_data['interest_rate']
             tenure = serializer.validated_data['tenure']
             
-            # Check eligibility first
-            eligibility_result = LoanEligibilityService.check_eligibility(
-                customer_id, loan_amount, interest_rate, tenure
+            # Reuse the credit context loaded during validation
+            eligibility_result, loan = LoanOriginationService.originate(
+                customer_id, loan_amount, interest_rate, tenure,
+                credit_context=serializer.credit_context
             )
             
-            if not eligibility_result['approval']:
-                return Response({
-                    'loan_id': None,
-                    'customer_id': customer_id,
-                    'loan_approved': False,
-                    'message': eligibility_result.get('message', 'Loan not approved'),
-                    'monthly_installment': 0
-                }, status=status.HTTP_400_BAD_REQUEST)
-            
-            # Create the loan
-            customer = Customer.objects.get(customer_id=customer_id)
+            decision = _loan_decision(customer_id, eligibility_result, loan)
+            if loan is None:
+                return Response(decision, status=status.HTTP_400_BAD_REQUEST)
+            return Response(decision, status=status.HTTP_201_CREATED)
             
-            # Calculate start and end dates
-            start_date = date.today()
-            end_date = date.today().replace(year=date.today().year + tenure // 12)
-            
-            loan = Loan.objects.create(
-                customer=customer,
-                loan_amount=loan_amount,
-                tenure=tenure,
-                interest_rate=eligibility_result['corrected_interest_rate'],
-                monthly_installment=eligibility_result['monthly_installment'],
-                start_date=start_date,
-                end_date=end_date,
-                status='active'
+        except Exception as e:
+            return Response(
+                {'error': f'Failed to create loan: {str(e)}'}, 
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
-            
-            return Response({
-                'loan_id': loan.loan_id,
-                'customer_id': customer_id,
-                'loan_approved': True,
-                'message': 'Loan approved successfully',
-                'monthly_installment': float(loan.monthly_installment)
-            }, status=status.HTTP_201_CREATED)
-            
-        except Customer.DoesNotExist:
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+@api_view(['POST'])
+@idempotent('create_loan_batch')
+def create_loan_batch(request):
+    """
+    Create loans for many pre-approved requests at once; approvals earlier in
+    the batch count toward a customer's EMI cap for later items
+    """
+    serializer = BatchRequestSerializer(data=request.data)
+    if serializer.is_valid():
+        try:
+            items = serializer.validated_data['requests']
+            valid, errors, _ = _validate_loan_batch(items)
+
+            outcomes = LoanOriginationService.originate_many([data for _, data in valid])
+            results = {
+                index: _loan_decision(data['customer_id'], eligibility_result, loan)
+                for (index, data), (eligibility_result, loan) in zip(valid, outcomes)
+            }
+
+            response = _batch_response(len(items), results, errors)
+            response['approved'] = sum(1 for _, loan in outcomes if loan is not None)
+            return Response(response, status=status.HTTP_200_OK)
+        except Exception as e:
             return Response(
-                {'error': 'Customer not found'}, 
-                status=status.HTTP_404_NOT_FOUND
+                {'error': f'Failed to create loans: {str(e)}'}, 
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+def _queue_application(application):
+    """
+    Queue a committed application for processing. If the broker refuses it,
+    mark it failed rather than leave it pending with nothing to process it.
+    """
+    try:
+        process_loan_application.delay(application.application_id)
+    except Exception as e:
+        application.status = 'failed'
+        application.message = f'Failed to queue loan application: {str(e)}'[:255]
+        application.save(update_fields=['status', 'message', 'updated_at'])
+
+
+@api_view(['POST'])
+def create_loan_async(request):
+    """
+    Queue a loan request for background origination; poll the returned
+    application for the outcome
+    """
+    serializer = CreateLoanSerializer(data=request.data)
+    if serializer.is_valid():
+        customer_id = serializer.validated_data['customer_id']
+        try:
+            application = LoanApplication.objects.create(**serializer.validated_data)
+            application_id = application.application_id
+            # Queue once the row is committed, so the worker can claim it
+            transaction.on_commit(lambda: _queue_application(application))
         except Exception as e:
             return Response(
-                {'error': f'Failed to create loan: {str(e)}'}, 
+                {'error': f'Failed to queue loan application: {str(e)}'}, 
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+
+        if application.status == 'failed':
+            return Response({
+                'error': application.message,
+                'application_id': application_id,
+                'status': application.status
+            }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        return Response({
+            'application_id': application_id,
+            'customer_id': customer_id,
+            'status': application.status,
+            'status_url': reverse('view_loan_application', kwargs={'application_id': application_id})
+        }, status=status.HTTP_202_ACCEPTED)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
 @api_view(['GET'])
+def view_loan_application(request, application_id):
+    """
+    View the status and outcome of a queued loan application
+    """
+    application = get_object_or_404(LoanApplication, application_id=application_id)
+    return Response(LoanApplicationSerializer(application).data, status=status.HTTP_200_OK)
+
+
+@condition(etag_func=loan_etag, last_modified_func=loan_last_modified)
+@api_view(['GET'])
+@renderer_classes([FastJSONRenderer])
 def view_loan(request, loan_id):
     """
     View loan details by loan ID
     """
     try:
-        loan = get_object_or_404(Loan, loan_id=loan_id)
-        serializer = LoanDetailSerializer(loan)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        body = response_cache.loan_body(loan_id)
+        if body is None:
+            raise Http404('No Loan matches the given query.')
+        return PrerenderedResponse(body, status=status.HTTP_200_OK)
     except Exception as e:
         return Response(
             {'error': f'Failed to retrieve loan: {str(e)}'}, 
@@ -288,20 +700,48 @@ def view_loan(request, loan_id):
         )
 
 
+@condition(etag_func=customer_loans_etag)
 @api_view(['GET'])
+@renderer_classes([FastJSONRenderer])
 def view_customer_loans(request, customer_id):
     """
-    View all loans for a customer
+    View all loans for a customer.
+    ?limit=N returns one keyset page ordered by loan_id, continued with
+    ?cursor=<next_cursor>; ?stream=ndjson streams one loan per line.
     """
-    try:
+    query = CustomerLoanListQuerySerializer(data=request.query_params)
+    if not query.is_valid():
+        return Response(query.errors, status=status.HTTP_400_BAD_REQUEST)
+    params = query.validated_data
+
+    def loan_rows():
         # Check if customer exists
-        customer = get_object_or_404(Customer, customer_id=customer_id)
+        get_object_or_404(Customer, customer_id=customer_id)
         
         # Get all loans for the customer
-        loans = Loan.objects.filter(customer_id=customer_id)
-        serializer = CustomerLoanListSerializer(loans, many=True)
-        
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        loans = Loan.objects.filter(customer_id=customer_id).order_by('loan_id')
+        if 'cursor' in params:
+            loans = loans.filter(loan_id__gt=params['cursor'])
+        return loans.values_list(*LOAN_LIST_COLUMNS)
+
+    def build():
+        rows = loan_rows()
+        if 'limit' in params:
+            return loan_list_page(request, rows[:params['limit'] + 1], params['limit'])
+        return [loan_list_row(row) for row in rows]
+
+    try:
+        if params.get('stream') == 'ndjson':
+            rows = loan_rows()
+            if 'limit' in params:
+                rows = rows[:params['limit']]
+            return StreamingHttpResponse(
+                iter_ndjson(rows.iterator(chunk_size=2000), loan_list_row),
+                content_type='application/x-ndjson'
+            )
+
+        body = response_cache.customer_loans_body(customer_id, request.build_absolute_uri(), build)
+        return PrerenderedResponse(body, status=status.HTTP_200_OK)
     except Customer.DoesNotExist:
         return Response(
             {'error': 'Customer not found'}, 
@@ -312,3 +752,40 @@ def view_customer_loans(request, customer_id):
             {'error': f'Failed to retrieve customer loans: {str(e)}'}, 
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
+
+
+@api_view(['GET'])
+def view_loan_schedule(request, loan_id):
+    """
+    View the month-by-month amortization schedule of a loan
+    """
+    try:
+        loan = get_object_or_404(Loan, loan_id=loan_id)
+        return Response(build_schedule(loan), status=status.HTTP_200_OK)
+    except Http404:
+        raise
+    except Exception as e:
+        return Response(
+            {'error': f'Failed to build loan schedule: {str(e)}'}, 
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@api_view(['GET'])
+def export_schedules(request):
+    """
+    Stream amortization schedules for all loans (optionally one customer's) as CSV
+    """
+    loans = Loan.objects.all()
+    customer_id = request.query_params.get('customer_id')
+    if customer_id is not None:
+        if not customer_id.isdigit():
+            return Response(
+                {'customer_id': ['A valid integer is required.']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        loans = loans.filter(customer_id=int(customer_id))
+
+    response = StreamingHttpResponse(iter_schedule_csv(loans), content_type='text/csv')
+    response['Content-Disposition'] = 'attachment; filename="loan_schedules.csv"'
+    return response